@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Event
+from .models import Event, UpcomingEvent
 
 # Register your models here.
 admin.site.register(Event)
+admin.site.register(UpcomingEvent)
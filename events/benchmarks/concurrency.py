@@ -0,0 +1,123 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from typing import Any
+import asyncio
+import logging
+import statistics
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIENTS = (50, 500)
+DEFAULT_REQUESTS_PER_CLIENT = 10
+# Serves the sync views under /wsgi/ and their async versions under /asgi/
+BENCHMARK_URLCONF = "events.benchmarks.urls"
+
+
+@dataclass
+class ConcurrencyTiming:
+    """
+    Throughput of a view under a number of clients requesting it at once.
+    """
+
+    view: str
+    server: str
+    clients: int
+    requests: int
+    errors: int
+    seconds: float
+    requests_per_sec: float
+    median_ms: float
+    p95_ms: float
+
+
+def _timing(view: str, server: str, clients: int, latencies: list[float], errors: int,
+            seconds: float) -> ConcurrencyTiming:
+    ordered = sorted(latencies) or [0.0]
+    return ConcurrencyTiming(
+        view=view,
+        server=server,
+        clients=clients,
+        requests=len(latencies),
+        errors=errors,
+        seconds=round(seconds, 4),
+        requests_per_sec=round(len(latencies) / seconds, 1),
+        median_ms=round(statistics.median(ordered), 3),
+        p95_ms=round(ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))], 3),
+    )
+
+
+def run_wsgi(view: str, url: str, params: dict[str, str], clients: int,
+             requests_per_client: int) -> ConcurrencyTiming:
+    """
+    Request the sync version of a view from `clients` threads at once, as a threaded WSGI
+    server with one thread per client would.
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def run_client(_):
+        nonlocal errors
+        client = Client()
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            response = client.get(f"/wsgi{url}", params)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+                errors += response.status_code != 200
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(run_client, range(clients)))
+    return _timing(view, "wsgi", clients, latencies, errors, time.perf_counter() - start)
+
+
+async def run_asgi(view: str, url: str, params: dict[str, str], clients: int,
+                   requests_per_client: int) -> ConcurrencyTiming:
+    """
+    Request the async version of a view from `clients` coroutines at once on one event
+    loop, as an ASGI server would.
+    """
+    latencies = []
+    errors = 0
+
+    async def run_client():
+        nonlocal errors
+        client = AsyncClient()
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            response = await client.get(f"/asgi{url}", params)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client() for _ in range(clients)))
+    return _timing(view, "asgi", clients, latencies, errors, time.perf_counter() - start)
+
+
+def run_concurrency_benchmarks(benchmarks: list[tuple[str, str, dict[str, str]]],
+                               clients: list[int] = DEFAULT_CLIENTS,
+                               requests_per_client: int = DEFAULT_REQUESTS_PER_CLIENT) -> list[dict[str, Any]]:
+    """
+    Compare the throughput of the sync views served as under WSGI against their async
+    versions served as under ASGI, at each number of concurrent `clients`. Requests go
+    straight to the request handlers, leaving out the network and the server itself.
+    """
+    results = []
+    with override_settings(ROOT_URLCONF=BENCHMARK_URLCONF, ALLOWED_HOSTS=["testserver"]):
+        for view, url, params in benchmarks:
+            # Warm up the caches and indexes both versions share
+            Client().get(f"/wsgi{url}", params)
+
+            for count in clients:
+                for timing in [run_wsgi(view, url, params, count, requests_per_client),
+                               asyncio.run(run_asgi(view, url, params, count, requests_per_client))]:
+                    logger.info(f"{timing.view} over {timing.server} with {count} clients: "
+                                f"{timing.requests_per_sec} requests/sec, p95 {timing.p95_ms}ms")
+                    results.append(asdict(timing))
+
+    return results
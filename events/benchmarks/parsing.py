@@ -0,0 +1,65 @@
+from bs4 import BeautifulSoup
+from datetime import datetime
+from events.scraper.parse import DEFAULT_PARSER, FIGHTER_NAME_SELECTORS, FightCardParser, parse_event_listing
+from pathlib import Path
+from typing import Any, Callable
+import statistics
+import time
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+# Fixtures named after the events listing page, every other fixture is an event page
+LISTING_FIXTURE_PREFIX = "events"
+
+
+def _full_parse_listing(html: bytes, now: datetime):
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.select("article.c-card-event--result")
+
+
+def _full_parse_fight_card(html: bytes):
+    soup = BeautifulSoup(html, 'html.parser')
+    for selector in FIGHTER_NAME_SELECTORS:
+        elements = soup.select(selector)
+        if elements:
+            return elements
+    return []
+
+
+def _time(func: Callable[[], Any], repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 3), "min_ms": round(min(samples), 3)}
+
+
+def run_parsing_benchmarks(fixtures_dir: Path = FIXTURES_DIR, repeat: int = 20) -> dict[str, Any]:
+    """
+    Time parsing every saved HTML page in `fixtures_dir`, parsing the whole page with the
+    builtin parser as the scraper used to against the targeted parsing with each parser.
+    """
+    parsers = sorted({'html.parser', DEFAULT_PARSER})
+    # Every event in the fixtures counts as upcoming
+    now = datetime.fromtimestamp(0)
+    results = {}
+
+    for path in sorted(Path(fixtures_dir).glob("*.html")):
+        html = path.read_bytes()
+        listing = path.name.startswith(LISTING_FIXTURE_PREFIX)
+
+        if listing:
+            timings = {"full": _time(lambda: _full_parse_listing(html, now), repeat)}
+            for parser in parsers:
+                timings[f"targeted_{parser}"] = _time(
+                    lambda: parse_event_listing(html, now, parser=parser), repeat)
+        else:
+            timings = {"full": _time(lambda: _full_parse_fight_card(html), repeat)}
+            for parser in parsers:
+                card_parser = FightCardParser(parser=parser)
+                timings[f"targeted_{parser}"] = _time(lambda: card_parser.parse(html), repeat)
+
+        results[path.name] = {"bytes": len(html), "page": "listing" if listing else "event",
+                              "timings": timings}
+
+    return results
@@ -0,0 +1,100 @@
+from dataclasses import dataclass, field
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Only reads are planned, writes of new rows never scan
+PLANNED_STATEMENTS = ("SELECT", "UPDATE", "DELETE")
+# A SQLite plan step reading every row of a table, without an index to search or walk
+SQLITE_FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+@dataclass
+class QueryPlan:
+    """
+    How the database plans to run a query, and the tables it would read in full.
+    """
+
+    sql: str
+    plan: list[str]
+    full_scans: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f"{self.sql}\n  " + "\n  ".join(self.plan)
+
+
+def _explain_sqlite(cursor, sql: str, params, tables: set[str]) -> QueryPlan:
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+    plan = [row[-1] for row in cursor.fetchall()]
+    scans = [m.group(1) for m in map(SQLITE_FULL_SCAN.match, plan) if m and m.group(1) in tables]
+    return QueryPlan(sql, plan, scans)
+
+
+def _seq_scans(node: dict) -> list[str]:
+    scans = [node["Relation Name"]] if node["Node Type"] == "Seq Scan" else []
+    for child in node.get("Plans", []):
+        scans += _seq_scans(child)
+    return scans
+
+
+def _explain_postgres(cursor, sql: str, params, tables: set[str]) -> QueryPlan:
+    # Tiny test tables are cheapest to scan, so the planner is told to avoid scans at any
+    # cost. A scan left in the plan then means no index can answer the query.
+    with transaction.atomic(using=cursor.db.alias):
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    scans = [table for table in _seq_scans(plan[0]["Plan"]) if table in tables]
+    return QueryPlan(sql, json.dumps(plan, indent=1).splitlines(), scans)
+
+
+def explain(sql: str, params=None, using: str = DEFAULT_DB_ALIAS) -> QueryPlan:
+    """
+    The plan of a query on SQLite or PostgreSQL, noting which of the project's tables it
+    would scan in full.
+    """
+    connection = connections[using]
+    tables = set(connection.introspection.table_names())
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            return _explain_postgres(cursor, sql, params, tables)
+        if connection.vendor == "sqlite":
+            return _explain_sqlite(cursor, sql, params, tables)
+    raise NotImplementedError(f"Query plans of {connection.vendor} are not supported")
+
+
+class capture_query_plans:
+    """
+    Context manager recording the queries run inside it, then explaining each of them once it
+    exits. The plans are available as `plans` and the ones scanning a table in full as
+    `full_scans`.
+    """
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS):
+        self.using = using
+        self.queries = []
+        self.plans: list[QueryPlan] = []
+
+    def _record(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith(PLANNED_STATEMENTS) and not many:
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = connections[self.using].execute_wrapper(self._record)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._wrapper.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            self.plans = [explain(sql, params, self.using) for sql, params in self.queries]
+            logger.debug(f"Explained {len(self.plans)} quer(ies)")
+
+    @property
+    def full_scans(self) -> list[QueryPlan]:
+        return [plan for plan in self.plans if plan.full_scans]
@@ -0,0 +1,201 @@
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from events.benchmarks.concurrency import run_concurrency_benchmarks
+from events.benchmarks.synthetic import generate_raw_data
+from events.cache import clear_process_caches
+from events.management.commands.load_database import Command as LoadDatabaseCommand
+from fighters.models import Fighter
+from pathlib import Path
+from typing import Any
+import logging
+import platform
+import statistics
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_REPEAT = 20
+
+
+@dataclass
+class ViewTiming:
+    """
+    Response times of repeated requests to a single view.
+    """
+
+    view: str
+    url: str
+    params: dict[str, str]
+    repeat: int
+    median_ms: float
+    p95_ms: float
+    min_ms: float
+    max_ms: float
+    db_queries: int
+    response_bytes: int
+
+
+def _percentile(samples: list[float], pct: float):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
+
+
+def time_view(client: Client, view: str, url: str, params: dict[str, str], repeat: int) -> ViewTiming:
+    """
+    Request `url` `repeat` times after one warm up request, timing each response.
+    """
+    queries = 0
+
+    def count_query(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_query):
+        response = client.get(url, params)
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"{view} responded with status {response.status_code}")
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(url, params)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return ViewTiming(
+        view=view,
+        url=url,
+        params=params,
+        repeat=repeat,
+        median_ms=round(statistics.median(samples), 3),
+        p95_ms=round(_percentile(samples, 95), 3),
+        min_ms=round(min(samples), 3),
+        max_ms=round(max(samples), 3),
+        db_queries=queries,
+        response_bytes=len(response.content),
+    )
+
+
+def view_benchmarks() -> list[tuple[str, str, dict[str, str]]]:
+    """
+    Build the view requests to time, searching for a fighter taken from the loaded data.
+    """
+    fighter = Fighter.objects.order_by("id").first()
+    full_name = f"{fighter.first_name} {fighter.last_name}"
+
+    return [
+        ("home_events", "/events/", {}),
+        ("search_fighter", "/fighters/", {"q": full_name}),
+        ("search_fighter_last_name", "/fighters/", {"q": fighter.last_name}),
+        ("fighter_results", "/fighters/results/", {"q": full_name}),
+        ("fighter_results_partial", "/fighters/results/", {"q": fighter.first_name[:3]}),
+        ("autocomplete_fighters", "/fighters/autocomplete/", {"q": fighter.first_name[:2]}),
+    ]
+
+
+def run_scale(scale: float, repeat: int = DEFAULT_REPEAT, workers: int | None = None,
+              seed: int = 0, clients: list[int] = ()) -> dict[str, Any]:
+    """
+    Generate a synthetic dataset at `scale`, load it into the current database with
+    load_database and time each view against the loaded data. If any numbers of `clients`
+    are given, the throughput of the sync and async views is compared under as many
+    concurrent clients.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = Path(tmp) / "raw"
+
+        start = time.perf_counter()
+        generated = generate_raw_data(raw_dir, scale=scale, seed=seed)
+        generate_time = time.perf_counter() - start
+        logger.info(f"Generated {scale}x dataset in {generate_time:.2f}s")
+
+        command = LoadDatabaseCommand()
+        start = time.perf_counter()
+        call_command(command, raw_dir=raw_dir, workers=workers, data_dir=Path(tmp) / "data",
+                     watermark=Path(tmp) / "watermark.json")
+        load_time = time.perf_counter() - start
+
+    if "load_fight_stats" not in command.stage_metrics:
+        raise RuntimeError(
+            f"load_database did not complete, ran stages: {', '.join(command.stage_metrics)}")
+
+    # Each scale starts from a fresh database, and so from the first data generation again
+    cache.clear()
+    clear_process_caches()
+    client = Client()
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        views = [time_view(client, *benchmark, repeat=repeat)
+                 for benchmark in view_benchmarks()]
+    concurrency = run_concurrency_benchmarks(view_benchmarks(), clients) if clients else []
+
+    return {
+        "scale": scale,
+        "seed": seed,
+        "generated_rows": generated,
+        "generate_time": round(generate_time, 4),
+        "load_time": round(load_time, 4),
+        "stages": {name: metrics.as_record() for name, metrics in command.stage_metrics.items()},
+        "views": {timing.view: asdict(timing) for timing in views},
+        "concurrency": concurrency,
+    }
+
+
+def run_benchmarks(scales: list[float] = DEFAULT_SCALES, repeat: int = DEFAULT_REPEAT,
+                   workers: int | None = None, seed: int = 0, clients: list[int] = ()) -> dict[str, Any]:
+    """
+    Run the benchmark at each scale, each against its own freshly created test database so
+    the real database is never touched.
+    """
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": connection.vendor,
+        },
+        "runs": [],
+    }
+
+    for scale in scales:
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results["runs"].append(run_scale(scale, repeat, workers, seed, clients))
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+    return results
+
+
+def compare_results(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """
+    Describe how the stage and view timings of each scale changed from `baseline`.
+    """
+    lines = []
+    baseline_runs = {run["scale"]: run for run in baseline.get("runs", [])}
+
+    for run in current["runs"]:
+        previous = baseline_runs.get(run["scale"])
+        if previous is None:
+            continue
+
+        lines.append(f"{run['scale']}x:")
+        timings = [(f"stage {name}", metrics["wall_time"], previous["stages"].get(name, {}).get("wall_time"))
+                   for name, metrics in run["stages"].items()]
+        timings += [(f"view {name}", timing["median_ms"] / 1000, previous["views"].get(name, {}).get("median_ms", 0) / 1000 or None)
+                    for name, timing in run["views"].items()]
+
+        for label, now, before in timings:
+            if not before:
+                lines.append(f"  {label}: {now:.4f}s (new)")
+                continue
+            lines.append(f"  {label}: {before:.4f}s -> {now:.4f}s ({now / before:.2f}x)")
+
+    return lines
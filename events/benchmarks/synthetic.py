@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from pathlib import Path
+import csv
+import random
+
+# Approximate volume of the real scrape_ufc_stats dataset, used as the 1x scale
+BASE_EVENTS = 740
+BASE_FIGHTERS = 4400
+FIGHTS_PER_EVENT = (8, 14)
+
+FIRST_NAMES = [
+    "Aaron", "Alex", "Alexander", "Anderson", "Andre", "Anthony", "Ben", "Brandon", "Bruno",
+    "Carlos", "Charles", "Chris", "Daniel", "David", "Derrick", "Dustin", "Eddie", "Frankie",
+    "Gabriel", "Georges", "Israel", "Jack", "Jamahal", "Jan", "Joe", "John", "Jon", "Jose",
+    "Justin", "Kamaru", "Khabib", "Leon", "Marcus", "Mark", "Matt", "Max", "Michael", "Nate",
+    "Paulo", "Rafael", "Robert", "Ryan", "Sean", "Stipe", "Thiago", "Tony", "Volkan", "Zabit",
+]
+NICKNAMES = [
+    "The Eagle", "Bones", "The Reaper", "Blessed", "Borrachinha", "Do Bronx", "Rush",
+    "The Last Stylebender", "Cowboy", "The Diamond", "Poatan", "Sugar", "No Time", "",
+]
+LAST_NAME_SYLLABLES = [
+    "ba", "de", "gra", "ho", "ka", "lo", "ma", "ne", "no", "pe", "ri", "sa", "sha", "ta", "ve",
+    "vo", "za", "mir", "rov", "son", "ez", "ski", "ov", "ra", "do", "li", "ga", "to", "mu", "ki",
+]
+LOCATIONS = [
+    "Las Vegas, Nevada, USA", "Abu Dhabi, Abu Dhabi, United Arab Emirates",
+    "Newark, New Jersey, USA", "London, England, United Kingdom", "Rio de Janeiro, Brazil",
+    "Sydney, New South Wales, Australia", "Doha, Qatar", "Paris, Ile-de-France, France",
+]
+WEIGHT_CLASSES = [
+    "Flyweight", "Bantamweight", "Featherweight", "Lightweight", "Welterweight",
+    "Middleweight", "Light Heavyweight", "Heavyweight",
+]
+WEIGHTS = ["125 lbs.", "135 lbs.", "145 lbs.", "155 lbs.", "170 lbs.",
+           "185 lbs.", "205 lbs.", "245 lbs."]
+METHODS = [("KO/TKO", "Punches"), ("Submission", "Rear Naked Choke"),
+           ("Decision - Unanimous", ""), ("Decision - Split", "")]
+REFEREES = ["Herb Dean", "Marc Goddard", "Jason Herzog", "Keith Peterson", "Mike Beltran"]
+STANCES = ["Orthodox", "Southpaw", "Switch", "--"]
+
+FIGHT_STATS_HEADER = [
+    "EVENT", "BOUT", "ROUND", "FIGHTER", "KD", "SIG.STR.", "SIG.STR. %", "TOTAL STR.", "TD",
+    "TD %", "SUB.ATT", "REV.", "CTRL", "HEAD", "BODY", "LEG", "DISTANCE", "CLINCH", "GROUND",
+]
+
+
+def _last_name(i: int):
+    """
+    Build a unique, pronounceable last name for the `i`th fighter of a first name.
+    """
+    syllables = []
+    while True:
+        i, r = divmod(i, len(LAST_NAME_SYLLABLES))
+        syllables.append(LAST_NAME_SYLLABLES[r])
+        if i == 0:
+            break
+        i -= 1
+    return "".join(syllables).capitalize()
+
+
+def _ratio(rng: random.Random, attempted_max: int):
+    attempted = rng.randint(0, attempted_max)
+    return f"{rng.randint(0, attempted)} of {attempted}"
+
+
+def _percent(ratio: str):
+    hit, attempted = map(int, ratio.split(" of "))
+    return f"{round(100 * hit / attempted)}%" if attempted else "---"
+
+
+def generate_raw_data(dest: Path, scale: float = 1, seed: int = 0) -> dict[str, int]:
+    """
+    Write synthetic raw csv files shaped like the scrape_ufc_stats data to `dest`, at `scale`
+    times the volume of the real dataset. Output is deterministic for a given `seed`.
+
+    Returns the number of rows written to each file.
+    """
+    dest = Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
+    n_events = max(1, round(BASE_EVENTS * scale))
+    n_fighters = max(2, round(BASE_FIGHTERS * scale))
+
+    fighters = [(FIRST_NAMES[i % len(FIRST_NAMES)], _last_name(i // len(FIRST_NAMES)))
+                for i in range(n_fighters)]
+    counts: dict[str, int] = {}
+
+    def fighter_url(i: int):
+        return f"http://ufcstats.com/fighter-details/{i:016x}"
+
+    with open(dest / "ufc_fighter_details.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["FIRST", "LAST", "NICKNAME", "URL"])
+        for i, (first, last) in enumerate(fighters):
+            writer.writerow([first, last, rng.choice(NICKNAMES), fighter_url(i)])
+    counts["ufc_fighter_details.csv"] = n_fighters
+
+    with open(dest / "ufc_fighter_tott.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["FIGHTER", "HEIGHT", "WEIGHT", "REACH", "STANCE", "DOB", "URL"])
+        for i, (first, last) in enumerate(fighters):
+            dob = date(1970, 1, 1) + timedelta(days=rng.randint(0, 12000))
+            writer.writerow([
+                f"{first} {last}",
+                f"{rng.randint(5, 6)}' {rng.randint(0, 11)}\"",
+                rng.choice(WEIGHTS),
+                f'{rng.randint(62, 84)}"' if rng.random() > 0.2 else "--",
+                rng.choice(STANCES),
+                dob.strftime("%b %d, %Y"),
+                fighter_url(i),
+            ])
+    counts["ufc_fighter_tott.csv"] = n_fighters
+
+    files = {name: open(dest / name, "w", newline="") for name in [
+        "ufc_event_details.csv", "ufc_fight_details.csv",
+        "ufc_fight_results.csv", "ufc_fight_stats.csv"]}
+    try:
+        events, details, results, stats = (csv.writer(files[name]) for name in files)
+        events.writerow(["EVENT", "URL", "DATE", "LOCATION"])
+        details.writerow(["EVENT", "BOUT", "URL"])
+        results.writerow(["EVENT", "BOUT", "OUTCOME", "WEIGHTCLASS", "METHOD", "ROUND", "TIME",
+                          "TIME FORMAT", "REFEREE", "DETAILS", "URL"])
+        stats.writerow(FIGHT_STATS_HEADER)
+        counts.update({name: 0 for name in files})
+
+        # The raw data lists the most recent event first
+        first_date = date(1993, 11, 12)
+        for e in reversed(range(n_events)):
+            event_date = first_date + timedelta(days=e * 11)
+            n_fights = rng.randint(*FIGHTS_PER_EVENT)
+            bouts = [rng.sample(range(n_fighters), 2) for _ in range(n_fights)]
+
+            headliners = [fighters[i][1] for i in bouts[0]]
+            event_name = f"UFC {e + 1}: {headliners[0]} vs. {headliners[1]}"
+            events.writerow([event_name, f"http://ufcstats.com/event-details/{e:016x}",
+                             event_date.strftime("%B %d, %Y"), rng.choice(LOCATIONS)])
+            counts["ufc_event_details.csv"] += 1
+
+            for b, (red, blue) in enumerate(bouts):
+                bout = f"{' '.join(fighters[red])} vs. {' '.join(fighters[blue])}"
+                url = f"http://ufcstats.com/fight-details/{e:010x}{b:06x}"
+                scheduled = 5 if b == 0 else 3
+                rounds = rng.randint(1, scheduled)
+                method, method_details = rng.choice(METHODS)
+                if method.startswith("Decision"):
+                    rounds = scheduled
+
+                details.writerow([event_name, bout, url])
+                results.writerow([
+                    event_name, bout, rng.choice(["W/L", "L/W", "D/D"]),
+                    f"{rng.choice(WEIGHT_CLASSES)} Bout", method, rounds,
+                    f"{rng.randint(0, 4)}:{rng.randint(0, 59):02d}",
+                    f"{scheduled} Rnd ({'-'.join(['5'] * scheduled)})",
+                    rng.choice(REFEREES), method_details, url,
+                ])
+                counts["ufc_fight_details.csv"] += 1
+                counts["ufc_fight_results.csv"] += 1
+
+                for r in range(1, rounds + 1):
+                    for fighter in (red, blue):
+                        sig = _ratio(rng, 60)
+                        td = _ratio(rng, 6)
+                        stats.writerow([
+                            event_name, bout, f"Round {r}", " ".join(fighters[fighter]),
+                            rng.choice([0, 0, 0, 1]), sig, _percent(sig), _ratio(rng, 90), td,
+                            _percent(td), rng.choice([0, 0, 1]), rng.choice([0, 0, 0, 1]),
+                            f"{rng.randint(0, 4)}:{rng.randint(0, 59):02d}" if rng.random() > 0.1 else "--",
+                            _ratio(rng, 40), _ratio(rng, 15), _ratio(rng, 15),
+                            _ratio(rng, 50), _ratio(rng, 15), _ratio(rng, 15),
+                        ])
+                        counts["ufc_fight_stats.csv"] += 1
+    finally:
+        for f in files.values():
+            f.close()
+
+    return counts
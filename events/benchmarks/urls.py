@@ -0,0 +1,15 @@
+from django.urls import path
+from events import views as event_views
+from fighters import views as fighter_views
+
+# The sync and the async version of every read-heavy view side by side, for comparing them
+urlpatterns = [
+    path('wsgi/events/', event_views.home_events, name='home_events'),
+    path('wsgi/fighters/', fighter_views.search_fighter, name='search_fighter'),
+    path('wsgi/fighters/results/', fighter_views.fighter_results, name='fighter_results'),
+    path('wsgi/fighters/autocomplete/', fighter_views.autocomplete_fighters, name='autocomplete_fighters'),
+    path('asgi/events/', event_views.home_events_async),
+    path('asgi/fighters/', fighter_views.search_fighter_async),
+    path('asgi/fighters/results/', fighter_views.fighter_results_async),
+    path('asgi/fighters/autocomplete/', fighter_views.autocomplete_fighters_async),
+]
@@ -0,0 +1,117 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from events.models import DataGeneration
+from typing import Callable, Generic, TypeVar
+import logging
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# The generation counter is a single row
+DATA_GENERATION_ID = 1
+# Entries are keyed by data generation, so they never go stale and only expire to free space
+DEFAULT_CACHE_TIMEOUT = settings.CACHES['default'].get('TIMEOUT', 300)
+# Seconds between checks of the data generation by process caches
+DEFAULT_REFRESH_INTERVAL = 5
+
+T = TypeVar('T')
+_process_caches: weakref.WeakSet["ProcessCache"] = weakref.WeakSet()
+
+
+def data_generation() -> int:
+    """
+    The current data generation, which changes whenever load_database or scrape_events
+    updates the data. Cache entries keyed by it never have to be invalidated.
+    """
+    generation = (DataGeneration.objects
+                  .filter(pk=DATA_GENERATION_ID)
+                  .values_list('generation', flat=True)
+                  .first())
+    return generation or 0
+
+
+async def adata_generation() -> int:
+    """
+    Async version of `data_generation`.
+    """
+    generation = await (DataGeneration.objects
+                        .filter(pk=DATA_GENERATION_ID)
+                        .values_list('generation', flat=True)
+                        .afirst())
+    return generation or 0
+
+
+def bump_data_generation() -> int:
+    """
+    Start a new data generation, so everything cached against the data so far is missed.
+    """
+    with transaction.atomic():
+        updated = (DataGeneration.objects
+                   .filter(pk=DATA_GENERATION_ID)
+                   .update(generation=F('generation') + 1))
+        if not updated:
+            _, created = DataGeneration.objects.get_or_create(
+                pk=DATA_GENERATION_ID, defaults={'generation': 1})
+            if not created:
+                # Created concurrently by another update
+                DataGeneration.objects.filter(pk=DATA_GENERATION_ID).update(generation=F('generation') + 1)
+
+    generation = data_generation()
+    logger.info(f"Data generation is now {generation}")
+    return generation
+
+
+class ProcessCache(Generic[T]):
+    """
+    Holds a value built from the data, such as a search index, in this process, and builds it
+    again once the data generation has moved on. The generation is checked at most every
+    `refresh_interval` seconds, so almost every read is answered from memory alone.
+    """
+
+    def __init__(self, build: Callable[[], T], refresh_interval: float = DEFAULT_REFRESH_INTERVAL):
+        self.build = build
+        self.refresh_interval = refresh_interval
+        self._value: T | None = None
+        self._generation: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        _process_caches.add(self)
+
+    def get(self) -> T:
+        now = time.monotonic()
+        if self._value is not None and now - self._checked_at < self.refresh_interval:
+            return self._value
+
+        with self._lock:
+            generation = data_generation()
+            if self._value is None or generation != self._generation:
+                self._value = self.build()
+                self._generation = generation
+            self._checked_at = now
+            return self._value
+
+    async def aget(self) -> T:
+        """
+        Async version of `get`. The rare check of the generation and any rebuild run in a
+        thread, so the event loop is only ever blocked by reads from memory.
+        """
+        if self._value is not None and time.monotonic() - self._checked_at < self.refresh_interval:
+            return self._value
+        return await sync_to_async(self.get)()
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+            self._generation = None
+
+
+def clear_process_caches():
+    """
+    Drop the values of every process cache, for when the database itself is replaced.
+    """
+    for process_cache in list(_process_caches):
+        process_cache.clear()
@@ -0,0 +1,254 @@
+from octagonanalytics.settings import BASE_DIR
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from pathlib import Path
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+import hashlib
+import json
+import logging
+import os
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 8
+DEFAULT_RETRIES = 3
+# Retries wait backoff_factor * 2 ** (attempt - 1) seconds, honouring any Retry-After header
+DEFAULT_BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+USER_AGENT = 'octagonanalytics/1.0'
+
+DEFAULT_CACHE_DIR = BASE_DIR / "http_cache"
+# live: serve fresh responses from the cache and revalidate stale ones
+# record: always revalidate, storing every response
+# replay: only serve responses already in the cache, without any network access
+CACHE_MODES = ("live", "record", "replay")
+CACHE_CHUNK_SIZE = 64 * 1024
+# Response headers kept with a cached body
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CacheMiss(requests.RequestException):
+    """
+    Raised when replaying a response which was never recorded.
+    """
+
+
+class ResponseCache:
+    """
+    On-disk cache of GET responses keyed by URL. Each response is kept as a body file and a
+    JSON metadata file named after the hash of its URL, so recorded responses can be checked in
+    as fixtures and replayed.
+
+    Responses younger than `ttl` seconds are served without a request. Older ones are
+    revalidated with their ETag and Last-Modified validators, and served from disk when the
+    server answers 304 Not Modified.
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, ttl: float = 0, mode: str = "live"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f'Unknown cache mode "{mode}", expected one of {", ".join(CACHE_MODES)}')
+
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+        self.mode = mode
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def get(self, url: str) -> dict | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, 'r') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return entry if body_path.exists() else None
+
+    def is_fresh(self, entry: dict):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def _save_entry(self, entry: dict):
+        meta_path, _ = self._paths(entry['url'])
+        tmp_path = meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f, indent=2)
+        os.replace(tmp_path, meta_path)
+
+    def store(self, url: str, response: requests.Response) -> dict:
+        """
+        Stream the body of `response` into the cache, returning its new entry.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _, body_path = self._paths(url)
+
+        # Written under a unique name, as concurrent requests may store the same url
+        tmp_path = body_path.with_name(f"{body_path.name}.{threading.get_ident()}.part")
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CACHE_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, body_path)
+
+        entry = {
+            'url': url,
+            'fetched_at': time.time(),
+            'headers': {h: response.headers[h] for h in CACHED_HEADERS if h in response.headers},
+        }
+        self._save_entry(entry)
+        return entry
+
+    def touch(self, entry: dict) -> dict:
+        """
+        Mark a cached response as revalidated just now.
+        """
+        entry = {**entry, 'fetched_at': time.time()}
+        self._save_entry(entry)
+        return entry
+
+    def response(self, entry: dict) -> requests.Response:
+        """
+        Build a response holding a cached body read from disk.
+        """
+        _, body_path = self._paths(entry['url'])
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        # Read up front, since requests never closes `raw` once the content has been read
+        with open(body_path, 'rb') as f:
+            response._content = f.read()
+        response._content_consumed = True
+        response.from_cache = True
+        # Bodies are only ever replaced, never written in place, so the file can be linked to
+        response.cache_path = body_path
+        return response
+
+
+class HostRateLimiter:
+    """
+    Spaces out requests to each host by at least `min_interval` seconds, across all threads
+    sharing the limiter.
+    """
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        """
+        Block until a request may be sent to `host`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Session(requests.Session):
+    """
+    A `requests.Session` which applies a default timeout to every request, and waits for the
+    `rate_limiter` (if any) before each one.
+
+    If a `cache` is given, GET requests go through it. Every successful response is then
+    streamed into the cache and served from there, with `from_cache` telling whether its body
+    came over the network during this request.
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, rate_limiter: HostRateLimiter | None = None,
+                 cache: ResponseCache | None = None):
+        super().__init__()
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        if self.cache is None or method.upper() != 'GET' or args:
+            return self._send(method, url, *args, **kwargs)
+        return self._cached_get(url, **kwargs)
+
+    def _send(self, method, url, *args, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait(urlsplit(url).hostname or '')
+        response = super().request(method, url, *args, **kwargs)
+        response.from_cache = False
+        return response
+
+    def _cached_get(self, url, **kwargs):
+        cache = self.cache
+        key = requests.Request('GET', url, params=kwargs.pop('params', None)).prepare().url
+        entry = cache.get(key)
+
+        if cache.mode == "replay":
+            if entry is None:
+                raise CacheMiss(f"No recorded response for {key}")
+            return cache.response(entry)
+
+        if entry is not None and cache.mode == "live" and cache.is_fresh(entry):
+            logger.debug(f"Serving {key} from cache")
+            return cache.response(entry)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if entry is not None:
+            if 'ETag' in entry['headers']:
+                headers.setdefault('If-None-Match', entry['headers']['ETag'])
+            if 'Last-Modified' in entry['headers']:
+                headers.setdefault('If-Modified-Since', entry['headers']['Last-Modified'])
+
+        kwargs['stream'] = True
+        with self._send('GET', key, headers=headers, **kwargs) as response:
+            if response.status_code == 304 and entry is not None:
+                logger.debug(f"{key} not modified, serving from cache")
+                return cache.response(cache.touch(entry))
+
+            if response.status_code != 200:
+                # Read the body so the connection goes back to the pool
+                response.content
+                return response
+
+            entry = cache.store(key, response)
+
+        served = cache.response(entry)
+        served.from_cache = False
+        return served
+
+
+def build_session(pool_size: int = DEFAULT_POOL_SIZE, retries: int = DEFAULT_RETRIES,
+                  backoff_factor: float = DEFAULT_BACKOFF_FACTOR, timeout: float = DEFAULT_TIMEOUT,
+                  min_interval: float = 0, cache: ResponseCache | None = None) -> Session:
+    """
+    Create a `Session` with a keep-alive connection pool large enough to be shared between
+    `pool_size` worker threads.
+
+    Connection errors and transient error statuses are retried up to `retries` times with
+    exponential backoff. If a `min_interval` is given, requests to the same host are spaced
+    out by at least that many seconds. If a `cache` is given, GET responses are cached on disk.
+    """
+    session = Session(timeout=timeout,
+                      rate_limiter=HostRateLimiter(min_interval) if min_interval else None,
+                      cache=cache)
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import re
+
+# Inferred types of columns which contain at least one string
+STRING_TYPES = {'string', 'mixed', 'mixed-integer'}
+
+# Runs of whitespace are collapsed into a single space
+WHITESPACE_RE = re.compile(r'\s+')
+# "vs" not already followed by a period
+VERSUS_RE = re.compile(r'\bvs(?!\.)')
+
+
+def string_columns(df: pd.DataFrame) -> list[str]:
+    """
+    Get the names of the columns of `df` which hold strings.
+    """
+    return [col for col in df.columns
+            if pd.api.types.is_object_dtype(df[col])
+            and pd.api.types.infer_dtype(df[col], skipna=True) in STRING_TYPES]
+
+
+def clean_strings(series: pd.Series) -> pd.Series:
+    """
+    Normalize every string in `series` in a single vectorized pass. Whitespace is trimmed
+    and collapsed and "vs" is normalized to "vs.", any non-string values are left untouched
+    and blank strings become missing values.
+    """
+    cleaned = (series.str.replace(WHITESPACE_RE, ' ', regex=True)
+               .str.strip()
+               .str.replace(VERSUS_RE, 'vs.', regex=True))
+
+    # `.str` yields NaN for non-string values, keep the originals for those
+    cleaned = cleaned.where(cleaned.notna(), series)
+
+    return cleaned.mask(cleaned == '', np.nan)
+
+
+def clean_frame(df: pd.DataFrame, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Perform the final formatting pass on processed data. Headers are lowercased and the
+    string columns (or only `columns` if given) are cleaned with `clean_strings`.
+    """
+    df.columns = [col.lower() for col in df.columns]
+
+    for col in string_columns(df) if columns is None else columns:
+        df[col] = clean_strings(df[col])
+
+    return df
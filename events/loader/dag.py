@@ -0,0 +1,190 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from events.loader.instrumentation import StageMetrics, log_metrics, run_instrumented
+from pathlib import Path
+from typing import Any, Callable
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(Exception):
+    """
+    Raised when a stage of a `StageRunner` fails.
+    """
+
+    def __init__(self, stage: str, error: BaseException):
+        super().__init__(f'Stage "{stage}" failed: {error}')
+        self.stage = stage
+        self.error = error
+
+
+@dataclass
+class Stage:
+    """
+    A single step of a `StageRunner`.
+    """
+
+    name: str
+    func: Callable[..., Any]
+    args: tuple[Any, ...] = ()
+    depends_on: tuple[str, ...] = ()
+    # Run in a worker process, `func` and `args` must be picklable
+    in_process_pool: bool = False
+    # Called in the main process with the result of `func`, returns the JSON serializable
+    # outputs recorded for the stage
+    collect: Callable[[Any], dict[str, Any]] | None = None
+    # Called in the main process with the recorded outputs when a completed stage is resumed
+    restore: Callable[[dict[str, Any]], None] | None = None
+    # Checked when the stage becomes ready, the stage is skipped if it returns True
+    skip_if: Callable[[], bool] | None = None
+
+
+@dataclass
+class StageState:
+    completed_at: str
+    outputs: dict[str, Any] = field(default_factory=dict)
+
+
+class StageRunner:
+    """
+    Runs a graph of stages, starting each one as soon as all of the stages it depends on have
+    completed. Stages marked `in_process_pool` run concurrently in a process pool while the
+    remaining stages run one at a time in the main process.
+
+    If a `state_path` is given, the completion and outputs of every stage is recorded there as
+    soon as it finishes, allowing a failed run to be resumed without repeating the stages that
+    had already completed.
+
+    Every stage is instrumented, its metrics are logged as it completes and kept in `metrics`.
+    If a `profile_dir` is given, cProfile stats of each stage are dumped there.
+    """
+
+    def __init__(self, stages: list[Stage], state_path: Path | None = None,
+                 max_workers: int | None = None, profile_dir: Path | None = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = Path(state_path) if state_path else None
+        self.max_workers = max_workers or os.cpu_count()
+        self.profile_dir = profile_dir
+        self.state: dict[str, StageState] = {}
+        self.metrics: dict[str, StageMetrics] = {}
+
+        for stage in stages:
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(
+                        f'Stage "{stage.name}" depends on unknown stage "{dependency}"')
+
+    def load_state(self) -> dict[str, StageState]:
+        """
+        Read the recorded state of previously completed stages.
+        """
+        if self.state_path is None:
+            return {}
+
+        try:
+            with open(self.state_path, 'r') as f:
+                return {name: StageState(**state) for name, state in json.load(f).items()}
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_state(self):
+        if self.state_path is None:
+            return
+
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({name: vars(state) for name, state in self.state.items()},
+                      f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def _complete(self, stage: Stage, instrumented_result: tuple[Any, StageMetrics]):
+        result, metrics = instrumented_result
+        self.metrics[stage.name] = metrics
+        log_metrics(metrics)
+
+        outputs = stage.collect(result) if stage.collect else {}
+        self.state[stage.name] = StageState(
+            datetime.now(timezone.utc).isoformat(), outputs or {})
+        self.save_state()
+        logger.debug(f'Completed stage "{stage.name}"')
+
+    def run(self, resume: bool = False):
+        """
+        Run every stage. When resuming, stages recorded as completed by a previous run are
+        skipped and their recorded outputs restored.
+        """
+        self.state = {}
+        if resume:
+            for name, state in self.load_state().items():
+                stage = self.stages.get(name)
+                if stage is None:
+                    continue
+                logger.info(f'Resuming completed stage "{name}"')
+                if stage.restore:
+                    stage.restore(state.outputs)
+                self.state[name] = state
+        self.save_state()
+
+        pending = {name: stage for name, stage in self.stages.items()
+                   if name not in self.state}
+        running: dict[Future, Stage] = {}
+        pool: ProcessPoolExecutor | None = None
+        error: StageError | None = None
+
+        try:
+            while pending or running:
+                ready = [stage for stage in pending.values()
+                         if all(d in self.state for d in stage.depends_on)] if error is None else []
+
+                for stage in ready:
+                    del pending[stage.name]
+
+                    if stage.skip_if and stage.skip_if():
+                        logger.debug(f'Skipping stage "{stage.name}"')
+                        self.state[stage.name] = StageState(
+                            datetime.now(timezone.utc).isoformat(), {'skipped': True})
+                        self.save_state()
+                        break
+
+                    if stage.in_process_pool:
+                        if pool is None:
+                            pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                        logger.debug(f'Starting stage "{stage.name}" in process pool')
+                        # Pooled stages never use the database, leave its connections alone
+                        running[pool.submit(run_instrumented, stage.name, stage.func, stage.args,
+                                            self.profile_dir, False)] = stage
+                        continue
+
+                    # Main process stages block, leaving any pooled stages running meanwhile
+                    logger.debug(f'Starting stage "{stage.name}"')
+                    try:
+                        self._complete(stage, run_instrumented(
+                            stage.name, stage.func, stage.args, self.profile_dir))
+                    except Exception as err:
+                        error = StageError(stage.name, err)
+                    break
+                else:
+                    if not running:
+                        if error is None and pending:
+                            raise ValueError(
+                                f'Stages could not be run due to a dependency cycle: {", ".join(pending)}')
+                        break
+
+                    # Nothing else can start until a pooled stage finishes
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stage = running.pop(future)
+                        try:
+                            self._complete(stage, future.result())
+                        except Exception as err:
+                            error = error or StageError(stage.name, err)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        if error is not None:
+            raise error
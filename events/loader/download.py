@@ -0,0 +1,151 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from events.http import DEFAULT_TIMEOUT, ResponseCache, build_session
+import hashlib
+import json
+import logging
+import os
+import requests
+import shutil
+
+logger = logging.getLogger(__name__)
+
+RAW_DATA_SOURCE = 'https://raw.githubusercontent.com/Greco1899/scrape_ufc_stats/refs/heads/main/'
+RAW_DATA_FILES = [
+    "ufc_event_details.csv",
+    "ufc_fight_details.csv",
+    "ufc_fight_results.csv",
+    "ufc_fight_stats.csv",
+    "ufc_fighter_details.csv",
+    "ufc_fighter_tott.csv"
+]
+MANIFEST_FILE = "manifest.json"
+CHUNK_SIZE = 64 * 1024
+
+
+def _link_or_copy(src: Path, dest: Path):
+    """
+    Hard link `dest` to `src`, or copy it when the two are on different file systems.
+    """
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError as err:
+        logger.debug(f"Copying {src} to {dest}, could not link it: {err}")
+        shutil.copyfile(src, dest)
+
+
+@dataclass
+class DownloadResult:
+    """
+    Outcome of downloading a single raw data file.
+    """
+
+    file: str
+    sha256: str
+    changed: bool
+    # False when the body was served from the HTTP cache
+    fetched: bool
+
+
+class RawDataDownloader:
+    """
+    Downloads the raw csv data files concurrently over a pooled, cached session.
+
+    The session's HTTP cache revalidates each file with the server, so unchanged files are not
+    transferred again. Bodies are hashed in chunks as they are read, and files the cache holds
+    are hard linked into `dest_dir` rather than copied, so each file is only stored once. The
+    manifest stored alongside the files records the hash of every file so callers can tell
+    which files actually changed.
+    """
+
+    def __init__(self, dest_dir: Path, base_url: str = RAW_DATA_SOURCE,
+                 session: requests.Session | None = None, max_workers: int = len(RAW_DATA_FILES),
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.dest_dir = Path(dest_dir)
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.session = session or build_session(max_workers, cache=ResponseCache())
+        self.timeout = timeout
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.dest_dir / MANIFEST_FILE
+
+    def load_manifest(self) -> dict[str, dict[str, str]]:
+        """
+        Read the manifest of previously downloaded files, or an empty one if none exists.
+        """
+        try:
+            with open(self.manifest_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self, manifest: dict[str, dict[str, str]]):
+        """
+        Atomically replace the manifest on disk.
+        """
+        tmp_path = self.manifest_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def download_all(self, files: list[str] = RAW_DATA_FILES) -> dict[str, DownloadResult]:
+        """
+        Download every file in `files`, returning the result for each keyed by file name.
+        """
+        manifest = self.load_manifest()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                fname: pool.submit(self.download, fname, manifest.get(fname))
+                for fname in files
+            }
+            results = {fname: future.result()
+                       for fname, future in futures.items()}
+
+        for fname, (result, entry) in results.items():
+            manifest[fname] = entry
+        self.save_manifest(manifest)
+
+        return {fname: result for fname, (result, _) in results.items()}
+
+    def download(self, fname: str, entry: dict[str, str] | None):
+        """
+        Download a single file, returning its result and updated manifest entry.
+        """
+        path = self.dest_dir / fname
+        entry = dict(entry or {})
+
+        with self.session.get(self.base_url + fname, stream=True,
+                              timeout=self.timeout) as response:
+            response.raise_for_status()
+            fetched = not getattr(response, 'from_cache', False)
+
+            if not fetched and path.exists() and entry.get('sha256'):
+                logger.debug(f'{fname} not modified upstream')
+                return DownloadResult(fname, entry['sha256'], changed=False, fetched=False), entry
+
+            digest = hashlib.sha256()
+            tmp_path = path.with_name(path.name + '.part')
+            cache_path = getattr(response, 'cache_path', None)
+            if cache_path is not None:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    digest.update(chunk)
+                _link_or_copy(cache_path, tmp_path)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+            os.replace(tmp_path, path)
+
+            sha256 = digest.hexdigest()
+            changed = sha256 != entry.get('sha256')
+            entry['sha256'] = sha256
+
+        logger.debug(
+            f'{"Downloaded" if fetched else "Restored cached"} {fname} ({"changed" if changed else "unchanged"})')
+        return DownloadResult(fname, sha256, changed=changed, fetched=fetched), entry
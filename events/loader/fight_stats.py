@@ -0,0 +1,141 @@
+from events.loader.cleanup import clean_strings
+from pathlib import Path
+from typing import Iterator
+import pandas as pd
+
+# Rows read per chunk when streaming the raw fight stats file
+DEFAULT_CHUNKSIZE = 50_000
+
+# Identifying columns, stored as categoricals since every value repeats once per round
+KEY_COLUMNS = ['EVENT', 'BOUT', 'FIGHTER']
+
+# Raw '{x} of {y}' columns and the prefix of the hit/attempted columns they are split into
+RATIO_COLUMNS = {
+    'SIG.STR.': 'SIGSTRIKES',
+    'TOTAL STR.': 'TOTALSTRIKES',
+    'TD': 'TAKEDOWNS',
+    'HEAD': 'HEADSTRIKES',
+    'BODY': 'BODYSTRIKES',
+    'LEG': 'LEGSTRIKES',
+    'DISTANCE': 'DISTANCE',
+    'CLINCH': 'CLINCH',
+    'GROUND': 'GROUND',
+}
+
+# Raw single value columns
+COUNT_COLUMNS = {
+    'KD': 'KNOCKDOWNS',
+    'SUB.ATT': 'SUBMISSIONATTEMPTS',
+    'REV.': 'REVERSALS',
+}
+
+# Only these raw columns are read, the percentage columns are derivable and dropped
+RAW_COLUMNS = KEY_COLUMNS + ['ROUND', 'CTRL'] + \
+    list(COUNT_COLUMNS) + list(RATIO_COLUMNS)
+
+RAW_DTYPES = {
+    **{col: 'category' for col in KEY_COLUMNS},
+    **{col: 'string' for col in ['ROUND', 'CTRL', *RATIO_COLUMNS]},
+}
+
+STAT_DTYPE = 'int16'
+ROUND_DTYPE = 'int8'
+
+
+def _split_ratio(series: pd.Series) -> tuple[pd.Series, pd.Series]:
+    """
+    Split a '{x} of {y}' column into compact hit and attempted columns.
+    """
+    parts = series.str.extract(r'(\d+) of (\d+)')
+    return tuple(pd.to_numeric(parts[i], errors='coerce').fillna(0).astype(STAT_DTYPE)
+                 for i in (0, 1))
+
+
+def _clean_categories(series: pd.Series) -> pd.Series:
+    """
+    Clean the strings of a categorical column by cleaning each distinct value only once.
+    """
+    categories = series.cat.categories
+    cleaned = clean_strings(pd.Series(categories, index=categories, dtype=object))
+    return series.map(cleaned).astype('category')
+
+
+def transform_fight_stats(df_raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Format raw fight stats into compact, cleaned columns. Every stat becomes a small integer
+    (missing stats count as zero) and control time is converted into a number of seconds.
+    """
+    df = pd.DataFrame(index=df_raw.index)
+
+    for col in KEY_COLUMNS:
+        series = df_raw[col]
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        df[col.lower()] = _clean_categories(series)
+
+    # Remove 'Round {x}' text from ROUND col
+    df['round'] = pd.to_numeric(df_raw['ROUND'].astype('string').str.replace(
+        'Round ', '', regex=False), errors='coerce').fillna(0).astype(ROUND_DTYPE)
+
+    for raw_col, col in COUNT_COLUMNS.items():
+        df[col.lower()] = pd.to_numeric(
+            df_raw[raw_col], errors='coerce').fillna(0).astype(STAT_DTYPE)
+
+    # Convert control time to a total number of seconds, blank values '--' become zeroes
+    ctrl = df_raw['CTRL'].astype('string').str.extract(r'(\d+):(\d+)')
+    ctrl = ctrl.apply(pd.to_numeric, errors='coerce').fillna(0)
+    df['controltime'] = (ctrl[0] * 60 + ctrl[1]).astype(STAT_DTYPE)
+
+    # Extract '{x} of {y}' stats into separate columns
+    for raw_col, prefix in RATIO_COLUMNS.items():
+        df[prefix.lower() + 'hit'], df[prefix.lower() + 'attempted'] = _split_ratio(
+            df_raw[raw_col].astype('string'))
+
+    return df
+
+
+def read_fight_stats(path: Path) -> pd.DataFrame:
+    """
+    Read and transform the entire raw fight stats file at once.
+    """
+    return transform_fight_stats(
+        pd.read_csv(path, usecols=RAW_COLUMNS, dtype=RAW_DTYPES))
+
+
+def _concat(a: pd.DataFrame, b: pd.DataFrame):
+    """
+    Concatenate two transformed frames, keeping the key columns categorical.
+    """
+    df = pd.concat([a, b], ignore_index=True)
+    for col in KEY_COLUMNS:
+        df[col.lower()] = df[col.lower()].astype('category')
+    return df
+
+
+def iter_fight_stats_by_event(path: Path, chunksize: int = DEFAULT_CHUNKSIZE) -> Iterator[tuple[str, pd.DataFrame]]:
+    """
+    Stream the raw fight stats file in bounded chunks, yielding the transformed stats of each
+    event once all of its rows have been read.
+
+    Rows are expected to be grouped by event as they are in the raw data. An event whose rows
+    are not contiguous is yielded once for each run of rows.
+    """
+    pending: pd.DataFrame | None = None
+
+    for chunk in pd.read_csv(path, usecols=RAW_COLUMNS, dtype=RAW_DTYPES, chunksize=chunksize):
+        df = transform_fight_stats(chunk)
+        if pending is not None:
+            df = _concat(pending, df)
+
+        if df.empty:
+            continue
+
+        # The last event of the chunk may continue in the next one, hold its rows back
+        is_last = (df['event'] == df['event'].iloc[-1]).to_numpy()
+        pending = df[is_last]
+
+        for event, group in df[~is_last].groupby('event', sort=False, observed=True):
+            yield event, group
+
+    if pending is not None and not pending.empty:
+        yield pending['event'].iloc[0], pending
@@ -0,0 +1,122 @@
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from django.db import connections
+from pathlib import Path
+from typing import Any, Callable
+import cProfile
+import logging
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+# Stage metrics are emitted on their own logger so they can be routed to the JSON log
+logger = logging.getLogger("events.loader.metrics")
+
+_local = threading.local()
+
+
+@dataclass
+class StageMetrics:
+    """
+    Performance measurements of a single stage run.
+    """
+
+    stage: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    rows_in: int | None = None
+    rows_out: int | None = None
+    # Growth of the peak resident set size of the process running the stage
+    peak_rss_delta_kb: int | None = None
+    db_queries: int = 0
+
+    @property
+    def rows_per_sec(self):
+        if not self.rows_out or not self.wall_time:
+            return None
+        return round(self.rows_out / self.wall_time, 1)
+
+    def as_record(self) -> dict[str, Any]:
+        return {**asdict(self), "rows_per_sec": self.rows_per_sec}
+
+
+def record_rows(rows_in: int | None = None, rows_out: int | None = None):
+    """
+    Add to the number of rows read and written by the stage currently running in this thread.
+    Does nothing outside of an instrumented stage.
+    """
+    metrics: StageMetrics | None = getattr(_local, "metrics", None)
+    if metrics is None:
+        return
+
+    if rows_in is not None:
+        metrics.rows_in = (metrics.rows_in or 0) + rows_in
+    if rows_out is not None:
+        metrics.rows_out = (metrics.rows_out or 0) + rows_out
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_instrumented(stage: str, func: Callable[..., Any], args: tuple[Any, ...] = (),
+                     profile_dir: Path | None = None, count_queries: bool = True) -> tuple[Any, StageMetrics]:
+    """
+    Run `func`, measuring its wall and CPU time, memory growth and database queries. If a
+    `profile_dir` is given, cProfile stats of the run are dumped there as `{stage}.prof`.
+
+    Returns the result of `func` along with its metrics. This is a module level function so it
+    can be submitted to a process pool.
+    """
+    metrics = StageMetrics(stage)
+    _local.metrics = metrics
+
+    def count_query(execute, sql, params, many, context):
+        metrics.db_queries += 1
+        return execute(sql, params, many, context)
+
+    profiler = cProfile.Profile() if profile_dir else None
+    rss_before = _peak_rss_kb()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+
+    try:
+        with ExitStack() as stack:
+            if count_queries:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(count_query))
+
+            if profiler:
+                profiler.enable()
+            try:
+                result = func(*args)
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        metrics.wall_time = round(time.perf_counter() - wall_start, 4)
+        metrics.cpu_time = round(time.process_time() - cpu_start, 4)
+        if rss_before is not None:
+            metrics.peak_rss_delta_kb = _peak_rss_kb() - rss_before
+        _local.metrics = None
+
+        if profiler:
+            Path(profile_dir).mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(Path(profile_dir) / f"{stage}.prof")
+
+    return result, metrics
+
+
+def log_metrics(metrics: StageMetrics):
+    """
+    Emit the metrics of a stage as a structured log record.
+    """
+    logger.info(f'Stage "{metrics.stage}" metrics', extra=metrics.as_record())
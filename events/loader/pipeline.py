@@ -0,0 +1,61 @@
+from pathlib import Path
+import logging
+import os
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SUFFIX = ".pkl"
+
+
+class DataPipeline:
+    """
+    Hands processed datasets from the processing stage to the loading stage in memory.
+
+    When a `checkpoint_dir` is given, every dataset is also written there as a pickled
+    DataFrame (which keeps its dtypes intact) so that it can be inspected for debugging, or
+    picked up by a later run instead of being processed again.
+    """
+
+    def __init__(self, checkpoint_dir: Path | None = None):
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else None
+        self._datasets: dict[str, pd.DataFrame] = {}
+
+    def _checkpoint_path(self, name: str):
+        if self.checkpoint_dir is None:
+            return None
+        return self.checkpoint_dir / (name + CHECKPOINT_SUFFIX)
+
+    def has_checkpoint(self, name: str):
+        """
+        Check whether a checkpoint exists on disk for a dataset.
+        """
+        path = self._checkpoint_path(name)
+        return path is not None and path.exists()
+
+    def put(self, name: str, df: pd.DataFrame):
+        """
+        Store a processed dataset, checkpointing it to disk if enabled.
+        """
+        self._datasets[name] = df
+
+        path = self._checkpoint_path(name)
+        if path is not None:
+            tmp_path = path.with_suffix('.tmp')
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+            logger.debug(f"Checkpointed {len(df)} row(s) of {name} to {path}")
+
+    def get(self, name: str) -> pd.DataFrame:
+        """
+        Get a processed dataset, falling back to its checkpoint if it was not processed
+        during this run.
+        """
+        if name not in self._datasets:
+            if not self.has_checkpoint(name):
+                raise KeyError(f"No processed data available for dataset: {name}")
+
+            logger.debug(f"Resuming {name} from checkpoint")
+            self._datasets[name] = pd.read_pickle(self._checkpoint_path(name))
+
+        return self._datasets[name]
@@ -0,0 +1,85 @@
+from events.loader.cleanup import clean_frame
+from events.loader.fight_stats import read_fight_stats
+from events.loader.instrumentation import record_rows
+from pathlib import Path
+import pandas as pd
+
+# Raw files each processed dataset is built from
+PROCESSED_DATA_SOURCES = {
+    "fighters": ["ufc_fighter_details.csv", "ufc_fighter_tott.csv"],
+    "events": ["ufc_event_details.csv"],
+    "fights": ["ufc_fight_details.csv", "ufc_fight_results.csv"],
+    "fight_stats": ["ufc_fight_stats.csv"],
+}
+
+
+def process_fighters(raw_dir: Path) -> pd.DataFrame:
+    """
+    Combines raw UFC fighter details and tail of the tape (tott) data.
+    """
+    df_details = pd.read_csv(raw_dir / "ufc_fighter_details.csv")
+    df_tott = pd.read_csv(raw_dir / "ufc_fighter_tott.csv")
+
+    # Outer join to keep all records
+    combined_df = pd.merge(df_details, df_tott, on='URL', how='outer')
+
+    if 'FIGHTER' in combined_df.columns:
+        combined_df = combined_df.drop('FIGHTER', axis=1)
+
+    combined_df = combined_df.replace('--', '')
+
+    record_rows(rows_in=len(df_details) + len(df_tott), rows_out=len(combined_df))
+    return clean_frame(combined_df)
+
+
+def process_events(raw_dir: Path) -> pd.DataFrame:
+    """
+    Formats raw event details data.
+    """
+    df_events = pd.read_csv(raw_dir / "ufc_event_details.csv")
+
+    df_events.rename(columns={'EVENT': 'NAME'}, inplace=True)
+
+    record_rows(rows_in=len(df_events), rows_out=len(df_events))
+    return clean_frame(df_events)
+
+
+def process_fights(raw_dir: Path) -> pd.DataFrame:
+    """
+    Combines raw fight details and results.
+    """
+    df_fight_details = pd.read_csv(raw_dir / "ufc_fight_details.csv")
+    df_fight_results = pd.read_csv(raw_dir / "ufc_fight_results.csv")
+
+    combined_df = pd.merge(
+        df_fight_details, df_fight_results, on='URL', how='outer')
+
+    combined_df = combined_df.drop(columns=['EVENT_x', 'BOUT_x'])
+    combined_df.rename(columns={'EVENT_y': 'EVENT',
+                                'BOUT_y': 'BOUT'}, inplace=True)
+
+    combined_df['URL'] = combined_df.pop('URL')
+
+    record_rows(rows_in=len(df_fight_details) + len(df_fight_results),
+                rows_out=len(combined_df))
+    return clean_frame(combined_df)
+
+
+def process_fight_stats(raw_dir: Path) -> pd.DataFrame:
+    """
+    Formats and manipulates raw fight stats data.
+    """
+    df_fight_stats = read_fight_stats(raw_dir / "ufc_fight_stats.csv")
+
+    record_rows(rows_in=len(df_fight_stats), rows_out=len(df_fight_stats))
+    return df_fight_stats
+
+
+# Each processor only depends on the raw data folder it is given, so they can run in worker
+# processes
+PROCESSORS = {
+    "fighters": process_fighters,
+    "events": process_events,
+    "fights": process_fights,
+    "fight_stats": process_fight_stats,
+}
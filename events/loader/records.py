@@ -0,0 +1,182 @@
+from django.db import connections, models, DEFAULT_DB_ALIAS
+from itertools import chain, islice
+from typing import Any, Callable, Iterable, Iterator
+import logging
+import pandas as pd
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# A model field is filled either straight from a column, or from a column through a converter
+FieldSource = str | tuple[str, Callable[[Any], Any]]
+
+# A DataFrame of rows along with the field values shared by all of them
+RecordGroup = tuple[pd.DataFrame, dict[str, Any]]
+
+
+class RecordBuilder:
+    """
+    Builds model instances from the columns of a DataFrame and saves them in batches.
+
+    `fields` declares which column (and optionally which converter) each model field is taken
+    from. Columns are converted to plain object arrays once, with missing values as `None`, and
+    the instances are built by zipping those arrays rather than by creating a row per record.
+
+    When `use_copy` is set (PostgreSQL only) rows are streamed straight into the table with
+    `COPY ... FROM STDIN` without instantiating any models.
+
+    When `unique_fields` are given, records are upserted: a record which conflicts with an
+    existing row on those fields updates it instead, so saving the same records twice is safe.
+    """
+
+    def __init__(self, model: type[models.Model], fields: dict[str, FieldSource],
+                 batch_size: int = DEFAULT_BATCH_SIZE, use_copy: bool = False,
+                 unique_fields: list[str] | None = None, using: str = DEFAULT_DB_ALIAS):
+        self.model = model
+        self.fields = {field: (source, None) if isinstance(source, str) else source
+                       for field, source in fields.items()}
+        self.batch_size = batch_size
+        self.use_copy = use_copy
+        self.unique_fields = list(unique_fields or [])
+        self.using = using
+
+        # Every other field is overwritten when upserting
+        self.update_fields = [f.name for f in model._meta.concrete_fields
+                              if not f.primary_key and f.name not in self.unique_fields]
+
+        # Running totals of everything saved through this builder
+        self.created = 0
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_sec(self):
+        return self.created / self.elapsed if self.elapsed else 0.0
+
+    def _columns(self, df: pd.DataFrame) -> dict[str, Iterable[Any]]:
+        columns = {}
+        for field, (column, convert) in self.fields.items():
+            values = df[column].to_numpy(dtype=object, na_value=None)
+            columns[field] = values if convert is None else [
+                convert(v) for v in values]
+        return columns
+
+    def iter_records(self, df: pd.DataFrame, **extra: Any) -> Iterator[models.Model]:
+        """
+        Lazily build an instance for each row of `df`. Any `extra` field values are shared by
+        every instance.
+        """
+        columns = self._columns(df)
+        names = list(columns)
+        model = self.model
+
+        for values in zip(*columns.values()):
+            yield model(**dict(zip(names, values)), **extra)
+
+    def iter_rows(self, df: pd.DataFrame, **extra: Any) -> Iterator[tuple[Any, ...]]:
+        """
+        Lazily build a tuple of field values for each row of `df`, in the order of `fields`
+        followed by `extra`.
+        """
+        shared = tuple(extra.values())
+        for values in zip(*self._columns(df).values()):
+            yield values + shared
+
+    def save(self, records: Iterable[models.Model]) -> int:
+        """
+        Insert (or upsert) `records` in batches of `batch_size`, so that at most one batch of
+        instances is held at once when `records` is lazy. Returns the number of records saved.
+        """
+        start = time.perf_counter()
+        records = iter(records)
+        created = 0
+
+        upsert = {}
+        if self.unique_fields:
+            upsert = {"update_conflicts": True, "unique_fields": self.unique_fields,
+                      "update_fields": self.update_fields}
+
+        while batch := list(islice(records, self.batch_size)):
+            self.model.objects.using(self.using).bulk_create(
+                batch, batch_size=self.batch_size, **upsert)
+            created += len(batch)
+
+        self.created += created
+        self.elapsed += time.perf_counter() - start
+        return created
+
+    def copy(self, rows: Iterable[tuple[Any, ...]], fields: list[str]) -> int:
+        """
+        Stream `rows` of values for `fields` into the model's table with a single COPY.
+        When upserting, rows are copied into a temporary staging table first and merged into
+        the model's table with `INSERT ... ON CONFLICT DO UPDATE`. Returns the number of rows
+        saved.
+        """
+        start = time.perf_counter()
+        connection = connections[self.using]
+        quote = connection.ops.quote_name
+
+        def column(field: str):
+            return quote(self.model._meta.get_field(field).column)
+
+        table = quote(self.model._meta.db_table)
+        columns = ", ".join(column(f) for f in fields)
+        target = table
+        if self.unique_fields:
+            target = quote(f"{self.model._meta.db_table}_staging")
+
+        created = 0
+        with connection.cursor() as cursor:
+            if self.unique_fields:
+                cursor.execute(
+                    f"CREATE TEMPORARY TABLE {target} AS SELECT {columns} FROM {table} WITH NO DATA")
+
+            # Unwrap Django's cursor to reach the psycopg cursor
+            with cursor.cursor.copy(f"COPY {target} ({columns}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    created += 1
+
+            if self.unique_fields:
+                updates = ", ".join(f"{column(f)} = EXCLUDED.{column(f)}"
+                                    for f in fields if f not in self.unique_fields)
+                cursor.execute(
+                    f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {target} "
+                    f"ON CONFLICT ({', '.join(column(f) for f in self.unique_fields)}) "
+                    f"DO UPDATE SET {updates}")
+                cursor.execute(f"DROP TABLE {target}")
+
+        self.created += created
+        self.elapsed += time.perf_counter() - start
+        return created
+
+    def bulk_create_groups(self, groups: Iterable[RecordGroup]) -> int:
+        """
+        Build and insert an entity for each row of each group. Every group must share the
+        same `extra` fields.
+        """
+        groups = list(groups)
+        if not groups:
+            return 0
+
+        if self.use_copy:
+            fields = list(self.fields) + list(groups[0][1])
+            return self.copy(chain.from_iterable(
+                self.iter_rows(df, **extra) for df, extra in groups), fields)
+
+        return self.save(chain.from_iterable(
+            self.iter_records(df, **extra) for df, extra in groups))
+
+    def bulk_create(self, df: pd.DataFrame, **extra: Any) -> int:
+        """
+        Build and insert an entity for each row of `df`.
+        """
+        return self.bulk_create_groups([(df, extra)])
+
+    def summary(self):
+        """
+        Describe the records saved so far and the throughput they were saved at.
+        """
+        return (f"{self.created} {self.model._meta.verbose_name_plural} "
+                f"in {self.elapsed:.2f}s ({self.rows_per_sec:.0f} rows/sec)")
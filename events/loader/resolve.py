@@ -0,0 +1,102 @@
+from collections import defaultdict
+from django.db.models import Model
+from events.models import Event
+from fighters.models import Fighter
+from fights.models import Fight
+from functools import cached_property
+from typing import Hashable, Iterable
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a name for case-insensitive lookups.
+    """
+    return _WHITESPACE_RE.sub(' ', name).strip().casefold()
+
+
+def _index(pairs: Iterable[tuple[Hashable, int]]) -> dict[Hashable, list[int]]:
+    index = defaultdict(list)
+    for key, pk in pairs:
+        index[key].append(pk)
+    return dict(index)
+
+
+class EntityResolver:
+    """
+    Resolves the names found in the raw data to database ids through in-memory indexes, so
+    that rows can be linked to their event, fight and fighter without a query per lookup.
+
+    Each index is built with a single query the first time it is used. Call `invalidate`
+    after inserting entities of that type so the next lookup rebuilds it.
+    """
+
+    def __init__(self):
+        # Names which failed to resolve, so each is only reported once
+        self._unresolved: set[tuple[str, Hashable]] = set()
+
+    def invalidate(self, *models: type[Model]):
+        """
+        Drop the indexes of the given models, or every index if none are given.
+        """
+        indexes = {
+            Event: ['_events_by_name'],
+            Fight: ['_fights'],
+            Fighter: ['_fighters'],
+        }
+        for model in models or indexes:
+            for attr in indexes[model]:
+                self.__dict__.pop(attr, None)
+        self._unresolved.clear()
+
+    @cached_property
+    def _events_by_name(self):
+        return _index(Event.objects.values_list("name", "id"))
+
+    @cached_property
+    def _fights(self):
+        return _index(((event_id, normalize_name(bout)), pk)
+                      for event_id, bout, pk in Fight.objects.values_list("event_id", "bout", "id"))
+
+    @cached_property
+    def _fighters(self):
+        return _index((normalize_name(f"{first} {last}"), pk)
+                      for first, last, pk in Fighter.objects.values_list("first_name", "last_name", "id"))
+
+    def _resolve(self, kind: str, index: dict[Hashable, list[int]], key: Hashable, label: Hashable):
+        ids = index.get(key)
+        if ids is not None and len(ids) == 1:
+            return ids[0]
+
+        if (kind, key) not in self._unresolved:
+            self._unresolved.add((kind, key))
+            if ids:
+                # Entities are only identified by name in the raw data, so if multiple share
+                # the same name there is no way to distinguish them
+                logger.warning(f'Found multiple {kind}s with name: {label}')
+            else:
+                logger.warning(f'Could not locate {kind} with name: {label}')
+
+    def event_id(self, name: str):
+        """
+        Get the id of the event with `name`, or `None` if there is not exactly one.
+        """
+        return self._resolve("event", self._events_by_name, name, name)
+
+    def fight_id(self, event_id: int, bout: str):
+        """
+        Get the id of the fight for `bout` in an event, or `None` if there is not exactly one.
+        """
+        return self._resolve("fight", self._fights, (event_id, normalize_name(bout)), bout)
+
+    def fighter_id(self, name: str):
+        """
+        Get the id of the fighter whose full name is `name` (ignoring case), or `None` if
+        there is not exactly one.
+        """
+        return self._resolve("fighter", self._fighters, normalize_name(name), name)
@@ -0,0 +1,136 @@
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, models, transaction
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# SQLite settings used while loading. In WAL mode NORMAL only syncs at checkpoints, which
+# saves most of the fsyncs of FULL while a crash can still not corrupt the database.
+SQLITE_BULK_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "temp_store": "MEMORY",
+}
+
+
+class BulkLoadSession:
+    """
+    Context manager which prepares a database for a large load.
+
+    The whole load runs in a single transaction. On SQLite the connection is switched to WAL
+    with NORMAL syncing for the duration, so that readers are not blocked by the load and
+    commits are not fsync bound. The secondary indexes
+    of `deferred_models` are dropped on entry and rebuilt in one pass before committing, rather
+    than being maintained on every insert. All settings are restored on exit.
+    """
+
+    def __init__(self, deferred_models: list[type[models.Model]] = (), using: str = DEFAULT_DB_ALIAS):
+        self.deferred_models = list(deferred_models)
+        self.using = using
+        self.connection = connections[using]
+
+        self._atomic = transaction.atomic(using=using)
+        self._restore_pragmas: dict[str, str] = {}
+        self._dropped_indexes: list[tuple[str, str]] = []
+
+    def __enter__(self):
+        if self.connection.vendor == "sqlite":
+            self._tune_sqlite()
+
+        self._atomic.__enter__()
+        self._drop_indexes()
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            # On failure the rollback restores the dropped indexes
+            if exc_info[0] is None:
+                try:
+                    self._rebuild_indexes()
+                except Exception:
+                    self._atomic.__exit__(*sys.exc_info())
+                    raise
+            self._atomic.__exit__(*exc_info)
+        finally:
+            if self._restore_pragmas:
+                self._restore_sqlite()
+
+    def _pragma(self, cursor, name: str, value: str | None = None):
+        if value is not None:
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.execute(f"PRAGMA {name}")
+        row = cursor.fetchone()
+        return str(row[0]) if row else None
+
+    def _tune_sqlite(self):
+        """
+        Apply `SQLITE_BULK_PRAGMAS`, remembering the current values. These must be set outside
+        of a transaction.
+        """
+        if not self.connection.get_autocommit():
+            logger.debug(
+                "Skipping SQLite tuning, connection is already in a transaction")
+            return
+
+        with self.connection.cursor() as cursor:
+            for name, value in SQLITE_BULK_PRAGMAS.items():
+                self._restore_pragmas[name] = self._pragma(cursor, name)
+                self._pragma(cursor, name, value)
+
+    def _restore_sqlite(self):
+        with self.connection.cursor() as cursor:
+            for name, value in self._restore_pragmas.items():
+                try:
+                    self._pragma(cursor, name, value)
+                except OperationalError as err:
+                    logger.warning(
+                        f"Could not restore SQLite setting {name} = {value}: {err}")
+        self._restore_pragmas = {}
+
+    def _secondary_indexes(self, cursor, table: str) -> list[tuple[str, str]]:
+        """
+        Get the name and definition of each non-unique index on `table`. Unique indexes back
+        constraints which inserts rely on, so they are always left in place.
+        """
+        if self.connection.vendor == "sqlite":
+            cursor.execute(f"PRAGMA index_list({self.connection.ops.quote_name(table)})")
+            names = [row[1] for row in cursor.fetchall()
+                     if not row[2] and row[3] == "c"]
+            if not names:
+                return []
+            cursor.execute(
+                f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND name IN ({', '.join(['%s'] * len(names))})",
+                names)
+            return cursor.fetchall()
+
+        if self.connection.vendor == "postgresql":
+            cursor.execute("""
+                SELECT i.indexname, i.indexdef
+                FROM pg_indexes i
+                JOIN pg_class c ON c.relname = i.indexname
+                JOIN pg_index x ON x.indexrelid = c.oid
+                WHERE i.schemaname = current_schema() AND i.tablename = %s
+                AND NOT x.indisunique AND NOT x.indisprimary
+            """, [table])
+            return cursor.fetchall()
+
+        return []
+
+    def _drop_indexes(self):
+        with self.connection.cursor() as cursor:
+            for model in self.deferred_models:
+                for name, sql in self._secondary_indexes(cursor, model._meta.db_table):
+                    cursor.execute(
+                        f"DROP INDEX {self.connection.ops.quote_name(name)}")
+                    self._dropped_indexes.append((name, sql))
+
+        if self._dropped_indexes:
+            logger.debug(
+                f"Deferred {len(self._dropped_indexes)} index(es) until the load completes")
+
+    def _rebuild_indexes(self):
+        with self.connection.cursor() as cursor:
+            for name, sql in self._dropped_indexes:
+                logger.debug(f"Rebuilding index {name}")
+                cursor.execute(sql)
+        self._dropped_indexes = []
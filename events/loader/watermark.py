@@ -0,0 +1,97 @@
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+import hashlib
+import json
+import logging
+import os
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_FILE = "watermark.json"
+FILE_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path: Path) -> str | None:
+    """
+    Get the sha256 hex digest of a file, or None if it does not exist.
+    """
+    sha256 = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            while chunk := f.read(FILE_HASH_CHUNK_SIZE):
+                sha256.update(chunk)
+    except FileNotFoundError:
+        return None
+    return sha256.hexdigest()
+
+
+def row_hashes(df: pd.DataFrame, key: str) -> dict[str, str]:
+    """
+    Hash the rows of `df` grouped by their `key` column. The hash of a group does not depend on
+    the order of its rows, so only added, removed or edited rows change it.
+    """
+    if df.empty:
+        return {}
+
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    # Summing uint64 hashes wraps around, which keeps the combined hash the same width
+    combined = hashes.groupby(df[key].to_numpy(), sort=False).sum()
+    return {str(k): f"{h:016x}" for k, h in combined.items()}
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """
+    Hash all rows of `df` as a single group.
+    """
+    return f"{int(pd.util.hash_pandas_object(df, index=False).sum()):016x}"
+
+
+@dataclass
+class Watermark:
+    """
+    Record of the raw data the database was last loaded from, used to load only what changed
+    since.
+
+    `files` holds the digest of every raw file as of the last completed load, and `rows` holds
+    per-key row hashes of each dataset (i.e. per event url or per event name) so that changed
+    files can be narrowed down to the records which actually changed.
+    """
+
+    last_event_date: str | None = None
+    last_event_url: str | None = None
+    files: dict[str, str] = field(default_factory=dict)
+    rows: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path) -> "Watermark":
+        try:
+            with open(path, 'r') as f:
+                return cls(**json.load(f))
+        except FileNotFoundError:
+            return cls()
+        except (json.JSONDecodeError, TypeError) as err:
+            logger.warning(f"Ignoring unreadable watermark {path}: {err}")
+            return cls()
+
+    def save(self, path: Path):
+        path = Path(path)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+
+    def files_unchanged(self, files: list[str], digests: dict[str, Any]):
+        """
+        Check whether every one of `files` has the same digest as when the watermark was taken.
+        """
+        return all(self.files.get(f) is not None and self.files.get(f) == digests.get(f)
+                   for f in files)
+
+    def changed_keys(self, dataset: str, hashes: dict[str, str]) -> set[str]:
+        """
+        Get the keys of `dataset` which are new or whose rows changed since the watermark.
+        """
+        previous = self.rows.get(dataset, {})
+        return {k for k, h in hashes.items() if previous.get(k) != h}
@@ -0,0 +1,128 @@
+from octagonanalytics.settings import BASE_DIR
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from events.benchmarks.concurrency import DEFAULT_CLIENTS
+from events.benchmarks.parsing import FIXTURES_DIR, run_parsing_benchmarks
+from events.benchmarks.suite import DEFAULT_REPEAT, DEFAULT_SCALES, compare_results, run_benchmarks
+from pathlib import Path
+from typing import Any
+from datetime import datetime
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+RESULTS_DIR = BASE_DIR / "benchmarks"
+
+
+class Command(BaseCommand):
+    help = "Benchmark load_database, the main views and the scraper's HTML parsing against synthetic datasets and saved pages, fully offline."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--scale',
+            help='Size of the synthetic datasets relative to the real data. Can be given multiple times, defaults to 1, 10 and 100.',
+            type=float,
+            action='append',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            help='Number of timed requests made to each view.',
+            type=int,
+            default=DEFAULT_REPEAT,
+        )
+
+        parser.add_argument(
+            '--workers',
+            help='Number of processes load_database uses to process raw data.',
+            type=int,
+        )
+
+        parser.add_argument(
+            '--seed',
+            help='Seed of the synthetic data generator.',
+            type=int,
+            default=0,
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            help='Also compare the throughput of the sync views under WSGI against the async views under ASGI.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--clients',
+            help='Number of concurrent clients to compare the sync and async views with. Can be given multiple times, defaults to 50 and 500.',
+            type=int,
+            action='append',
+        )
+
+        parser.add_argument(
+            '--parsing-only',
+            help='Only benchmark parsing the saved HTML pages.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--fixtures',
+            help='Folder of saved HTML pages to benchmark parsing against.',
+            type=Path,
+            default=FIXTURES_DIR,
+        )
+
+        parser.add_argument(
+            '--output',
+            help='File the JSON results are written to. Defaults to a timestamped file in the benchmarks folder.',
+            type=Path,
+        )
+
+        parser.add_argument(
+            '--compare',
+            help='JSON results of a previous run to compare against.',
+            type=Path,
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare'], 'r') as f:
+                    baseline = json.load(f)
+            except (OSError, json.JSONDecodeError) as err:
+                raise CommandError(f"Could not read results to compare against: {err}")
+
+        scales = [] if options['parsing_only'] else options['scale'] or DEFAULT_SCALES
+        clients = options['clients'] or (DEFAULT_CLIENTS if options['concurrency'] else [])
+        results = run_benchmarks(
+            scales, repeat=options['repeat'], workers=options['workers'], seed=options['seed'],
+            clients=clients)
+        results['parsing'] = run_parsing_benchmarks(options['fixtures'], options['repeat'])
+
+        output = options['output']
+        if output is None:
+            RESULTS_DIR.mkdir(exist_ok=True)
+            output = RESULTS_DIR / f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Wrote benchmark results to {output}")
+
+        for run in results['runs']:
+            self.stdout.write(
+                f"{run['scale']}x: loaded in {run['load_time']:.2f}s")
+            for name, timing in run['views'].items():
+                self.stdout.write(
+                    f"  {name}: median {timing['median_ms']:.2f}ms, p95 {timing['p95_ms']:.2f}ms, {timing['db_queries']} queries")
+            for timing in run.get('concurrency', []):
+                self.stdout.write(
+                    f"  {timing['view']} {timing['server']} x{timing['clients']}: {timing['requests_per_sec']:.1f} requests/sec, p95 {timing['p95_ms']:.2f}ms, {timing['errors']} errors")
+
+        for page, result in results['parsing'].items():
+            timings = ", ".join(f"{name} {timing['median_ms']:.2f}ms"
+                                for name, timing in result['timings'].items())
+            self.stdout.write(f"parse {page}: {timings}")
+
+        if baseline is not None:
+            self.stdout.write("\n".join(compare_results(baseline, results)))
+
+        self.stdout.write(f"Results written to {output}")
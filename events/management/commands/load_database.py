@@ -1,45 +1,53 @@
-from octagonanalytics.settings import BASE_DIR
+from octagonanalytics.settings import BASE_DIR, DB_TYPE
 from django.core.management.base import BaseCommand, CommandParser
-from django.db.models.functions import Concat
-from django.db.models import Value
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Model
+from events.cache import bump_data_generation
+from events.http import CACHE_MODES, DEFAULT_CACHE_DIR, ResponseCache, build_session
+from events.loader.dag import Stage, StageRunner
+from events.loader.download import RAW_DATA_FILES, RawDataDownloader
+from events.loader.fight_stats import iter_fight_stats_by_event
+from events.loader.instrumentation import StageMetrics, record_rows
+from events.loader.pipeline import DataPipeline
+from events.loader.process import PROCESSED_DATA_SOURCES, PROCESSORS
+from events.loader.records import DEFAULT_BATCH_SIZE, RecordBuilder
+from events.loader.resolve import EntityResolver
+from events.loader.session import BulkLoadSession
+from events.loader.watermark import WATERMARK_FILE, Watermark, file_digest, frame_hash, row_hashes
 from events.models import Event
-from fighters.models import Fighter
+from fighters.models import Fighter, FighterCareerStats
+from fighters.stats import REFRESH_CHUNK_SIZE, refresh_career_stats
+from fighters.text import search_name
 from fights.models import Fight, FightStat
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable
 from datetime import datetime
-from collections import defaultdict
+from functools import partial
 import json
-import requests
 import logging
-import os
 import pandas as pd
-import numpy as np
-import re
 
 # TODO:
-# - handle skipping duplicate fight stats
 # - order events by date before insertion
-# - add args
-#   - clear tables before loading
 
 logger = logging.getLogger(__name__)
-DATA_DIR = BASE_DIR / "load_database"
-RAW_DATA_DIR = DATA_DIR / "raw"
-OUTPUT_DATA_DIR = DATA_DIR / "out"
+DEFAULT_DATA_DIR = BASE_DIR / "load_database"
+# Folders within the data folder
+RAW_DATA_FOLDER = "raw"
+OUTPUT_DATA_FOLDER = "out"
+# Completed stages of the latest run, kept alongside the checkpoints
+STATE_FILE = "stages.json"
 
+# Stream the largest tables in with COPY when running on PostgreSQL
+USE_COPY = DB_TYPE == "postgres"
 
-def _raw_data_path(file: str):
-    """
-    Get the path of a file in the raw data directory.
-    """
-    return (RAW_DATA_DIR / file).resolve()
 
-
-def _out_data_path(file: str):
+def _raw_data_path(file: str, raw_dir: Path):
     """
-    Get the path of a file in the output directory.
+    Get the path of a file in the raw data directory.
     """
-    return (OUTPUT_DATA_DIR / file).resolve()
+    return (raw_dir / file).resolve()
 
 
 def _parse_date(date_string: str | None):
@@ -62,259 +70,480 @@ def _parse_date(date_string: str | None):
             continue
 
 
-def _parse_time(time_string: str | None):
-    """
-    Parse a time string of format "mm:ss" into an integer representing total seconds.
-    """
-    if time_string is None:
-        return 0
-
-    try:
-        m, s = list(map(int, time_string.split(":")))
-        return m * 60 + s
-    except:
-        return 0
+# Model field -> processed column (and converter) mappings used to build entities
+EVENT_FIELDS = {
+    "name": "name",
+    "date": ("date", _parse_date),
+    "location": "location",
+    "url": "url",
+}
+
+FIGHTER_FIELDS = {
+    "first_name": "first",
+    "last_name": "last",
+    "nickname": "nickname",
+    "height": "height",
+    "weight": "weight",
+    "reach": "reach",
+    "stance": "stance",
+    "dob": ("dob", _parse_date),
+    "url": "url",
+    "search_name": "search_name",
+}
+
+FIGHT_FIELDS = {
+    "bout": "bout",
+    "outcome": "outcome",
+    "weight_class": "weightclass",
+    "method": "method",
+    "round": "round",
+    "time": "time",
+    "time_format": "time format",
+    "referee": "referee",
+    "details": "details",
+    "url": "url",
+}
+
+FIGHT_STAT_FIELDS = {
+    "fight_id": "fight_id",
+    "fighter_id": "fighter_id",
+    "round": "round",
+    "knockdowns": "knockdowns",
+    "submission_attempts": "submissionattempts",
+    "reversals": "reversals",
+    "control_time": "controltime",
+    "takedowns": "takedownshit",
+    "takedowns_attempted": "takedownsattempted",
+    "total_strikes": "totalstrikeshit",
+    "total_strikes_attempted": "totalstrikesattempted",
+    "sig_strikes": "sigstrikeshit",
+    "sig_strikes_attempted": "sigstrikesattempted",
+    "head_strikes": "headstrikeshit",
+    "head_strikes_attempted": "headstrikesattempted",
+    "body_strikes": "bodystrikeshit",
+    "body_strikes_attempted": "bodystrikesattempted",
+    "leg_strikes": "legstrikeshit",
+    "leg_strikes_attemped": "legstrikesattempted",
+    "distance_strikes": "distancehit",
+    "distance_strikes_attempted": "distanceattempted",
+    "clinch_strikes": "clinchhit",
+    "clinch_strikes_attempted": "clinchattempted",
+    "ground_strikes": "groundhit",
+    "ground_strikes_attemped": "groundattempted",
+}
 
 
 class Command(BaseCommand):
     help = "Scrape and load UFC data into the database."
 
-    # def add_arguments(self, parser: CommandParser) -> None:
-    #     parser.add_argument(
-    #         '--clear-tables',
-    #         help='Delete all existing records from the database before processing data. THIS ACTION IS PERMANENT.',
-    #         action='store_false',
-    #     )
-
-    #     parser.add_argument(
-    #         '--process-only',
-    #         help='Only process and prepare raw data, does not insert any records into the database.',
-    #         action='store_false',
-    #     )
+    # Raw files whose contents changed in the latest download, `None` until downloaded
+    changed_files: set[str] | None = None
+    stream_fight_stats = False
+    batch_size = DEFAULT_BATCH_SIZE
+    data_dir = DEFAULT_DATA_DIR
+    raw_dir = DEFAULT_DATA_DIR / RAW_DATA_FOLDER
+    # Load from `raw_dir` as it is, without downloading
+    offline = False
+    # Only load what changed since the watermark
+    incremental = False
+    # Metrics of every stage of the latest run
+    stage_metrics: dict[str, StageMetrics] = {}
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            '--clear-tables',
+            help='Delete all existing records from the database before loading data. THIS ACTION IS PERMANENT.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--process-only',
+            help='Only process and prepare raw data, does not insert any records into the database. Implies --checkpoint.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--checkpoint',
+            help='Write processed data to the output folder, allowing later runs to reuse datasets whose raw data is unchanged.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--resume',
+            help='Resume the previous run, skipping the stages it completed. Implies --checkpoint.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--stream-fight-stats',
+            help='Read the raw fight stats in chunks while loading them, inserting the stats of each event as soon as it has been read. Keeps memory usage bounded.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--batch-size',
+            help='Number of records inserted per query.',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+        )
+
+        parser.add_argument(
+            '--profile',
+            help='Dump cProfile stats of every stage to the profile folder within the output folder.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--workers',
+            help='Number of processes used to process raw data. Defaults to the number of CPUs.',
+            type=int,
+        )
+
+        parser.add_argument(
+            '--incremental',
+            help='Only load the events, fights, fight stats and fighters which are new or changed since the last completed load.',
+            action='store_true',
+        )
+
+        parser.add_argument(
+            '--watermark',
+            help='File recording what the last completed load contained. Defaults to a file in the output folder.',
+            type=Path,
+        )
+
+        parser.add_argument(
+            '--http-cache',
+            help='Folder raw data responses are cached in.',
+            type=Path,
+            default=DEFAULT_CACHE_DIR,
+        )
+
+        parser.add_argument(
+            '--cache-ttl',
+            help='Number of seconds a cached raw data file is used without revalidating it with the server.',
+            type=float,
+            default=0,
+        )
+
+        parser.add_argument(
+            '--http-mode',
+            help='"record" revalidates and caches every response, "replay" only uses cached responses, without network access.',
+            choices=CACHE_MODES,
+            default="live",
+        )
+
+        parser.add_argument(
+            '--data-dir',
+            help='Folder the raw data is downloaded to and processed data, checkpoints and the watermark are written to.',
+            type=Path,
+            default=DEFAULT_DATA_DIR,
+        )
+
+        parser.add_argument(
+            '--raw-dir',
+            help='Load the raw data files already present in this folder instead of downloading them.',
+            type=Path,
+        )
 
     def handle(self, *args: Any, **options: Any) -> str | None:
         logger.info(
-            f'Beginning database update with args: {json.dumps(options)}')
+            f'Beginning database update with args: {json.dumps(options, default=str)}')
+
+        # Processed data is only of use to a later run if it is checkpointed
+        checkpoint = options['checkpoint'] or options['resume'] or options['process_only']
+        self.data_dir = options['data_dir']
+        self.pipeline = DataPipeline(self.output_dir if checkpoint else None)
+        self.stream_fight_stats = options['stream_fight_stats']
+        self.batch_size = options['batch_size']
+        self.resolver = EntityResolver()
+        self.offline = options['raw_dir'] is not None
+        self.raw_dir = options['raw_dir'] or self.data_dir / RAW_DATA_FOLDER
+        self.incremental = options['incremental']
+        self.http_cache = ResponseCache(
+            options['http_cache'], ttl=options['cache_ttl'], mode=options['http_mode'])
+        self.watermark_path = options['watermark'] or self.output_dir / WATERMARK_FILE
+        # Clearing the tables throws away everything the watermark records as loaded, so it
+        # must not let any stage be skipped
+        self.watermark = Watermark() if options['clear_tables'] else Watermark.load(self.watermark_path)
+        # Row hashes of the datasets loaded by this run, recorded in the next watermark
+        self.row_hashes: dict[str, dict[str, str]] = {}
+        # Datasets with rows this run could not load, which the next load has to retry
+        self.skipped_datasets: set[str] = set()
+        self._file_digests: dict[str, str | None] | None = None
+        # Fighters and fights whose stats an incremental load changed, to refresh career stats of
+        self.touched_fighters: set[int] = set()
+        self.changed_fight_urls: set[str] = set()
 
         try:
             self.ensure_folders()
-            self.download_raw_data()
-            self.process_raw_data()
 
-            # if options['process-only']:
-            #     logger.info('Completed processing UFC data')
-            #     return
+            runner = StageRunner(
+                self.build_stages(options['process_only'], options['clear_tables']),
+                state_path=self.output_dir / STATE_FILE if checkpoint else None,
+                max_workers=options['workers'],
+                profile_dir=self.output_dir / "profile" if options['profile'] else None)
 
-            self.load_database()
+            # Worker processes must not inherit open database connections
+            connections.close_all()
+            try:
+                runner.run(resume=options['resume'])
+            finally:
+                self.stage_metrics = runner.metrics
+
+            if options['process_only']:
+                logger.info('Completed processing UFC data')
+                return
         except Exception as err:
             logger.error(f'Error occurred while updating data: {err}')
+        # Even a failed update may have changed some of the data
+        bump_data_generation()
         logger.info('Database update complete')
 
-    def ensure_folders(self):
+    def build_stages(self, process_only: bool = False, clear_tables: bool = False) -> list[Stage]:
         """
-        Creates output folders if they do not exist, and empties them if they do.
+        Build the graph of stages which make up a database update.
         """
-        if not DATA_DIR.exists():
-            DATA_DIR.mkdir()
+        stages = []
+        if not self.offline:
+            stages.append(Stage(
+                "download",
+                self.download_raw_data,
+                collect=lambda changed: {"changed_files": sorted(changed)},
+                restore=self.restore_download,
+            ))
+
+        # Offline runs use the raw data as it is, so processing can start straight away
+        process_after = tuple(s.name for s in stages)
+        datasets = [d for d in PROCESSORS
+                    if not (d == "fight_stats" and self.stream_fight_stats)]
+        for dataset in datasets:
+            stages.append(Stage(
+                f"process_{dataset}",
+                PROCESSORS[dataset],
+                args=(self.raw_dir,),
+                depends_on=process_after,
+                in_process_pool=True,
+                collect=partial(self.collect_dataset, dataset),
+                skip_if=partial(self.skip_dataset, dataset, checkpointed=True),
+            ))
+
+        if process_only:
+            return stages
+
+        # Only clear out existing records once all of the new data is ready
+        load_after = tuple(s.name for s in stages)
+        if clear_tables:
+            stages.append(Stage("clear_tables", self.clear_tables,
+                                depends_on=load_after))
+            load_after = ("clear_tables",)
+
+        def after(*names: str):
+            return load_after + tuple(n for n in names if n not in load_after)
+
+        # Rebuilding the indexes of a whole table only pays off when most of it is loaded. An
+        # incremental load adds a few rows, and on PostgreSQL dropping an index would lock the
+        # table against reads for the whole stage.
+        defer_indexes = not self.incremental or clear_tables
+
+        def load_stage(dataset: str, load: Callable[[], int], deferred_models: list[type[Model]], *depends_on: str):
+            deferred_models = deferred_models if defer_indexes else []
+            return Stage(f"load_{dataset}", partial(self.run_load, load, deferred_models),
+                         depends_on=after(*depends_on),
+                         collect=self.collect_load,
+                         restore=self.restore_load,
+                         skip_if=partial(self.skip_dataset, dataset))
+
+        stages += [
+            load_stage("events", self.load_events, []),
+            load_stage("fighters", self.load_fighters, []),
+            load_stage("fights", self.load_fights,
+                       [Fight], "load_events"),
+            load_stage("fight_stats", self.load_fight_stats,
+                       [FightStat], "load_fights", "load_fighters"),
+        ]
+        load_stages = tuple(s.name for s in stages[-4:])
+        stages.append(Stage("load_career_stats", self.load_career_stats,
+                            depends_on=("load_fights", "load_fight_stats"),
+                            collect=lambda saved: {"saved": saved}))
+        # Only once the career stats are refreshed, or a failed refresh would never be retried
+        stages.append(Stage("save_watermark", self.save_watermark,
+                            depends_on=load_stages + ("load_career_stats",)))
 
-        if not RAW_DATA_DIR.exists():
-            RAW_DATA_DIR.mkdir()
+        return stages
 
-        if not OUTPUT_DATA_DIR.exists():
-            OUTPUT_DATA_DIR.mkdir()
+    @property
+    def output_dir(self) -> Path:
+        return self.data_dir / OUTPUT_DATA_FOLDER
+
+    def ensure_folders(self):
+        """
+        Creates the data folders if they do not exist.
+        """
+        for folder in [self.data_dir, self.raw_dir, self.output_dir]:
+            folder.mkdir(parents=True, exist_ok=True)
 
     def download_raw_data(self):
         """
         Download the raw csv data files from the scraper source.
         """
-        files = [
-            "ufc_event_details.csv",
-            "ufc_fight_details.csv",
-            "ufc_fight_results.csv",
-            "ufc_fight_stats.csv",
-            "ufc_fighter_details.csv",
-            "ufc_fighter_tott.csv"
-        ]
+        session = build_session(len(RAW_DATA_FILES), cache=self.http_cache)
+        results = RawDataDownloader(self.raw_dir, session=session).download_all(RAW_DATA_FILES)
 
-        for fname in files:
-            response = requests.get(
-                'https://raw.githubusercontent.com/Greco1899/scrape_ufc_stats/refs/heads/main/' + fname)
-            with open(_raw_data_path(fname), 'wb') as f:
-                f.write(response.content)
+        self.changed_files = {
+            fname for fname, result in results.items() if result.changed}
 
-    def process_raw_data(self):
-        """
-        Manipulate raw csv data to fit the constraints of our database.
-        """
-        logger.debug("Processing raw UFC data...")
+        logger.info(
+            f"downloaded raw data, {len(self.changed_files)} of {len(results)} file(s) changed")
 
-        self.process_raw_fighter_data()
-        self.process_raw_event_data()
-        self.process_raw_fight_data()
-        self.process_raw_fight_stats()
-        self.cleanup_raw_data()
+        return self.changed_files
 
-        logger.debug("Completed processing raw UFC data")
+    def restore_download(self, outputs: dict[str, Any]):
+        self.changed_files = set(outputs.get("changed_files", []))
 
-    def process_raw_fighter_data(self):
+    def file_digests(self):
         """
-        Combines raw UFC fighter details and tail of the tape (tott) data.
+        Get the digest of every raw data file, once it has been downloaded.
         """
-        df_details = pd.read_csv(_raw_data_path("ufc_fighter_details.csv"))
-        df_tott = pd.read_csv(_raw_data_path("ufc_fighter_tott.csv"))
-
-        # Outer join to keep all records
-        combined_df = pd.merge(df_details, df_tott, on='URL', how='outer')
+        if self._file_digests is None:
+            self._file_digests = {
+                f: file_digest(self.raw_dir / f) for f in RAW_DATA_FILES}
+        return self._file_digests
 
-        if 'FIGHTER' in combined_df.columns:
-            combined_df = combined_df.drop('FIGHTER', axis=1)
-
-        combined_df = combined_df.replace('--', '')
-
-        combined_df.to_csv(_out_data_path("fighters.csv"), index=False)
-
-    def process_raw_event_data(self):
+    def skip_dataset(self, dataset: str, checkpointed: bool = False):
         """
-        Formats raw event details data.
+        Check whether processing or loading a dataset can be skipped. When loading
+        incrementally that is the case if none of its raw inputs changed since the watermark.
+        Otherwise processing can still be skipped if a checkpoint of the dataset exists and
+        none of its raw inputs changed in the latest download.
         """
-        df_events = pd.read_csv(_raw_data_path("ufc_event_details.csv"))
+        sources = PROCESSED_DATA_SOURCES[dataset]
+        if self.incremental and self.watermark.files_unchanged(sources, self.file_digests()):
+            logger.info(f"Skipping {dataset}, raw data unchanged since the last load")
+            return True
 
-        df_events.rename(columns={'EVENT': 'NAME'}, inplace=True)
+        if not checkpointed or self.changed_files is None or not self.pipeline.has_checkpoint(dataset):
+            return False
 
-        df_events.to_csv(_out_data_path("events.csv"), index=False)
+        return not any(f in self.changed_files for f in sources)
 
-    def process_raw_fight_data(self):
+    def collect_dataset(self, dataset: str, df: pd.DataFrame):
         """
-        Combines raw fight details and results.
+        Hand a dataset processed in a worker over to the load stages.
         """
-        df_fight_details = pd.read_csv(_raw_data_path("ufc_fight_details.csv"))
-        df_fight_results = pd.read_csv(_raw_data_path("ufc_fight_results.csv"))
-
-        combined_df = pd.merge(
-            df_fight_details, df_fight_results, on='URL', how='outer')
+        self.pipeline.put(dataset, df)
+        return {"rows": len(df)}
 
-        combined_df = combined_df.drop(columns=['EVENT_x', 'BOUT_x'])
-        combined_df.rename(columns={'EVENT_y': 'EVENT',
-                                    'BOUT_y': 'BOUT'}, inplace=True)
+    def clear_tables(self):
+        """
+        Delete every record from the tables which are loaded.
+        """
+        models = [FighterCareerStats, FightStat, Fight, Fighter, Event]
+        connection = connections[DEFAULT_DB_ALIAS]
+        statements = connection.ops.sql_flush(
+            no_style(), [m._meta.db_table for m in models], reset_sequences=True)
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+        self.resolver.invalidate()
+        # Nothing loaded before is left, so a load failing from here on must not leave the
+        # next incremental load skipping the data
+        self.watermark_path.unlink(missing_ok=True)
+        logger.warning(f"Cleared all records from {len(models)} table(s)")
+
+    def save_watermark(self):
+        """
+        Record the raw data which has now been loaded, so the next incremental load can skip it.
+        """
+        latest = Event.objects.order_by("-date", "-id").first()
+        # The raw files of datasets with skipped rows are left out, so the next incremental
+        # load processes them again rather than skipping them as unchanged
+        retried = {f for dataset in self.skipped_datasets for f in PROCESSED_DATA_SOURCES[dataset]}
+        watermark = Watermark(
+            last_event_date=latest.date.isoformat() if latest and latest.date else None,
+            last_event_url=latest.url if latest else None,
+            files={f: digest for f, digest in self.file_digests().items() if digest and f not in retried},
+            rows={**self.watermark.rows, **self.row_hashes},
+        )
+        watermark.save(self.watermark_path)
+        self.watermark = watermark
+        logger.info(
+            f"Saved watermark, last event {watermark.last_event_url} on {watermark.last_event_date}")
 
-        combined_df['URL'] = combined_df.pop('URL')
+    def changed_rows(self, dataset: str, df: pd.DataFrame, key: str):
+        """
+        Hash the rows of a dataset by `key` for the next watermark. When loading incrementally,
+        only the rows of keys which are new or changed since the watermark are returned.
+        """
+        hashes = row_hashes(df, key)
+        self.row_hashes[dataset] = hashes
+        if not self.incremental:
+            return df
 
-        combined_df.to_csv(_out_data_path("fights.csv"), index=False)
+        changed = self.watermark.changed_keys(dataset, hashes)
+        logger.info(f"{len(changed)} of {len(hashes)} {dataset} key(s) changed since the last load")
+        return df[df[key].astype(str).isin(changed)]
 
-    def process_raw_fight_stats(self):
+    def collect_load(self, created: int):
         """
-        Formats and manipulates raw fight stats data.
+        Record what a load stage leaves for the later stages, so a resumed run still refreshes
+        the career stats it changed and retries the rows it skipped.
         """
-        df_fight_stats = pd.read_csv(_raw_data_path("ufc_fight_stats.csv"))
-
-        rename_cols = {
-            'KD': 'KNOCKDOWNS',
-            'SIG.STR.': 'SIGSTRIKES',
-            'SIG.STR. %': 'SIGSTRIKESPERCENT',
-            'TOTAL STR.': 'TOTALSTRIKES',
-            'TD': 'TAKEDOWNS',
-            'TD %': 'TAKEDOWNSPERCENT',
-            'SUB.ATT': 'SUBMISSIONATTEMPTS',
-            'REV.': 'REVERSALS',
-            'CTRL': 'CONTROLTIME',
-            'HEAD': 'HEADSTRIKES',
-            'BODY': 'BODYSTRIKES',
-            'LEG': 'LEGSTRIKES'
+        return {
+            "created": created,
+            "touched_fighters": sorted(self.touched_fighters),
+            "changed_fight_urls": sorted(self.changed_fight_urls),
+            "skipped_datasets": sorted(self.skipped_datasets),
         }
 
-        # Rename cols
-        df_fight_stats.rename(columns=rename_cols, inplace=True)
+    def restore_load(self, outputs: dict[str, Any]):
+        self.touched_fighters.update(outputs.get("touched_fighters", []))
+        self.changed_fight_urls.update(outputs.get("changed_fight_urls", []))
+        self.skipped_datasets.update(outputs.get("skipped_datasets", []))
 
-        # Remove 'Round {x}' text from ROUND col
-        df_fight_stats['ROUND'] = df_fight_stats['ROUND'].str.replace(
-            'Round ', '', regex=False)
-
-        # Convert any blank control time values '--' to zeroes
-        df_fight_stats['CONTROLTIME'] = df_fight_stats['CONTROLTIME'].str.replace(
-            '--', '0:00', regex=False)
-
-        # Convert control time to a total number of seconds
-        df_fight_stats['CONTROLTIME'] = df_fight_stats['CONTROLTIME'].apply(
-            _parse_time)
-
-        # Extract '{x} of {y}' stats into separate columns
-        df_fight_stats[['SIGSTRIKESHIT', 'SIGSTRIKESATTEMPTED']
-                       ] = df_fight_stats['SIGSTRIKES'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('SIGSTRIKES', axis=1, inplace=True)
-        df_fight_stats.drop('SIGSTRIKESPERCENT', axis=1, inplace=True)
-
-        df_fight_stats[['TOTALSTRIKESHIT', 'TOTALSTRIKESATTEMPTED']
-                       ] = df_fight_stats['TOTALSTRIKES'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('TOTALSTRIKES', axis=1, inplace=True)
-
-        df_fight_stats[['TAKEDOWNSHIT', 'TAKEDOWNSATTEMPTED']
-                       ] = df_fight_stats['TAKEDOWNS'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('TAKEDOWNS', axis=1, inplace=True)
-        df_fight_stats.drop('TAKEDOWNSPERCENT', axis=1, inplace=True)
-
-        df_fight_stats[['HEADSTRIKESHIT', 'HEADSTRIKESATTEMPTED']
-                       ] = df_fight_stats['HEADSTRIKES'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('HEADSTRIKES', axis=1, inplace=True)
-
-        df_fight_stats[['BODYSTRIKESHIT', 'BODYSTRIKESATTEMPTED']
-                       ] = df_fight_stats['BODYSTRIKES'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('BODYSTRIKES', axis=1, inplace=True)
-
-        df_fight_stats[['LEGSTRIKESHIT', 'LEGSTRIKESATTEMPTED']
-                       ] = df_fight_stats['LEGSTRIKES'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('LEGSTRIKES', axis=1, inplace=True)
-
-        df_fight_stats[['DISTANCEHIT', 'DISTANCEATTEMPTED']
-                       ] = df_fight_stats['DISTANCE'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('DISTANCE', axis=1, inplace=True)
-
-        df_fight_stats[['CLINCHHIT', 'CLINCHATTEMPTED']
-                       ] = df_fight_stats['CLINCH'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('CLINCH', axis=1, inplace=True)
+    def skip_rows(self, dataset: str, keys):
+        """
+        Forget the row hashes of keys whose rows could not be loaded, such as rows of an event
+        which could not be resolved, so the next incremental load retries them.
+        """
+        keys = {str(key) for key in keys}
+        if not keys:
+            return
 
-        df_fight_stats[['GROUNDHIT', 'GROUNDATTEMPTED']
-                       ] = df_fight_stats['GROUND'].str.extract(r'(\d+) of (\d+)')
-        df_fight_stats.drop('GROUND', axis=1, inplace=True)
+        hashes = self.row_hashes.get(dataset, {})
+        for key in keys:
+            hashes.pop(key, None)
+        self.skipped_datasets.add(dataset)
+        logger.info(f"Left {len(keys)} {dataset} key(s) to be retried by the next load")
 
-        df_fight_stats.to_csv(_out_data_path("fight_stats.csv"), index=False)
+    def run_load(self, load: Callable[[], int], deferred_models: list[type[Model]]):
+        """
+        Run a load stage in its own bulk load session, so a completed stage stays committed
+        even if a later one fails. The indexes of `deferred_models` are rebuilt once the stage
+        has inserted everything.
+        """
+        with BulkLoadSession(deferred_models=deferred_models):
+            return load()
 
-    def cleanup_raw_data(self):
+    def load_career_stats(self):
         """
-        Clean up various inconsistencies and performs a final formatting pass on all raw data.
+        Rebuild the career stats of every fighter after a full load, or only of the fighters
+        whose fights or fight stats changed after an incremental one.
         """
+        if not self.incremental:
+            return refresh_career_stats(batch_size=self.batch_size)
 
-        files = [
-            _out_data_path(f) for f in [
-                'fighters.csv', 'events.csv', 'fights.csv', 'fight_stats.csv'
-            ]
-        ]
+        fighter_ids = set(self.touched_fighters)
+        urls = sorted(self.changed_fight_urls)
+        for i in range(0, len(urls), REFRESH_CHUNK_SIZE):
+            fighter_ids.update(FightStat.objects
+                               .filter(fight__url__in=urls[i:i + REFRESH_CHUNK_SIZE])
+                               .values_list("fighter_id", flat=True))
 
-        for file in files:
-            if os.path.exists(file):
-                df = pd.read_csv(file)
-
-                # Lowercase headers
-                df.columns = [col.lower() for col in df.columns]
-                # Strip whitespace from strings
-                df = df.map(lambda x: x.strip() if isinstance(x, str) else x)
-                # Remove double-spaces
-                df = df.map(lambda x: re.sub(r'\s+', ' ', x.strip())
-                            if isinstance(x, str) else x)
-                # Normalize "vs" to "vs."
-                df = df.map(lambda x: re.sub(r"\bvs(?!\.)", "vs.", x)
-                            if isinstance(x, str) else x)
-                df.to_csv(file, index=False)
-
-    def load_database(self):
-        """
-        Load entities into the database from the processed UFC data.
-        """
-        logger.debug(
-            'Beginning to insert entities into database from processed UFC data...')
-        self.load_events()
-        self.load_fighters()
-        self.load_fights()
-        self.load_fight_stats()
+        logger.info(f"Refreshing career stats of {len(fighter_ids)} fighter(s)")
+        return refresh_career_stats(fighter_ids, batch_size=self.batch_size)
 
     def load_events(self):
         """
@@ -322,23 +551,19 @@ class Command(BaseCommand):
         """
         logger.debug("Loading events...")
 
-        df_events = pd.read_csv(_out_data_path("events.csv"))
-
-        existing_events = set(Event.objects.values_list("url", flat=True))
-
-        new_events = [
-            Event(
-                name=d["name"],
-                date=_parse_date(d['date']),
-                location=d['location'],
-                url=d['url']
-            ) for _, d in df_events.iterrows()
-            if d['url'] not in existing_events
-        ]
+        df_events = self.pipeline.get("events")
+        record_rows(rows_in=len(df_events))
+        df_events = self.changed_rows("events", df_events, "url")
+        df_events = df_events.drop_duplicates(subset=["url"], keep="last")
 
-        Event.objects.bulk_create(new_events)
+        builder = RecordBuilder(Event, EVENT_FIELDS, self.batch_size,
+                                unique_fields=["url"])
+        builder.bulk_create(df_events)
+        self.resolver.invalidate(Event)
 
-        logger.info(f"inserted {len(new_events)} new event(s)")
+        logger.info(f"upserted {builder.summary()}")
+        record_rows(rows_out=builder.created)
+        return builder.created
 
     def load_fighters(self):
         """
@@ -346,32 +571,26 @@ class Command(BaseCommand):
         """
         logger.debug("Loading fighters...")
 
-        df_fighters = pd.read_csv(_out_data_path("fighters.csv"))
-        df_fighters.replace({np.nan: None}, inplace=True)
-
-        existing_fighters = set(Fighter.objects.values_list("url", flat=True))
-
-        new_fighters = [
-            Fighter(
-                first_name=d["first"],
-                last_name=d['last'],
-                nickname=d['nickname'],
-                height=d['height'],
-                weight=d['weight'],
-                reach=d['reach'],
-                stance=d['stance'],
-                dob=_parse_date(d['dob']),
-                url=d['url']
-            ) for _, d in df_fighters.iterrows()
-            if d['url'] not in existing_fighters
-            # TODO: log this case
-            and d['first'] is not None
-            and d['last'] is not None
-        ]
-
-        Fighter.objects.bulk_create(new_fighters)
-
-        logger.info(f"inserted {len(new_fighters)} new event(s)")
+        df_fighters = self.pipeline.get("fighters")
+        record_rows(rows_in=len(df_fighters))
+        df_fighters = self.changed_rows("fighters", df_fighters, "url")
+        df_fighters = df_fighters.drop_duplicates(subset=["url"], keep="last")
+        # TODO: log this case
+        unnamed = df_fighters["first"].isna() | df_fighters["last"].isna()
+        self.skip_rows("fighters", df_fighters.loc[unnamed, "url"])
+        df_fighters = df_fighters[~unnamed]
+        df_fighters["search_name"] = [
+            search_name(first, last, nickname) for first, last, nickname
+            in zip(df_fighters["first"], df_fighters["last"], df_fighters["nickname"])]
+
+        builder = RecordBuilder(Fighter, FIGHTER_FIELDS, self.batch_size,
+                                unique_fields=["url"])
+        builder.bulk_create(df_fighters)
+        self.resolver.invalidate(Fighter)
+
+        logger.info(f"upserted {builder.summary()}")
+        record_rows(rows_out=builder.created)
+        return builder.created
 
     def load_fights(self):
         """
@@ -379,44 +598,38 @@ class Command(BaseCommand):
         """
         logger.debug("Loading fights...")
 
-        df_fights = pd.read_csv(_out_data_path("fights.csv"))
-        df_fights.replace({np.nan: None}, inplace=True)
+        df_fights = self.pipeline.get("fights")
+        record_rows(rows_in=len(df_fights))
+        df_fights = self.changed_rows("fights", df_fights, "event")
+        df_fights = df_fights.drop_duplicates(subset=["url"], keep="last")
 
-        existing_fights = set(Fight.objects.values_list("url", flat=True))
+        builder = RecordBuilder(
+            Fight, FIGHT_FIELDS, self.batch_size, use_copy=USE_COPY, unique_fields=["url"])
 
         # Group fight data by event name
-        new_fights: dict[str, list[Any]] = defaultdict(list)
-        for f in [d for _, d in df_fights.iterrows()
-                  if d["url"] not in existing_fights]:
-            new_fights[f["event"]].append(f)
-
-        for event_name, fights_data in new_fights.items():
+        groups = []
+        for event_name, df_event_fights in df_fights.groupby("event", sort=False):
             logger.debug(
-                f"Preparing to create {len(fights_data)} fight(s) for event: {event_name}")
+                f"Preparing to create {len(df_event_fights)} fight(s) for event: {event_name}")
 
-            event_entity = Event.objects.get(name=event_name)
-            if not event_entity:
+            event_id = self.resolver.event_id(event_name)
+            if event_id is None:
                 logger.warning(
-                    f"Skipping creation of {len(fights_data)} fight(s), could not locate event with name: {event_name}")
+                    f"Skipping creation of {len(df_event_fights)} fight(s), could not locate event with name: {event_name}")
+                self.skip_rows("fights", [event_name])
                 continue
 
-            new_fight_entities = [
-                Fight(
-                    event=event_entity,
-                    bout=d['bout'],
-                    outcome=d['outcome'],
-                    weight_class=d['weightclass'],
-                    method=d['method'],
-                    round=d['round'],
-                    time=d['time'],
-                    time_format=d['time format'],
-                    referee=d['referee'],
-                    details=d['details'],
-                    url=d['url']
-                ) for d in fights_data
-            ]
-
-            Fight.objects.bulk_create(new_fight_entities)
+            groups.append((df_event_fights, {"event_id": event_id}))
+
+        builder.bulk_create_groups(groups)
+        if self.incremental:
+            self.changed_fight_urls.update(df_fights["url"])
+
+        self.resolver.invalidate(Fight)
+
+        logger.info(f"upserted {builder.summary()}")
+        record_rows(rows_out=builder.created)
+        return builder.created
 
     def load_fight_stats(self):
         """
@@ -424,98 +637,72 @@ class Command(BaseCommand):
         """
         logger.debug("Loading fight stats...")
 
-        df_fight_stats = pd.read_csv(_out_data_path("fight_stats.csv"))
-        df_fight_stats.replace({np.nan: None}, inplace=True)
-
-        # Group stats by { event: bout: fighter: [stats] }
-        # Looking up fights by bout name only is not reliable since there could be multiple
-        # instances of the same matchup (i.e. "Khabib Nurmagomedov vs. Conor McGregor")
-        stats_data_grouped: dict[str, dict[str, dict[str, list[Any]]]] = {}
-        for (event, bout, fighter), group in df_fight_stats.groupby(["event", "bout", "fighter"]):
-            stats_data_grouped.setdefault(event, {}).setdefault(
-                bout, {})[fighter] = group.to_dict(orient="records")
-
-        # Set up efficient lookup for fighters
-        fighters_cache: dict[str, Fighter] = {}
-
-        def get_fighter(name: str):
-            # Check cache first
-            fighter = fighters_cache.get(name)
-            if fighter:
-                return fighter
+        # Stats are handled one event at a time so only a single event's stats are held as
+        # records and model instances at once
+        if self.stream_fight_stats:
+            stats_by_event = iter_fight_stats_by_event(
+                _raw_data_path("ufc_fight_stats.csv", self.raw_dir))
+        else:
+            stats_by_event = self.pipeline.get("fight_stats").groupby(
+                "event", sort=False, observed=True)
+
+        builder = RecordBuilder(
+            FightStat, FIGHT_STAT_FIELDS, self.batch_size, use_copy=USE_COPY,
+            unique_fields=["fight", "fighter", "round"])
+
+        previous_hashes = self.watermark.rows.get("fight_stats", {})
+        hashes = self.row_hashes["fight_stats"] = {}
+
+        for event_name, df_event_stats in stats_by_event:
+            record_rows(rows_in=len(df_event_stats))
+            event_hash = hashes[str(event_name)] = frame_hash(df_event_stats)
+            if self.incremental and previous_hashes.get(str(event_name)) == event_hash:
+                continue
 
-            # Query database for fighter by full name
-            try:
-                fighter = Fighter.objects.annotate(full_name_q=Concat(
-                    'first_name', Value(' '), 'last_name')).get(full_name_q__iexact=name)
-            except Fighter.MultipleObjectsReturned:
-                # Currently fight stats only identify the fighter by name, so if multiple fighters share
-                # the same full name, there is no way to distinguish them
+            event_id = self.resolver.event_id(event_name)
+            if event_id is None:
                 logger.warning(
-                    f'Query returned multiple fighters with name: {name}')
-                return
-            except:
-                logger.warning(f'Could not locate fighter with name: {name}')
-                return
-
-            fighters_cache[name] = fighter
-            return fighter
+                    f"Skipping creation of {len(df_event_stats)} fight stat(s), could not locate event with name: {event_name}")
+                self.skip_rows("fight_stats", [event_name])
+                continue
 
-        for event_name, fights_data in stats_data_grouped.items():
-            event_entity = Event.objects.prefetch_related(
-                "fights").get(name=event_name)
+            if self.incremental:
+                # The stats of a changed event are replaced as a whole
+                event_stats = FightStat.objects.filter(fight__event_id=event_id)
+                self.touched_fighters.update(event_stats.values_list("fighter_id", flat=True))
+                deleted, _ = event_stats.delete()
+                if deleted:
+                    logger.debug(f"Replacing {deleted} fight stat(s) of {event_name}")
+
+            # Looking up fights by bout name only is not reliable since there could be multiple
+            # instances of the same matchup (i.e. "Khabib Nurmagomedov vs. Conor McGregor"),
+            # so fights are resolved within their event. Each bout and fighter pair is only
+            # resolved once, then joined back onto its rows.
+            pairs = df_event_stats[["bout", "fighter"]].drop_duplicates()
+            pairs["fight_id"] = [self.resolver.fight_id(event_id, bout)
+                                 for bout in pairs["bout"]]
+            pairs["fighter_id"] = [self.resolver.fighter_id(fighter)
+                                   for fighter in pairs["fighter"]]
+
+            unresolved = pairs[pairs["fighter_id"].isna() & pairs["fight_id"].notna()]
+            for bout, fighter_name in zip(unresolved["bout"], unresolved["fighter"]):
+                logger.debug(
+                    f'Skipping creation of fight stats for "{fighter_name}" in {bout}')
+
+            if pairs[["fight_id", "fighter_id"]].isna().any(axis=None):
+                self.skip_rows("fight_stats", [event_name])
+            pairs = pairs.dropna().astype({"fight_id": "int64", "fighter_id": "int64"})
+            if self.incremental:
+                self.touched_fighters.update(pairs["fighter_id"].tolist())
+            df_event_stats = df_event_stats.merge(pairs, on=["bout", "fighter"])
+            # A repeated round would conflict with itself within a single upsert
+            df_event_stats = df_event_stats.drop_duplicates(
+                subset=["fight_id", "fighter_id", "round"], keep="last")
 
             # Save fight stats in batches per event
-            new_stats: list[FightStat] = []
-
-            # Iterate over the fight entities fetched with the event
-            for fight_entity in event_entity.fights.all():
-                # Find the fight in the raw data
-                stats_data = fights_data.get(fight_entity.bout)
-
-                if stats_data is None:
-                    continue
-
-                # Create stat entities for each fighter
-                for fighter_name, fighter_stats_data in stats_data.items():
-                    fighter_entity = get_fighter(fighter_name)
-
-                    if not fighter_entity:
-                        logger.warning(
-                            f'Could not locate fighter: "{fighter_name}", skipping creation of {len(fighter_stats_data)} fight stats')
-                        continue
-
-                    new_stats_for_fighter = [FightStat(
-                        fight=fight_entity,
-                        fighter=fighter_entity,
-                        knockdowns=d['knockdowns'],
-                        submission_attempts=d['submissionattempts'],
-                        reversals=d['reversals'],
-                        control_time=d['controltime'],
-                        takedowns=d['takedownshit'],
-                        takedowns_attempted=d['takedownsattempted'],
-                        total_strikes=d['totalstrikeshit'],
-                        total_strikes_attempted=d['totalstrikesattempted'],
-                        sig_strikes=d['sigstrikeshit'],
-                        sig_strikes_attempted=d['sigstrikesattempted'],
-                        head_strikes=d['headstrikeshit'],
-                        head_strikes_attempted=d['headstrikesattempted'],
-                        body_strikes=d['bodystrikeshit'],
-                        body_strikes_attempted=d['bodystrikesattempted'],
-                        leg_strikes=d['legstrikeshit'],
-                        leg_strikes_attemped=d['legstrikesattempted'],
-                        distance_strikes=d['distancehit'],
-                        distance_strikes_attempted=d['distanceattempted'],
-                        clinch_strikes=d['clinchhit'],
-                        clinch_strikes_attempted=d['clinchattempted'],
-                        ground_strikes=d['groundhit'],
-                        ground_strikes_attemped=d['groundattempted']
-                    ) for d in fighter_stats_data]
-
-                    logger.debug(
-                        f"Creating {len(new_stats_for_fighter)} stats for {fighter_entity}")
-
-                    new_stats.extend(new_stats_for_fighter)
-
-            logger.debug(f"Creating {len(new_stats)} stats for {event_name}")
-            FightStat.objects.bulk_create(new_stats)
+            created = builder.bulk_create(df_event_stats)
+            logger.debug(f"Saved {created} stats for {event_name}")
+
+        logger.info(f"upserted {builder.summary()}")
+        record_rows(rows_out=builder.created)
+        return builder.created
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def deduplicate_event_urls(apps, schema_editor):
+    """
+    Merge events sharing a url into the first one created, so the url can be made unique.
+    """
+    Event = apps.get_model("events", "Event")
+    Fight = apps.get_model("fights", "Fight")
+
+    duplicated = (Event.objects.values("url").annotate(count=Count("id"), keep=Min("id"))
+                  .filter(count__gt=1))
+    for row in duplicated:
+        duplicates = Event.objects.filter(url=row["url"]).exclude(id=row["keep"])
+        Fight.objects.filter(event__in=duplicates).update(event_id=row["keep"])
+        duplicates.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('fights', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_event_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_deduplicate_event_urls'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='url',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+    ]
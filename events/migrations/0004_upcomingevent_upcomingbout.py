@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_alter_event_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UpcomingEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128)),
+                ('starts_at', models.DateTimeField(db_index=True)),
+                ('location', models.CharField(max_length=128)),
+                ('url', models.CharField(max_length=256, unique=True)),
+                ('scraped_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UpcomingBout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order', models.PositiveSmallIntegerField()),
+                ('fighter1', models.CharField(max_length=128)),
+                ('fighter2', models.CharField(max_length=128)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bouts', to='events.upcomingevent')),
+            ],
+            options={
+                'ordering': ['event', 'order'],
+                'constraints': [models.UniqueConstraint(fields=('event', 'order'), name='unique_upcoming_bout_order')],
+            },
+        ),
+    ]
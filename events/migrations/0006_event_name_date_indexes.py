@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_datageneration'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
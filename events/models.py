@@ -16,9 +16,60 @@ class Event(models.Model):
         fights: models.Manager["Fight"]
 
     name = models.CharField(max_length=128)
-    date = models.DateField()
+    # Sorted on by the home page and the loader's watermark
+    date = models.DateField(db_index=True)
     location = models.CharField(max_length=64)
-    url = models.CharField(max_length=128)
+    url = models.CharField(max_length=128, unique=True)
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+class UpcomingEvent(models.Model):
+    """
+    Represents a scheduled UFC event, as last scraped from the events listing.
+    """
+
+    if TYPE_CHECKING:
+        bouts: models.Manager["UpcomingBout"]
+
+    name = models.CharField(max_length=128)
+    starts_at = models.DateTimeField(db_index=True)
+    location = models.CharField(max_length=128)
+    url = models.CharField(max_length=256, unique=True)
+    scraped_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name
+
+
+class UpcomingBout(models.Model):
+    """
+    Represents a bout on the fight card of an upcoming UFC event.
+    """
+
+    event = models.ForeignKey(UpcomingEvent, on_delete=models.CASCADE, related_name="bouts")
+    # Position of the bout on the card, from the main event down
+    order = models.PositiveSmallIntegerField()
+    fighter1 = models.CharField(max_length=128)
+    fighter2 = models.CharField(max_length=128)
+
+    class Meta:
+        ordering = ["event", "order"]
+        constraints = [
+            models.UniqueConstraint(fields=["event", "order"], name="unique_upcoming_bout_order")
+        ]
+
+    def __str__(self):
+        return f"{self.fighter1} vs. {self.fighter2}"
+
+
+class DataGeneration(models.Model):
+    """
+    Counts updates to the data, so anything cached against older data can be told apart.
+    """
+
+    generation = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Generation {self.generation}"
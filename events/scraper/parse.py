@@ -0,0 +1,146 @@
+from bs4 import BeautifulSoup, SoupStrainer
+from datetime import datetime
+import logging
+import soupsieve
+
+try:
+    import lxml  # noqa: F401
+    # Considerably faster than the builtin parser when it is installed
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+UFC_BASE_URL = 'https://www.ufc.com'
+
+# Selectors for fighter names on an event page, from the most to the least specific
+FIGHTER_NAME_SELECTORS = [
+    'h3.c-listing-fight__corner-name',
+    '.c-listing-fight__corner-name',
+    '[class*="fighter-name"]',
+    '[class*="corner-name"]',
+    'h3[class*="name"]'
+]
+
+# Only the parts of each page which are read are parsed at all. Every fighter name selector
+# matches elements with "name" in their class.
+EVENT_LISTING_STRAINER = SoupStrainer('article', class_='c-card-event--result')
+FIGHT_CARD_STRAINER = SoupStrainer(class_=lambda c: c is not None and 'name' in c)
+
+
+def _clean_name(name: str):
+    # Names are split over lines between the first and last name
+    return ' '.join(name.strip().replace('\n', ' ').split())
+
+
+def parse_event_listing(html: bytes | str, now: datetime, base_url: str = UFC_BASE_URL,
+                        parser: str = DEFAULT_PARSER) -> list[dict]:
+    """
+    Parse the events listing page into the events starting after `now`, soonest first.
+    """
+    soup = BeautifulSoup(html, parser, parse_only=EVENT_LISTING_STRAINER)
+
+    articles = soup.find_all('article', class_='c-card-event--result')
+    logger.debug(f"Found {len(articles)} events")
+
+    events = []
+    for a in articles:
+        date_tag = a.find("div", class_="c-card-event--result__date")
+        if not date_tag:
+            continue
+
+        ev_date_ts = date_tag.get("data-main-card-timestamp")
+        if not ev_date_ts:
+            continue
+
+        ev_time = datetime.fromtimestamp(int(ev_date_ts))
+        if ev_time <= now:
+            continue
+
+        a_tag = a.find("a", href=lambda h: h and h.startswith("/event/"))
+        if not a_tag:
+            continue
+
+        name_tag = a.find("h3", class_="c-card-event--result__headline") or a_tag
+        event_name = name_tag.get_text().strip() if name_tag else "Unknown Event"
+
+        # get rid of \n after arena + location
+        location_tag = a.find("div", class_="c-card-event--result__location")
+        location = location_tag.get_text().strip().replace('\n', ' ') if location_tag else "TBD"
+
+        events.append({
+            "name": event_name,
+            "date": ev_time.strftime("%B %d, %Y"),
+            "starts_at": ev_time.isoformat(),
+            "location": location,
+            "url": f"{base_url}{a_tag['href']}",
+        })
+
+    events.sort(key=lambda e: e["starts_at"])
+    return events
+
+
+class FightCardParser:
+    """
+    Parses the bouts of event pages into pairs of fighter names.
+
+    The fighter name selectors are compiled once, and the one which matched the last page is
+    tried first on the next, since every event page of the site shares the same layout. Pages
+    are parsed down to the elements the selectors can match, and only parsed in full when no
+    selector matches and the text of the page has to be searched for "vs" instead.
+    """
+
+    def __init__(self, selectors: list[str] = FIGHTER_NAME_SELECTORS, parser: str = DEFAULT_PARSER):
+        self.selectors = [(selector, soupsieve.compile(selector)) for selector in selectors]
+        self.parser = parser
+        # Index of the selector which matched the last page
+        self.matched: int | None = None
+
+    def _candidates(self):
+        if self.matched is None:
+            return list(enumerate(self.selectors))
+        return [(self.matched, self.selectors[self.matched])] + [
+            (i, s) for i, s in enumerate(self.selectors) if i != self.matched]
+
+    def parse(self, html: bytes | str) -> list[dict]:
+        soup = BeautifulSoup(html, self.parser, parse_only=FIGHT_CARD_STRAINER)
+
+        for i, (selector, compiled) in self._candidates():
+            fighter_elements = compiled.select(soup)
+            if not fighter_elements:
+                continue
+
+            if self.matched != i:
+                logger.debug(f"Fighter names found with selector: {selector}")
+                self.matched = i
+
+            # pair up fighter 1 and 2
+            return [{
+                "fighter1": _clean_name(fighter_elements[i].get_text()),
+                "fighter2": _clean_name(fighter_elements[i + 1].get_text()),
+            } for i in range(0, len(fighter_elements) - 1, 2)]
+
+        logger.debug("No fighter name selector matched, searching the page for bouts")
+        soup = BeautifulSoup(html, self.parser)
+
+        # find vs if needed
+        fights = []
+        for vs_text in soup.find_all(string=lambda text: text and ' vs ' in text):
+            parts = vs_text.split(' vs ')
+            if len(parts) == 2:
+                fights.append({
+                    "fighter1": _clean_name(parts[0]),
+                    "fighter2": _clean_name(parts[1]),
+                })
+        return fights
+
+
+_fight_card_parser = FightCardParser()
+
+
+def parse_fight_card(html: bytes | str) -> list[dict]:
+    """
+    Parse the bouts of an event page into pairs of fighter names.
+    """
+    return _fight_card_parser.parse(html)
@@ -0,0 +1,62 @@
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from events.models import UpcomingBout, UpcomingEvent
+import logging
+
+logger = logging.getLogger(__name__)
+
+UPCOMING_EVENT_FIELDS = ["name", "starts_at", "location", "scraped_at"]
+
+
+def _starts_at(event: dict) -> datetime:
+    starts_at = datetime.fromisoformat(event["starts_at"])
+    # Scraped start times are in the local time of the machine which parsed them
+    return starts_at if timezone.is_aware(starts_at) else starts_at.astimezone()
+
+
+def save_upcoming_events(events: list[dict], scraped_at: datetime | None = None) -> int:
+    """
+    Replace the stored upcoming events and their fight cards with freshly scraped `events`,
+    in one transaction so readers never see a partially saved scrape.
+
+    Events are upserted by url, their bouts replaced, and events no longer listed removed.
+    An event whose fight card failed to load has `fights` set to None and keeps its stored
+    bouts, and a scrape which found no events at all leaves every stored event in place, since
+    that far more likely means the listing failed to load than that no events are scheduled.
+    Returns the number of bouts saved.
+    """
+    scraped_at = scraped_at or timezone.now()
+
+    with transaction.atomic():
+        UpcomingEvent.objects.bulk_create(
+            [UpcomingEvent(name=e["name"], starts_at=_starts_at(e), location=e["location"],
+                           url=e["url"], scraped_at=scraped_at) for e in events],
+            update_conflicts=True,
+            unique_fields=["url"],
+            update_fields=UPCOMING_EVENT_FIELDS,
+        )
+
+        urls = [e["url"] for e in events]
+        if events:
+            removed, _ = UpcomingEvent.objects.exclude(url__in=urls).delete()
+            if removed:
+                logger.info(f"Removed {removed} event(s) and bouts no longer listed")
+        else:
+            logger.warning("Keeping the stored upcoming events, the scrape found none")
+
+        scraped = [e for e in events if e.get("fights") is not None]
+        if len(scraped) < len(events):
+            logger.warning(f"Keeping the stored bouts of {len(events) - len(scraped)} event(s) whose fight card failed to load")
+
+        # Not every database returns the ids of upserted rows
+        ids = dict(UpcomingEvent.objects.filter(url__in=[e["url"] for e in scraped]).values_list("url", "id"))
+        UpcomingBout.objects.filter(event_id__in=ids.values()).delete()
+        bouts = UpcomingBout.objects.bulk_create([
+            UpcomingBout(event_id=ids[e["url"]], order=order,
+                         fighter1=fight["fighter1"], fighter2=fight["fighter2"])
+            for e in scraped
+            for order, fight in enumerate(e["fights"])
+        ])
+
+    return len(bouts)
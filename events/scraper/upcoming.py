@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from events.http import build_session
+from events.scraper.parse import UFC_BASE_URL, parse_event_listing, parse_fight_card
+import logging
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+# Minimum spacing between two requests to the same host, in seconds
+DEFAULT_MIN_INTERVAL = 0.5
+
+
+class UpcomingEventScraper:
+    """
+    Scrapes every upcoming event from the events listing, fetching the fight cards of all of
+    them concurrently over one pooled, rate limited session.
+    """
+
+    def __init__(self, base_url: str = UFC_BASE_URL, session: requests.Session | None = None,
+                 max_workers: int = DEFAULT_MAX_WORKERS):
+        self.base_url = base_url.rstrip('/')
+        self.session = session or build_session(max_workers, min_interval=DEFAULT_MIN_INTERVAL)
+        self.max_workers = max_workers
+
+    def fetch(self, url: str) -> bytes:
+        response = self.session.get(url)
+        response.raise_for_status()
+        return response.content
+
+    def scrape_fight_card(self, event: dict) -> dict:
+        """
+        Add the fight card to a scraped event. A card which fails to load is set to None, so
+        one bad event page does not lose the others and its previously saved bouts are kept.
+        """
+        try:
+            html = self.fetch(event["url"])
+        except requests.RequestException as err:
+            logger.error(f"Error scraping fight card of {event['name']}: {err}")
+            event["fights"] = None
+            return event
+
+        try:
+            event["fights"] = parse_fight_card(html)
+            logger.info(f"Found {len(event['fights'])} fights for {event['name']}")
+        except Exception as err:
+            # An unexpected page layout can fail anywhere in parsing
+            logger.error(f"Error parsing fight card of {event['name']}: {err!r}")
+            event["fights"] = None
+        return event
+
+    def scrape(self, now: datetime | None = None) -> list[dict]:
+        """
+        Scrape all events starting after `now`, soonest first, along with their fight cards.
+        """
+        listing = self.fetch(f"{self.base_url}/events")
+        events = parse_event_listing(listing, now or datetime.now(), self.base_url)
+        logger.info(f"Found {len(events)} upcoming event(s)")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(self.scrape_fight_card, events))
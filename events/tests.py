@@ -1,3 +1,962 @@
-from django.test import TestCase
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from datetime import datetime, timedelta
+from django.test import SimpleTestCase, TestCase, override_settings
+from events.benchmarks.concurrency import BENCHMARK_URLCONF, run_concurrency_benchmarks
+from events.benchmarks.parsing import FIXTURES_DIR
+from events.benchmarks.query_plans import capture_query_plans
+from events.benchmarks.synthetic import generate_raw_data
+from events.cache import bump_data_generation, clear_process_caches, data_generation
+from events.http import CacheMiss, HostRateLimiter, ResponseCache, build_session
+from events.loader.cleanup import clean_frame
+from events.loader.dag import Stage, StageError, StageRunner
+from events.loader.download import RawDataDownloader
+from events.loader.fight_stats import iter_fight_stats_by_event, read_fight_stats
+from events.loader.instrumentation import record_rows, run_instrumented
+from events.loader.pipeline import DataPipeline
+from events.loader.records import RecordBuilder
+from events.loader.resolve import EntityResolver
+from events.loader.session import BulkLoadSession
+from events.management.commands.load_database import Command as LoadDatabaseCommand
+from events.models import Event, UpcomingBout, UpcomingEvent
+from events.scraper.parse import FightCardParser, parse_event_listing
+from events.scraper.store import save_upcoming_events
+from events.scraper.upcoming import UpcomingEventScraper
+from events.views import HOME_PAGE_CACHE_KEY
+from fighters.models import Fighter, FighterCareerStats
+from fighters.search import fighter_trigrams, search_fighters
+from fighters.stats import compute_career_stats, refresh_career_stats
+from fights.models import Fight, FightStat
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import hashlib
+import json
+import operator
+import tempfile
+import numpy as np
+import pandas as pd
+import threading
+import time
+import unittest
 
-# Create your tests here.
+
+class _RawDataHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the raw data host which serves `files` with ETag support.
+    """
+
+    files: dict[str, bytes] = {}
+    requests: list[str] = []
+
+    def do_GET(self):
+        body = self.files.get(self.path.lstrip('/'))
+        self.requests.append(self.path)
+
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RawDataDownloaderTests(SimpleTestCase):
+    def setUp(self):
+        _RawDataHandler.files = {'a.csv': b'A,B\n1,2\n', 'b.csv': b'C\n3\n'}
+        _RawDataHandler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RawDataHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dest = Path(tmp.name)
+        self.base_url = 'http://127.0.0.1:%d/' % self.server.server_address[1]
+
+    def download(self):
+        session = build_session(cache=ResponseCache(self.dest / 'cache'))
+        return RawDataDownloader(self.dest, base_url=self.base_url, session=session).download_all(['a.csv', 'b.csv'])
+
+    def test_downloads_and_hashes_files(self):
+        results = self.download()
+
+        self.assertTrue(all(r.changed and r.fetched for r in results.values()))
+        self.assertEqual((self.dest / 'a.csv').read_bytes(), b'A,B\n1,2\n')
+        self.assertEqual(results['b.csv'].sha256, hashlib.sha256(b'C\n3\n').hexdigest())
+        # Shared with the cached body rather than stored twice
+        self.assertEqual((self.dest / 'a.csv').stat().st_nlink, 2)
+
+    def test_unchanged_files_are_not_refetched(self):
+        self.download()
+        _RawDataHandler.files['b.csv'] = b'C\n4\n'
+
+        results = self.download()
+
+        self.assertFalse(results['a.csv'].fetched)
+        self.assertFalse(results['a.csv'].changed)
+        self.assertTrue(results['b.csv'].changed)
+        self.assertEqual((self.dest / 'b.csv').read_bytes(), b'C\n4\n')
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        _RawDataHandler.files = {'a.csv': b'A,B\n1,2\n'}
+        _RawDataHandler.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _RawDataHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = Path(tmp.name)
+        self.url = 'http://127.0.0.1:%d/a.csv' % self.server.server_address[1]
+
+    def get(self, **cache_options):
+        return build_session(cache=ResponseCache(self.cache_dir, **cache_options)).get(self.url)
+
+    def test_fresh_responses_are_served_from_cache(self):
+        self.assertFalse(self.get(ttl=60).from_cache)
+
+        response = self.get(ttl=60)
+
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.content, b'A,B\n1,2\n')
+        self.assertEqual(len(_RawDataHandler.requests), 1)
+
+    def test_stale_responses_are_revalidated(self):
+        self.get()
+        response = self.get()
+
+        self.assertTrue(response.from_cache)
+        self.assertEqual(response.text, 'A,B\n1,2\n')
+        self.assertEqual(len(_RawDataHandler.requests), 2)
+
+        _RawDataHandler.files['a.csv'] = b'A,B\n3,4\n'
+        response = self.get()
+
+        self.assertFalse(response.from_cache)
+        self.assertEqual(response.content, b'A,B\n3,4\n')
+
+    def test_replays_recorded_responses_offline(self):
+        self.get(ttl=60, mode='record')
+        self.server.shutdown()
+
+        response = self.get(mode='replay')
+        self.assertEqual(response.content, b'A,B\n1,2\n')
+        # The cached body is read up front rather than left open
+        self.assertIsNone(response.raw)
+        with self.assertRaises(CacheMiss):
+            build_session(cache=ResponseCache(self.cache_dir, mode='replay')).get(self.url + '?v=2')
+
+
+class CleanFrameTests(SimpleTestCase):
+    def test_cleans_only_string_values(self):
+        df = pd.DataFrame({
+            'BOUT': ['  Khabib   vs Conor ', 'A vs. B', np.nan],
+            'ROUND': [1, 2, 3],
+            'MIXED': ['  x ', 5, np.nan],
+        })
+
+        cleaned = clean_frame(df)
+
+        self.assertEqual(list(cleaned.columns), ['bout', 'round', 'mixed'])
+        self.assertEqual(cleaned['bout'].tolist()[:2], ['Khabib vs. Conor', 'A vs. B'])
+        self.assertTrue(pd.isna(cleaned['bout'].iloc[2]))
+        self.assertEqual(cleaned['round'].tolist(), [1, 2, 3])
+        self.assertEqual(cleaned['mixed'].tolist()[:2], ['x', 5])
+
+
+class DataPipelineTests(SimpleTestCase):
+    def test_resumes_from_checkpoint(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        df = pd.DataFrame({'name': ['UFC 1'], 'round': pd.array([3], dtype='int8')})
+
+        DataPipeline(Path(tmp.name)).put('events', df)
+        resumed = DataPipeline(Path(tmp.name))
+
+        self.assertTrue(resumed.has_checkpoint('events'))
+        pd.testing.assert_frame_equal(resumed.get('events'), df)
+
+    def test_missing_dataset_raises(self):
+        with self.assertRaises(KeyError):
+            DataPipeline().get('fights')
+
+
+RAW_FIGHT_STATS_HEADER = 'EVENT,BOUT,ROUND,FIGHTER,KD,SIG.STR.,SIG.STR. %,TOTAL STR.,TD,TD %,SUB.ATT,REV.,CTRL,HEAD,BODY,LEG,DISTANCE,CLINCH,GROUND\n'
+
+
+def _raw_fight_stats_row(event: str, fighter: str, round: int):
+    return f'{event},A vs B,Round {round},{fighter},1,10 of 20,50%,15 of 30,1 of 2,50%,0,0,1:05,5 of 10,3 of 5,2 of 5,6 of 12,2 of 4,--\n'
+
+
+class FightStatsIngestTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / 'ufc_fight_stats.csv'
+
+        rows = [_raw_fight_stats_row(event, fighter, round)
+                for event in ['UFC 2', 'UFC 1']
+                for fighter in ['A', 'B']
+                for round in (1, 2, 3)]
+        self.path.write_text(RAW_FIGHT_STATS_HEADER + ''.join(rows))
+
+    def test_transforms_into_compact_columns(self):
+        df = read_fight_stats(self.path)
+
+        self.assertEqual(df['bout'].dtype, 'category')
+        self.assertEqual(df['sigstrikeshit'].dtype, 'int16')
+        row = df.iloc[0]
+        self.assertEqual((row['bout'], row['round'], row['controltime']), ('A vs. B', 1, 65))
+        self.assertEqual((row['groundhit'], row['groundattempted']), (0, 0))
+
+    def test_streams_each_event_once_across_chunks(self):
+        batches = list(iter_fight_stats_by_event(self.path, chunksize=4))
+
+        self.assertEqual([(event, len(df)) for event, df in batches], [('UFC 2', 6), ('UFC 1', 6)])
+
+
+class RecordBuilderTests(TestCase):
+    def test_builds_and_saves_in_batches(self):
+        df = pd.DataFrame({
+            'name': ['UFC 1', 'UFC 2', 'UFC 3'],
+            'date': ['November 12, 1993', 'March 11, 1994', 'September 09, 1994'],
+            'location': ['Denver, Colorado, USA', np.nan, 'Charlotte, North Carolina, USA'],
+            'url': ['e1', 'e2', 'e3'],
+        })
+        builder = RecordBuilder(Event, {
+            'name': 'name',
+            'date': ('date', lambda d: d.replace(', ', ' ')[-4:] + '-01-01'),
+            'location': 'location',
+            'url': 'url',
+        }, batch_size=2)
+
+        records = list(builder.iter_records(df))
+        self.assertIsNone(records[1].location)
+
+        records[1].location = 'Denver, Colorado, USA'
+        self.assertEqual(builder.save(records), 3)
+        self.assertEqual(Event.objects.count(), 3)
+        self.assertEqual(str(Event.objects.get(url='e3').date), '1994-01-01')
+        self.assertEqual(builder.created, 3)
+
+    def test_upserts_on_unique_fields(self):
+        Event.objects.create(name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+        df = pd.DataFrame({
+            'name': ['UFC 1: The Beginning', 'UFC 2'],
+            'date': ['1993-11-12', '1994-03-11'],
+            'location': ['Denver, Colorado, USA', 'Denver, Colorado, USA'],
+            'url': ['e1', 'e2'],
+        })
+        builder = RecordBuilder(Event, {c: c for c in df.columns}, unique_fields=['url'])
+
+        builder.bulk_create(df)
+        builder.bulk_create(df)
+
+        self.assertEqual(Event.objects.count(), 2)
+        self.assertEqual(Event.objects.get(url='e1').name, 'UFC 1: The Beginning')
+
+
+class EntityResolverTests(TestCase):
+    def setUp(self):
+        self.event = Event.objects.create(
+            name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+        self.fight = Fight.objects.create(
+            event=self.event, bout='Royce Gracie vs. Gerard Gordeau', outcome='W/L',
+            weight_class='Open Weight Bout', method='Submission', round=1, time='1:44',
+            time_format='No Time Limit', url='f1')
+        self.royce = Fighter.objects.create(first_name='Royce', last_name='Gracie', url='r1')
+        for url in ('j1', 'j2'):
+            Fighter.objects.create(first_name='Joe', last_name='Smith', url=url)
+
+    def test_resolves_with_one_query_per_index(self):
+        resolver = EntityResolver()
+
+        with self.assertNumQueries(3):
+            self.assertEqual(resolver.event_id('UFC 1'), self.event.id)
+            self.assertEqual(resolver.fight_id(self.event.id, 'royce gracie  vs. Gerard Gordeau'),
+                             self.fight.id)
+            self.assertEqual(resolver.fighter_id('ROYCE GRACIE'), self.royce.id)
+            self.assertIsNone(resolver.fighter_id('Joe Smith'))
+            self.assertIsNone(resolver.fighter_id('Ken Shamrock'))
+            self.assertIsNone(resolver.event_id('UFC 2'))
+
+    def test_invalidate_rebuilds_index(self):
+        resolver = EntityResolver()
+        self.assertIsNone(resolver.fighter_id('Ken Shamrock'))
+
+        ken = Fighter.objects.create(first_name='Ken', last_name='Shamrock', url='k1')
+        resolver.invalidate(Fighter)
+
+        self.assertEqual(resolver.fighter_id('Ken Shamrock'), ken.id)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'COPY is only available on PostgreSQL')
+class CopyRecordBuilderTests(TestCase):
+    def test_copies_rows_into_table(self):
+        event = Event.objects.create(name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+        df = pd.DataFrame({
+            'bout': ['A vs. B', 'C vs. D'],
+            'round': [1, 3],
+            'referee': ['John McCarthy', np.nan],
+            'url': ['f1', 'f2'],
+        })
+        builder = RecordBuilder(Fight, {
+            'bout': 'bout', 'round': 'round', 'referee': 'referee', 'url': 'url',
+        }, use_copy=True)
+
+        df_extra = {'event_id': event.id, 'outcome': 'W/L', 'weight_class': 'Open',
+                    'method': 'KO/TKO', 'time': '1:00', 'time_format': 'No Time Limit'}
+        self.assertEqual(builder.bulk_create(df, **df_extra), 2)
+
+        self.assertEqual(event.fights.count(), 2)
+        self.assertIsNone(Fight.objects.get(url='f2').referee)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'pg_trgm is only available on PostgreSQL')
+class TrigramSearchPaginationTests(TestCase):
+    def test_pages_through_ties_once(self):
+        # Every name scores the same, so each page ends on a tie with the next
+        Fighter.objects.bulk_create(
+            Fighter(first_name="Jon", last_name=f"Doe{i}", search_name=f"jon doe{i}",
+                    url=f"http://ufcstats.com/fighter-details/{i}")
+            for i in range(10))
+
+        seen, cursor = [], None
+        while True:
+            page = search_fighters("jon doe", limit=3, cursor=cursor)
+            seen += page.ids
+            if not (cursor := page.next_cursor):
+                break
+
+        self.assertEqual(sorted(seen), sorted(Fighter.objects.values_list("id", flat=True)))
+
+
+class BulkLoadSessionTests(TestCase):
+    def _indexes(self):
+        with connection.cursor() as cursor:
+            return {i for i, info in connection.introspection.get_constraints(
+                cursor, Fight._meta.db_table).items() if info['index'] and not info['unique']}
+
+    def test_rebuilds_deferred_indexes(self):
+        indexes = self._indexes()
+        self.assertTrue(indexes)
+
+        with BulkLoadSession(deferred_models=[Fight]):
+            self.assertEqual(self._indexes(), set())
+            Event.objects.create(name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+
+        self.assertEqual(self._indexes(), indexes)
+        self.assertTrue(Event.objects.exists())
+
+    def test_rolls_back_on_error(self):
+        indexes = self._indexes()
+
+        with self.assertRaises(ValueError):
+            with BulkLoadSession(deferred_models=[Fight]):
+                Event.objects.create(name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+                raise ValueError()
+
+        self.assertEqual(self._indexes(), indexes)
+        self.assertFalse(Event.objects.exists())
+
+
+class StageRunnerTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.state_path = Path(tmp.name) / 'stages.json'
+        self.calls = []
+
+    def _stage(self, name, *depends_on, fail=False):
+        def run():
+            if fail:
+                raise RuntimeError(name)
+            self.calls.append(name)
+        return Stage(name, run, depends_on=depends_on)
+
+    def test_runs_in_dependency_order_with_pooled_stages(self):
+        results = {}
+        stages = [
+            self._stage('load', 'add', 'mul'),
+            Stage('add', operator.add, args=(1, 2), depends_on=('download',), in_process_pool=True,
+                  collect=lambda r: results.setdefault('add', r) and {}),
+            Stage('mul', operator.mul, args=(3, 4), depends_on=('download',), in_process_pool=True,
+                  collect=lambda r: results.setdefault('mul', r) and {}),
+            self._stage('download'),
+        ]
+
+        StageRunner(stages, max_workers=2).run()
+
+        self.assertEqual(self.calls, ['download', 'load'])
+        self.assertEqual(results, {'add': 3, 'mul': 12})
+
+    def test_resume_skips_completed_stages(self):
+        with self.assertRaises(StageError):
+            StageRunner([self._stage('a'), self._stage('b', 'a', fail=True)], self.state_path).run()
+
+        restored = []
+        a = self._stage('a')
+        a.restore = restored.append
+        StageRunner([a, self._stage('b', 'a')], self.state_path).run(resume=True)
+
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertEqual(restored, [{}])
+
+    def test_unknown_dependency_raises(self):
+        with self.assertRaises(ValueError):
+            StageRunner([self._stage('a', 'missing')])
+
+
+class InstrumentationTests(TestCase):
+    def test_measures_stage(self):
+        def stage():
+            record_rows(rows_in=3)
+            Event.objects.create(name='UFC 1', date='1993-11-12', location='Denver', url='e1')
+            list(Event.objects.all())
+            record_rows(rows_out=2)
+            return 'done'
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        result, metrics = run_instrumented('load_events', stage, profile_dir=Path(tmp.name))
+
+        self.assertEqual(result, 'done')
+        self.assertEqual((metrics.rows_in, metrics.rows_out, metrics.db_queries), (3, 2, 2))
+        self.assertGreater(metrics.wall_time, 0)
+        self.assertIsNotNone(metrics.as_record()['rows_per_sec'])
+        self.assertTrue((Path(tmp.name) / 'load_events.prof').exists())
+
+    def test_record_rows_outside_stage_is_ignored(self):
+        record_rows(rows_in=1)
+
+
+def assert_career_stats_current(test: TestCase):
+    """
+    Check the stored career stats match career stats summed afresh from the fight stats.
+    """
+    expected = {s.fighter_id: s for s in compute_career_stats()}
+    stored = {s.fighter_id: s for s in FighterCareerStats.objects.all()}
+    test.assertEqual(set(stored), set(expected))
+    for fighter_id, stats in expected.items():
+        test.assertEqual(
+            {f.attname: getattr(stored[fighter_id], f.attname) for f in FighterCareerStats._meta.concrete_fields},
+            {f.attname: getattr(stats, f.attname) for f in FighterCareerStats._meta.concrete_fields})
+
+
+class SyntheticDataTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.raw_dir = Path(tmp.name)
+
+    def test_generates_raw_files(self):
+        counts = generate_raw_data(self.raw_dir, scale=0.01)
+
+        self.assertEqual(counts['ufc_event_details.csv'], 7)
+        self.assertEqual(counts['ufc_fighter_details.csv'], 44)
+        self.assertEqual(counts, generate_raw_data(self.raw_dir / 'again', scale=0.01))
+        self.assertEqual(len(pd.read_csv(self.raw_dir / 'ufc_fight_stats.csv')),
+                         counts['ufc_fight_stats.csv'])
+
+    def test_loads_offline(self):
+        counts = generate_raw_data(self.raw_dir, scale=0.01)
+
+        for _ in range(2):
+            call_command('load_database', raw_dir=self.raw_dir, workers=1,
+                         data_dir=self.raw_dir / 'data', watermark=self.raw_dir / 'watermark.json')
+
+        self.assertEqual(Event.objects.count(), counts['ufc_event_details.csv'])
+        self.assertEqual(Fighter.objects.count(), counts['ufc_fighter_details.csv'])
+        self.assertEqual(Fight.objects.count(), counts['ufc_fight_details.csv'])
+        self.assertEqual(FightStat.objects.count(), counts['ufc_fight_stats.csv'])
+        self.assertFalse(FightStat.objects.filter(round__isnull=True).exists())
+        self.assertEqual(FighterCareerStats.objects.count(),
+                         FightStat.objects.values('fighter').distinct().count())
+        assert_career_stats_current(self)
+
+
+    def test_process_only_checkpoints(self):
+        generate_raw_data(self.raw_dir, scale=0.01)
+
+        call_command('load_database', raw_dir=self.raw_dir, workers=1, process_only=True,
+                     data_dir=self.raw_dir / 'data')
+
+        self.assertFalse(Event.objects.exists())
+        self.assertTrue(DataPipeline(self.raw_dir / 'data' / 'out').has_checkpoint('events'))
+
+
+class IncrementalLoadTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.full_dir = Path(tmp.name) / 'full'
+        self.raw_dir = Path(tmp.name) / 'raw'
+        self.watermark = Path(tmp.name) / 'watermark.json'
+        self.data_dir = Path(tmp.name) / 'data'
+        self.counts = generate_raw_data(self.full_dir, scale=0.01)
+
+        # Hold back the latest event, as if it had not happened yet
+        self.raw_dir.mkdir()
+        latest_event = pd.read_csv(self.full_dir / 'ufc_event_details.csv')['EVENT'][0]
+        for f in self.full_dir.iterdir():
+            df = pd.read_csv(f)
+            if 'EVENT' in df.columns:
+                df = df[df['EVENT'] != latest_event]
+            df.to_csv(self.raw_dir / f.name, index=False)
+
+    def load(self):
+        call_command('load_database', raw_dir=self.raw_dir, workers=1, incremental=True,
+                     data_dir=self.data_dir, watermark=self.watermark)
+
+    def test_loads_only_new_event(self):
+        self.load()
+        self.assertEqual(Event.objects.count(), self.counts['ufc_event_details.csv'] - 1)
+        first_event_ids = set(Event.objects.values_list('id', flat=True))
+
+        for f in self.full_dir.iterdir():
+            (self.raw_dir / f.name).write_bytes(f.read_bytes())
+        self.load()
+
+        self.assertEqual(Event.objects.count(), self.counts['ufc_event_details.csv'])
+        self.assertEqual(Fight.objects.count(), self.counts['ufc_fight_details.csv'])
+        self.assertEqual(FightStat.objects.count(), self.counts['ufc_fight_stats.csv'])
+        self.assertTrue(first_event_ids < set(Event.objects.values_list('id', flat=True)))
+        assert_career_stats_current(self)
+
+        with open(self.watermark) as f:
+            watermark = json.load(f)
+        self.assertEqual(watermark['last_event_url'], Event.objects.order_by('-date').first().url)
+
+    def test_reload_without_changes_is_skipped(self):
+        self.load()
+        stat_ids = set(FightStat.objects.values_list('id', flat=True))
+
+        self.load()
+
+        self.assertEqual(set(FightStat.objects.values_list('id', flat=True)), stat_ids)
+
+    def test_retries_stats_of_unresolved_fighters(self):
+        path = self.raw_dir / 'ufc_fighter_details.csv'
+        fighters = pd.read_csv(path)
+        stats = pd.read_csv(self.raw_dir / 'ufc_fight_stats.csv')
+        missing = stats['FIGHTER'][0]
+        fighters[fighters['FIRST'] + ' ' + fighters['LAST'] != missing].to_csv(path, index=False)
+        self.load()
+        self.assertFalse(FightStat.objects.filter(fighter__search_name=missing.lower()).exists())
+
+        fighters.to_csv(path, index=False)
+        self.load()
+
+        self.assertEqual(FightStat.objects.count(), len(stats))
+        assert_career_stats_current(self)
+
+    def test_failed_career_stats_refresh_is_retried(self):
+        class FailingCommand(LoadDatabaseCommand):
+            def load_career_stats(self):
+                raise RuntimeError("refresh failed")
+
+        for resume in [False, True]:
+            self.load()
+            path = self.raw_dir / 'ufc_fight_stats.csv'
+            df = pd.read_csv(path)
+            df.loc[0, 'KD'] = 9 + resume
+            df.to_csv(path, index=False)
+
+            call_command(FailingCommand(), raw_dir=self.raw_dir, workers=1, incremental=True,
+                         checkpoint=True, data_dir=self.data_dir, watermark=self.watermark)
+            call_command('load_database', raw_dir=self.raw_dir, workers=1, incremental=True,
+                         resume=resume, data_dir=self.data_dir, watermark=self.watermark)
+
+            self.assertEqual(FightStat.objects.filter(knockdowns=9 + resume).count(), 1)
+            assert_career_stats_current(self)
+
+    def test_defers_indexes_only_for_full_loads(self):
+        command = LoadDatabaseCommand()
+        command.incremental = True
+
+        for clear_tables, deferred in [(False, []), (True, [Fight])]:
+            stages = {s.name: s for s in command.build_stages(clear_tables=clear_tables)}
+            self.assertEqual(stages['load_fights'].func.args[1], deferred)
+
+    def test_clearing_tables_reloads_everything(self):
+        self.load()
+        counts = (Event.objects.count(), Fight.objects.count(), FightStat.objects.count())
+
+        call_command('load_database', raw_dir=self.raw_dir, workers=1, incremental=True,
+                     clear_tables=True, data_dir=self.data_dir, watermark=self.watermark)
+
+        self.assertEqual((Event.objects.count(), Fight.objects.count(), FightStat.objects.count()), counts)
+        assert_career_stats_current(self)
+        self.assertTrue(self.watermark.exists())
+
+    def test_changed_event_stats_are_replaced(self):
+        self.load()
+        path = self.raw_dir / 'ufc_fight_stats.csv'
+        df = pd.read_csv(path)
+        df.loc[0, 'KD'] = 9
+        df.to_csv(path, index=False)
+
+        self.load()
+
+        self.assertEqual(FightStat.objects.count(), len(df))
+        self.assertEqual(FightStat.objects.filter(knockdowns=9).count(), 1)
+        assert_career_stats_current(self)
+
+
+class _EventPagesHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the events site which serves `pages`, failing the first `failures[path]`
+    requests to a page with a 503.
+    """
+
+    pages: dict[str, bytes] = {}
+    failures: dict[str, int] = {}
+
+    def do_GET(self):
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = self.pages.get(self.path)
+        self.send_response(200 if body is not None else 404)
+        self.end_headers()
+        self.wfile.write(body or b'')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _event_card(href: str, name: str, timestamp: int):
+    return f"""
+        <article class="c-card-event--result">
+          <h3 class="c-card-event--result__headline"><a href="{href}">{name}</a></h3>
+          <div class="c-card-event--result__date" data-main-card-timestamp="{timestamp}"></div>
+          <div class="c-card-event--result__location">UFC Apex
+            Las Vegas</div>
+        </article>"""
+
+
+def _fight_card(*fighters: str):
+    return "".join(f'<h3 class="c-listing-fight__corner-name">{f.replace(" ", chr(10))}</h3>'
+                   for f in fighters).encode()
+
+
+class UpcomingEventScraperTests(TestCase):
+    def setUp(self):
+        now = int(time.time())
+        _EventPagesHandler.pages = {
+            '/events': ("<html><body>" + "".join([
+                _event_card('/event/ufc-2', 'UFC 2', now + 14 * 86400),
+                _event_card('/event/ufc-1', 'UFC 1', now + 7 * 86400),
+                _event_card('/event/ufc-0', 'UFC 0', now - 7 * 86400),
+            ]) + "</body></html>").encode(),
+            '/event/ufc-1': _fight_card('Jon Jones', 'Stipe Miocic', 'Alex Pereira', 'Jamahal Hill'),
+            '/event/ufc-2': _fight_card('Islam Makhachev', 'Dustin Poirier'),
+        }
+        _EventPagesHandler.failures = {'/event/ufc-2': 1}
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _EventPagesHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = 'http://127.0.0.1:%d' % self.server.server_address[1]
+
+    def test_scrapes_every_upcoming_event(self):
+        scraper = UpcomingEventScraper(self.base_url, build_session(backoff_factor=0))
+
+        events = scraper.scrape()
+
+        self.assertEqual([e['name'] for e in events], ['UFC 1', 'UFC 2'])
+        self.assertTrue(events[0]['location'].startswith('UFC Apex'))
+        self.assertEqual(events[0]['fights'], [
+            {'fighter1': 'Jon Jones', 'fighter2': 'Stipe Miocic'},
+            {'fighter1': 'Alex Pereira', 'fighter2': 'Jamahal Hill'},
+        ])
+        # The first request for this card failed and was retried
+        self.assertEqual(len(events[1]['fights']), 1)
+
+    def test_skips_card_which_fails_to_parse(self):
+        class Scraper(UpcomingEventScraper):
+            def fetch(self, url: str):
+                # Not a page, so parsing it fails
+                return object() if url.endswith('/event/ufc-1') else super().fetch(url)
+
+        events = Scraper(self.base_url, build_session(backoff_factor=0)).scrape()
+
+        self.assertEqual([(e['name'], e['fights']) for e in events],
+                         [('UFC 1', None), ('UFC 2', [{'fighter1': 'Islam Makhachev', 'fighter2': 'Dustin Poirier'}])])
+
+    def test_command_writes_all_events(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        output = Path(tmp.name) / 'upcoming_events.json'
+
+        call_command('scrape_events', base_url=self.base_url, output=output, min_interval=0,
+                     http_cache=Path(tmp.name) / 'cache')
+
+        with open(output) as f:
+            self.assertEqual(len(json.load(f)['events']), 2)
+        self.assertEqual(UpcomingEvent.objects.order_by('starts_at').first().bouts.count(), 2)
+
+    def test_rate_limiter_spaces_requests_per_host(self):
+        limiter = HostRateLimiter(0.05)
+        start = time.monotonic()
+
+        for _ in range(3):
+            limiter.wait('a.com')
+        limiter.wait('b.com')
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertLess(time.monotonic() - start, 0.15)
+
+
+class UpcomingEventStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def event(self, name: str, days: int, fights: list[tuple[str, str]]):
+        starts_at = datetime.now() + timedelta(days=days)
+        return {"name": name, "date": starts_at.strftime("%B %d, %Y"),
+                "starts_at": starts_at.isoformat(), "location": "UFC Apex",
+                "url": f"https://www.ufc.com/event/{name.lower().replace(' ', '-')}",
+                "fights": [{"fighter1": a, "fighter2": b} for a, b in fights]}
+
+    def test_replaces_previous_scrape(self):
+        save_upcoming_events([
+            self.event("UFC 1", 7, [("Jon Jones", "Stipe Miocic"), ("Alex Pereira", "Jamahal Hill")]),
+            self.event("UFC 2", 14, [("Islam Makhachev", "Dustin Poirier")]),
+        ])
+
+        save_upcoming_events([
+            self.event("UFC 2", 14, [("Islam Makhachev", "Arman Tsarukyan")]),
+            self.event("UFC 3", 21, []),
+        ])
+
+        self.assertEqual(list(UpcomingEvent.objects.order_by("starts_at").values_list("name", flat=True)),
+                         ["UFC 2", "UFC 3"])
+        self.assertEqual([str(b) for b in UpcomingBout.objects.all()],
+                         ["Islam Makhachev vs. Arman Tsarukyan"])
+
+    def test_keeps_previous_scrape_of_failed_pages(self):
+        save_upcoming_events([
+            self.event("UFC 1", 7, [("Jon Jones", "Stipe Miocic")]),
+            self.event("UFC 2", 14, [("Islam Makhachev", "Dustin Poirier")]),
+        ])
+
+        failed = self.event("UFC 1", 7, [])
+        failed["fights"] = None
+        save_upcoming_events([failed, self.event("UFC 2", 14, [("Islam Makhachev", "Arman Tsarukyan")])])
+        save_upcoming_events([])
+
+        self.assertEqual(UpcomingEvent.objects.count(), 2)
+        self.assertEqual([str(b) for b in UpcomingBout.objects.all()],
+                         ["Jon Jones vs. Stipe Miocic", "Islam Makhachev vs. Arman Tsarukyan"])
+
+    def test_home_page_shows_next_event(self):
+        save_upcoming_events([
+            self.event("UFC 2", 14, [("Islam Makhachev", "Dustin Poirier")]),
+            self.event("UFC 1", 7, [("Jon Jones", "Stipe Miocic"), ("Alex Pereira", "Jamahal Hill")]),
+        ])
+
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            response = self.client.get("/events/")
+
+        self.assertEqual(response.context["event_name"], "UFC 1")
+        self.assertEqual([b.fighter1 for b in response.context["fights"]], ["Jon Jones", "Alex Pereira"])
+        self.assertContains(response, "Stipe Miocic")
+
+
+class HomePageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Event.objects.create(name="UFC 300", date="2024-04-13", location="Las Vegas",
+                             url="http://ufcstats.com/event-details/300")
+
+    def get(self):
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            return self.client.get("/events/")
+
+    def test_serves_cached_page_until_data_changes(self):
+        self.get()
+        Event.objects.create(name="UFC 301", date="2024-05-04", location="Rio de Janeiro",
+                             url="http://ufcstats.com/event-details/301")
+
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertNotContains(response, "UFC 301")
+
+        bump_data_generation()
+
+        self.assertContains(self.get(), "UFC 301")
+
+    def test_bumps_generation_only_forwards(self):
+        self.assertEqual(data_generation(), 0)
+        self.assertEqual(bump_data_generation(), 1)
+        self.assertEqual(bump_data_generation(), 2)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class QueryPlanTests(TestCase):
+    """
+    The queries of hot paths have to be answered from indexes, so they stay fast as the
+    tables grow. Bulk reads of whole tables, such as building the in-memory indexes, are
+    warmed up beforehand and not checked.
+    """
+
+    def setUp(self):
+        cache.clear()
+        clear_process_caches()
+        self.events = [Event.objects.create(name=f"UFC {300 + i}", date=f"2024-0{i + 1}-13",
+                                            location="Las Vegas",
+                                            url=f"http://ufcstats.com/event-details/{300 + i}")
+                       for i in range(3)]
+        self.fighters = [Fighter.objects.create(first_name="Jon", last_name=last,
+                                                url=f"http://ufcstats.com/fighter-details/{i}")
+                         for i, last in enumerate(["Jones", "Fitch"])]
+        self.fight = Fight.objects.create(event=self.events[0], bout="Jon Jones vs. Jon Fitch",
+                                          outcome="W/L", weight_class="Welterweight",
+                                          method="Decision", round=3, time="5:00",
+                                          time_format="3 Rnd (5-5-5)",
+                                          url="http://ufcstats.com/fight-details/1")
+        for fighter in self.fighters:
+            FightStat.objects.create(fight=self.fight, fighter=fighter, round=1, **{
+                f.name: 0 for f in FightStat._meta.concrete_fields
+                if f.get_internal_type() == "IntegerField"})
+        refresh_career_stats()
+        save_upcoming_events([{
+            "name": "UFC 310", "starts_at": (datetime.now() + timedelta(days=7)).isoformat(),
+            "location": "Las Vegas", "url": "https://www.ufc.com/event/ufc-310",
+            "fights": [{"fighter1": "Jon Jones", "fighter2": "Jon Fitch"}],
+        }])
+
+    def assertNoFullScans(self, run):
+        with capture_query_plans() as plans:
+            run()
+
+        self.assertTrue(plans.plans)
+        self.assertFalse(plans.full_scans, "\n\n".join(map(str, plans.full_scans)))
+
+    def test_detects_full_scan(self):
+        with capture_query_plans() as plans:
+            list(Event.objects.filter(location="Las Vegas"))
+
+        self.assertEqual([plan.full_scans for plan in plans.plans], [["events_event"]])
+
+    def test_home_page(self):
+        self.assertNoFullScans(lambda: self.client.get("/events/"))
+
+    def test_fighter_search(self):
+        fighter_trigrams.get()
+
+        self.assertNoFullScans(lambda: self.client.get("/fighters/", {"q": "jon jones"}))
+        self.assertNoFullScans(lambda: self.client.get("/fighters/results/", {"q": "fitch"}))
+
+    def test_incremental_load(self):
+        def load():
+            Event.objects.order_by("-date", "-id").first()
+            event_stats = FightStat.objects.filter(fight__event_id=self.events[0].id)
+            list(event_stats.values_list("fighter_id", flat=True))
+            event_stats.delete()
+            list(FightStat.objects.filter(fight__url__in=[self.fight.url]).values_list("fighter_id"))
+            refresh_career_stats([f.id for f in self.fighters])
+
+        self.assertNoFullScans(load)
+
+
+@override_settings(ROOT_URLCONF=BENCHMARK_URLCONF, ALLOWED_HOSTS=["testserver"])
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        clear_process_caches()
+        Event.objects.create(name="UFC 300", date="2024-04-13", location="Las Vegas",
+                             url="http://ufcstats.com/event-details/300")
+        save_upcoming_events([{
+            "name": "UFC 301", "starts_at": (datetime.now() + timedelta(days=7)).isoformat(),
+            "location": "Rio de Janeiro", "url": "https://www.ufc.com/event/ufc-301",
+            "fights": [{"fighter1": "Alexandre Pantoja", "fighter2": "Steve Erceg"}],
+        }])
+        for i, (first, last) in enumerate([("Alexandre", "Pantoja"), ("Steve", "Erceg")]):
+            Fighter.objects.create(first_name=first, last_name=last,
+                                   url=f"http://ufcstats.com/fighter-details/{i}")
+
+    async def test_async_views_render_as_sync_views(self):
+        for url, params in [("/events/", {}), ("/fighters/", {"q": "pantoja"}),
+                            ("/fighters/results/", {"q": "steve"}),
+                            ("/fighters/autocomplete/", {"q": "al"})]:
+            async_response = await self.async_client.get(f"/asgi{url}", params)
+            await cache.aclear()
+            sync_response = await sync_to_async(self.client.get)(f"/wsgi{url}", params)
+
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(async_response.content, sync_response.content, url)
+
+    def test_async_home_page_queries_only_missed_fragments(self):
+        get = async_to_sync(self.async_client.get)
+        get("/asgi/events/")
+        cache.delete(HOME_PAGE_CACHE_KEY, version=data_generation())
+
+        # The data generation and the next event, but neither cached fragment
+        with self.assertNumQueries(2):
+            response = get("/asgi/events/")
+        self.assertContains(response, "Alexandre Pantoja")
+
+    def test_concurrency_benchmark(self):
+        results = run_concurrency_benchmarks(
+            [("autocomplete_fighters", "/fighters/autocomplete/", {"q": "st"})],
+            clients=[3], requests_per_client=2)
+
+        self.assertEqual([(r["server"], r["requests"], r["errors"]) for r in results],
+                         [("wsgi", 6, 0), ("asgi", 6, 0)])
+
+
+class FightCardParserTests(SimpleTestCase):
+    def test_parses_saved_event_page(self):
+        parser = FightCardParser(parser='html.parser')
+
+        fights = parser.parse((FIXTURES_DIR / 'event.html').read_bytes())
+
+        self.assertEqual(len(fights), 13)
+        self.assertTrue(all(f['fighter1'] and f['fighter2'] for f in fights))
+        # The first selector does not match the site's layout, the second one does
+        self.assertEqual(parser.matched, 1)
+
+    def test_matched_selector_is_tried_first(self):
+        parser = FightCardParser(parser='html.parser')
+        parser.parse(_fight_card('Jon Jones', 'Stipe Miocic'))
+
+        fights = parser.parse(b'<div class="fighter-name">Leon Edwards</div><div class="fighter-name">Belal Muhammad</div>')
+
+        self.assertEqual(fights, [{'fighter1': 'Leon Edwards', 'fighter2': 'Belal Muhammad'}])
+        self.assertEqual(parser.matched, 2)
+
+    def test_falls_back_to_vs_text(self):
+        fights = FightCardParser(parser='html.parser').parse(b'<p>Jon Jones vs Stipe Miocic</p>')
+
+        self.assertEqual(fights, [{'fighter1': 'Jon Jones', 'fighter2': 'Stipe Miocic'}])
+
+    def test_parses_saved_listing_page(self):
+        events = parse_event_listing((FIXTURES_DIR / 'events.html').read_bytes(),
+                                     datetime.fromtimestamp(1790000000))
+
+        self.assertEqual(len(events), 8)
+        self.assertTrue(all(e['url'].startswith('https://www.ufc.com/event/') for e in events))
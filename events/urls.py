@@ -15,9 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
 urlpatterns = [
-    path('', views.home_events, name='home_events')
+    path('', views.home_events_async if settings.ASYNC_VIEWS else views.home_events, name='home_events')
 ]
@@ -1,44 +1,79 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import render
-from events.models import Event
-import json
-import os
-from django.conf import settings
+from django.utils import timezone
+from events.cache import DEFAULT_CACHE_TIMEOUT, adata_generation, data_generation
+from events.models import Event, UpcomingEvent
+import math
 
-def home_events(request):
-    # past 10 events
-    past_events = Event.objects.order_by('-date')[:10]
-    
-    # upcoming events for json
-    event_name = None
-    event_date = None
-    event_location = None
-    fights = []
-    
-    json_file_path = os.path.join(settings.BASE_DIR, 'next_event.json')
-    
-    try:
-        with open(json_file_path, 'r') as f:
-            event_data = json.load(f)
-        
-        event_name = event_data.get('name', 'No event found')
-        event_date = event_data.get('date', 'TBD')
-        event_location = event_data.get('location', 'TBD')
-        fights = event_data.get('fights', [])
-        
-        print(f"Loaded upcoming event: {event_name}")
-        print(f"Number of fights: {len(fights)}")
-        
-    except FileNotFoundError:
-        print("next_event.json file not found")
-    except Exception as e:
-        print(f"Error loading JSON: {e}")
-    
-    context = {
-        'event_name': event_name,
-        'event_date': event_date,
-        'event_location': event_location,
+HOME_PAGE_CACHE_KEY = 'home_events'
+
+
+def _home_context(generation: int, next_event: UpcomingEvent | None, fights, past_events):
+    return {
+        'event_name': next_event.name if next_event else None,
+        'event_date': next_event.starts_at if next_event else None,
+        'event_location': next_event.location if next_event else None,
         'fights': fights,
-        'past_events': past_events
+        'past_events': past_events,
+        'next_event_id': next_event.pk if next_event else None,
+        'generation': generation,
+        'cache_timeout': DEFAULT_CACHE_TIMEOUT,
     }
 
-    return render(request, 'events/home.html', context)
\ No newline at end of file
+
+def _home_page_timeout(next_event: UpcomingEvent | None, now):
+    # The page only changes with the data, or once the next event starts
+    if next_event is None:
+        return DEFAULT_CACHE_TIMEOUT
+    return min(DEFAULT_CACHE_TIMEOUT, math.ceil((next_event.starts_at - now).total_seconds()))
+
+
+def _next_event(now):
+    # soonest upcoming event, as saved by scrape_events
+    return UpcomingEvent.objects.filter(starts_at__gte=now).order_by('starts_at')
+
+
+def home_events(request):
+    generation = data_generation()
+    content = cache.get(HOME_PAGE_CACHE_KEY, version=generation)
+    if content is not None:
+        return HttpResponse(content)
+
+    now = timezone.now()
+    next_event = _next_event(now).first()
+
+    # past 10 events and the fight card are only queried when their cached fragments are missed
+    context = _home_context(generation, next_event,
+                            next_event.bouts.all() if next_event else [],
+                            Event.objects.order_by('-date')[:10])
+    response = render(request, 'events/home.html', context)
+
+    cache.set(HOME_PAGE_CACHE_KEY, response.content, _home_page_timeout(next_event, now),
+              version=generation)
+    return response
+
+
+async def home_events_async(request):
+    """
+    Async version of `home_events`, for serving under ASGI.
+    """
+    generation = await adata_generation()
+    content = await cache.aget(HOME_PAGE_CACHE_KEY, version=generation)
+    if content is not None:
+        return HttpResponse(content)
+
+    now = timezone.now()
+    next_event = await _next_event(now).afirst()
+
+    # Templates cannot run queries from async code, so the page is rendered in a thread, where
+    # the past events and fight card are only queried when their cached fragments are missed
+    context = _home_context(generation, next_event,
+                            next_event.bouts.all() if next_event else [],
+                            Event.objects.order_by('-date')[:10])
+    response = await sync_to_async(render)(request, 'events/home.html', context)
+
+    await cache.aset(HOME_PAGE_CACHE_KEY, response.content, _home_page_timeout(next_event, now),
+                     version=generation)
+    return response
@@ -0,0 +1,65 @@
+from bisect import bisect_left
+from events.cache import ProcessCache
+from fighters.models import Fighter
+from fighters.text import fold
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT = 10
+# Sorts after every character, so `prefix + PREFIX_END` bounds all keys starting with `prefix`
+PREFIX_END = chr(0x10FFFF)
+
+
+class FighterNameIndex:
+    """
+    Sorted array of folded fighter names, nicknames and full names, searched by prefix with
+    bisect. Each key points back at its fighter, so a fighter matched through several of
+    their names is only returned once.
+    """
+
+    def __init__(self, fighters: list[tuple[int, str, int, list[str]]]):
+        """
+        Index `fighters` given as (id, display name, rank, names to match) tuples. Fighters with
+        a higher rank come first among the matches of a prefix.
+        """
+        entries = sorted(
+            (key, i)
+            for i, (_, _, _, names) in enumerate(fighters)
+            for key in {fold(name) for name in names if name}
+        )
+        self.keys = [key for key, _ in entries]
+        self.fighters = [i for _, i in entries]
+        self.names = [name for _, name, _, _ in fighters]
+        self.ranks = [rank for _, _, rank, _ in fighters]
+
+    @classmethod
+    def build(cls) -> "FighterNameIndex":
+        rows = Fighter.objects.values_list(
+            'id', 'first_name', 'last_name', 'nickname', 'career_stats__fights')
+        index = cls([
+            (fighter_id, f"{first_name} {last_name}", fights or 0,
+             [first_name, last_name, nickname, f"{first_name} {last_name}"])
+            for fighter_id, first_name, last_name, nickname, fights in rows
+        ])
+        logger.info(f"Built autocomplete index of {len(index.keys)} name(s)")
+        return index
+
+    def search(self, prefix: str, limit: int = DEFAULT_LIMIT) -> list[str]:
+        """
+        The names of the `limit` highest ranked fighters with a name starting with `prefix`.
+        """
+        prefix = fold(prefix)
+        if not prefix:
+            return []
+
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + PREFIX_END, lo=start)
+        matches = set(self.fighters[start:end])
+
+        best = heapq.nsmallest(limit, matches, key=lambda i: (-self.ranks[i], self.names[i]))
+        return [self.names[i] for i in best]
+
+
+fighter_names = ProcessCache(FighterNameIndex.build)
@@ -0,0 +1,29 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def deduplicate_fighter_urls(apps, schema_editor):
+    """
+    Merge fighters sharing a url into the first one created, so the url can be made unique.
+    """
+    Fighter = apps.get_model("fighters", "Fighter")
+    FightStat = apps.get_model("fights", "FightStat")
+
+    duplicated = (Fighter.objects.values("url").annotate(count=Count("id"), keep=Min("id"))
+                  .filter(count__gt=1))
+    for row in duplicated:
+        duplicates = Fighter.objects.filter(url=row["url"]).exclude(id=row["keep"])
+        FightStat.objects.filter(fighter__in=duplicates).update(fighter_id=row["keep"])
+        duplicates.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fighters', '0001_initial'),
+        ('fights', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_fighter_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fighters', '0002_deduplicate_fighter_urls'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fighter',
+            name='url',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+    ]
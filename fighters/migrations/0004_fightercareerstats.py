@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fighters', '0003_alter_fighter_url'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FighterCareerStats',
+            fields=[
+                ('fighter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='career_stats', serialize=False, to='fighters.fighter')),
+                ('fights', models.IntegerField()),
+                ('rounds', models.IntegerField()),
+                ('fight_seconds', models.IntegerField()),
+                ('total_kd', models.IntegerField()),
+                ('total_sig', models.IntegerField()),
+                ('total_sig_att', models.IntegerField()),
+                ('total_td', models.IntegerField()),
+                ('total_td_att', models.IntegerField()),
+                ('total_ctrl', models.IntegerField()),
+                ('submission_attempts', models.IntegerField()),
+                ('reversals', models.IntegerField()),
+                ('head_strikes', models.IntegerField()),
+                ('head_strikes_attempted', models.IntegerField()),
+                ('body_strikes', models.IntegerField()),
+                ('body_strikes_attempted', models.IntegerField()),
+                ('leg_strikes', models.IntegerField()),
+                ('leg_strikes_attempted', models.IntegerField()),
+                ('distance_strikes', models.IntegerField()),
+                ('distance_strikes_attempted', models.IntegerField()),
+                ('clinch_strikes', models.IntegerField()),
+                ('clinch_strikes_attempted', models.IntegerField()),
+                ('ground_strikes', models.IntegerField()),
+                ('ground_strikes_attempted', models.IntegerField()),
+                ('sig_strike_accuracy', models.FloatField(null=True)),
+                ('takedown_accuracy', models.FloatField(null=True)),
+                ('head_strike_accuracy', models.FloatField(null=True)),
+                ('body_strike_accuracy', models.FloatField(null=True)),
+                ('leg_strike_accuracy', models.FloatField(null=True)),
+                ('distance_strike_accuracy', models.FloatField(null=True)),
+                ('clinch_strike_accuracy', models.FloatField(null=True)),
+                ('ground_strike_accuracy', models.FloatField(null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:18
+
+from django.db import migrations, models
+import unicodedata
+
+TRIGRAM_INDEX = "fighters_fighter_search_name_trgm"
+
+
+def search_name(*names) -> str:
+    """
+    Frozen copy of fighters.text.search_name as of this migration, so replaying it gives the
+    same search names however that helper changes later.
+    """
+    text = ' '.join(n for n in names if isinstance(n, str))
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+def populate_search_names(apps, schema_editor):
+    """
+    Fill in the search name of every existing fighter.
+    """
+    Fighter = apps.get_model("fighters", "Fighter")
+
+    fighters = list(Fighter.objects.only("first_name", "last_name", "nickname"))
+    for fighter in fighters:
+        fighter.search_name = search_name(fighter.first_name, fighter.last_name, fighter.nickname)
+    Fighter.objects.bulk_update(fighters, ["search_name"], batch_size=1000)
+
+
+def create_trigram_index(apps, schema_editor):
+    """
+    Index search names by trigram on PostgreSQL. Other databases search an in-memory index.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} ON fighters_fighter USING gin (search_name gin_trgm_ops)")
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(f"DROP INDEX IF EXISTS {TRIGRAM_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fighters', '0004_fightercareerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fighter',
+            name='search_name',
+            field=models.CharField(default='', max_length=128),
+        ),
+        migrations.RunPython(populate_search_names, migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
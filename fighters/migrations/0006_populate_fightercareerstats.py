@@ -0,0 +1,108 @@
+from django.db import migrations
+from django.db.models import Sum
+import re
+
+BATCH_SIZE = 1000
+
+# Frozen copies of the aggregation in fighters.stats as of this migration, so replaying it gives
+# the same career stats however that module changes later
+CAREER_TOTALS = {
+    "total_kd": "knockdowns",
+    "total_sig": "sig_strikes",
+    "total_sig_att": "sig_strikes_attempted",
+    "total_td": "takedowns",
+    "total_td_att": "takedowns_attempted",
+    "total_ctrl": "control_time",
+    "submission_attempts": "submission_attempts",
+    "reversals": "reversals",
+    "head_strikes": "head_strikes",
+    "head_strikes_attempted": "head_strikes_attempted",
+    "body_strikes": "body_strikes",
+    "body_strikes_attempted": "body_strikes_attempted",
+    "leg_strikes": "leg_strikes",
+    "leg_strikes_attempted": "leg_strikes_attemped",
+    "distance_strikes": "distance_strikes",
+    "distance_strikes_attempted": "distance_strikes_attempted",
+    "clinch_strikes": "clinch_strikes",
+    "clinch_strikes_attempted": "clinch_strikes_attempted",
+    "ground_strikes": "ground_strikes",
+    "ground_strikes_attempted": "ground_strikes_attemped",
+}
+
+CAREER_ACCURACIES = {
+    "sig_strike_accuracy": ("total_sig", "total_sig_att"),
+    "takedown_accuracy": ("total_td", "total_td_att"),
+    "head_strike_accuracy": ("head_strikes", "head_strikes_attempted"),
+    "body_strike_accuracy": ("body_strikes", "body_strikes_attempted"),
+    "leg_strike_accuracy": ("leg_strikes", "leg_strikes_attempted"),
+    "distance_strike_accuracy": ("distance_strikes", "distance_strikes_attempted"),
+    "clinch_strike_accuracy": ("clinch_strikes", "clinch_strikes_attempted"),
+    "ground_strike_accuracy": ("ground_strikes", "ground_strikes_attempted"),
+}
+
+ROUND_MINUTES = re.compile(r"\(([\d-]+)\)")
+
+
+def fight_seconds(rounds, time, time_format):
+    try:
+        minutes, seconds = (time or "").split(":")
+        final_round = int(minutes) * 60 + int(seconds)
+    except ValueError:
+        final_round = 0
+
+    match = ROUND_MINUTES.search(time_format or "")
+    if match is None:
+        return final_round
+
+    durations = [int(d) for d in match.group(1).split("-") if d]
+    completed = [durations[min(r, len(durations) - 1)] for r in range(max(rounds - 1, 0))]
+    return sum(completed) * 60 + final_round
+
+
+def populate_career_stats(apps, schema_editor):
+    """
+    Sum the career stats of every fighter from the fight stats already loaded, which the search
+    views read from this table.
+    """
+    FightStat = apps.get_model("fights", "FightStat")
+    FighterCareerStats = apps.get_model("fighters", "FighterCareerStats")
+
+    totals = (FightStat.objects.order_by()
+              .values("fighter_id")
+              .annotate(**{total: Sum(field) for total, field in CAREER_TOTALS.items()}))
+
+    fights = {}
+    fought = (FightStat.objects.order_by()
+              .values_list("fighter_id", "fight_id", "fight__round", "fight__time", "fight__time_format")
+              .distinct())
+    for fighter_id, _, rounds, time, time_format in fought.iterator(chunk_size=BATCH_SIZE):
+        count, total_rounds, seconds = fights.get(fighter_id, (0, 0, 0))
+        fights[fighter_id] = (count + 1, total_rounds + rounds,
+                              seconds + fight_seconds(rounds, time, time_format))
+
+    career_stats = []
+    for row in totals:
+        count, rounds, seconds = fights.get(row["fighter_id"], (0, 0, 0))
+        accuracies = {name: round(100 * row[landed] / row[attempted], 2) if row[attempted] else None
+                      for name, (landed, attempted) in CAREER_ACCURACIES.items()}
+        career_stats.append(FighterCareerStats(
+            fights=count, rounds=rounds, fight_seconds=seconds, **row, **accuracies))
+
+    FighterCareerStats.objects.all().delete()
+    FighterCareerStats.objects.bulk_create(career_stats, batch_size=BATCH_SIZE)
+
+
+def clear_career_stats(apps, schema_editor):
+    apps.get_model("fighters", "FighterCareerStats").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fighters', '0005_fighter_search_name'),
+        ('fights', '0005_alter_fightstat_round'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_career_stats, clear_career_stats),
+    ]
@@ -1,5 +1,6 @@
 from typing import TYPE_CHECKING
 from django.db import models
+from fighters.text import search_name
 
 if TYPE_CHECKING:
     from fights.models import FightStat
@@ -14,6 +15,7 @@ class Fighter(models.Model):
 
     if TYPE_CHECKING:
         stats: models.Manager["FightStat"]
+        career_stats: "FighterCareerStats"
 
     first_name = models.CharField(max_length=32)
     last_name = models.CharField(max_length=32)
@@ -23,7 +25,13 @@ class Fighter(models.Model):
     reach = models.CharField(max_length=16, null=True)
     stance = models.CharField(max_length=16, null=True)
     dob = models.DateField(null=True)
-    url = models.CharField(max_length=128)
+    url = models.CharField(max_length=128, unique=True)
+    # Folded full name and nickname, which name searches match against
+    search_name = models.CharField(max_length=128, default="")
+
+    def save(self, *args, **kwargs):
+        self.search_name = search_name(self.first_name, self.last_name, self.nickname)
+        super().save(*args, **kwargs)
 
     @property
     def full_name(self):
@@ -39,3 +47,54 @@ class Fighter(models.Model):
 
     def __str__(self):
         return self.full_name_with_nickname
+
+
+class FighterCareerStats(models.Model):
+    """
+    Represents the career totals of a `Fighter`, summed from all of their fight stats.
+    """
+
+    fighter = models.OneToOneField(
+        Fighter,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="career_stats"
+    )
+
+    fights = models.IntegerField()
+    rounds = models.IntegerField()
+    fight_seconds = models.IntegerField()
+
+    total_kd = models.IntegerField()
+    total_sig = models.IntegerField()
+    total_sig_att = models.IntegerField()
+    total_td = models.IntegerField()
+    total_td_att = models.IntegerField()
+    total_ctrl = models.IntegerField()
+    submission_attempts = models.IntegerField()
+    reversals = models.IntegerField()
+    head_strikes = models.IntegerField()
+    head_strikes_attempted = models.IntegerField()
+    body_strikes = models.IntegerField()
+    body_strikes_attempted = models.IntegerField()
+    leg_strikes = models.IntegerField()
+    leg_strikes_attempted = models.IntegerField()
+    distance_strikes = models.IntegerField()
+    distance_strikes_attempted = models.IntegerField()
+    clinch_strikes = models.IntegerField()
+    clinch_strikes_attempted = models.IntegerField()
+    ground_strikes = models.IntegerField()
+    ground_strikes_attempted = models.IntegerField()
+
+    # Percentage of attempts landed, or null without any attempts
+    sig_strike_accuracy = models.FloatField(null=True)
+    takedown_accuracy = models.FloatField(null=True)
+    head_strike_accuracy = models.FloatField(null=True)
+    body_strike_accuracy = models.FloatField(null=True)
+    leg_strike_accuracy = models.FloatField(null=True)
+    distance_strike_accuracy = models.FloatField(null=True)
+    clinch_strike_accuracy = models.FloatField(null=True)
+    ground_strike_accuracy = models.FloatField(null=True)
+
+    def __str__(self):
+        return f"Career stats of {self.fighter_id}"
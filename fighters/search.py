@@ -0,0 +1,201 @@
+from collections import Counter
+from dataclasses import dataclass
+from django.contrib.postgres.search import TrigramSimilarity, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import FloatField, Q, QuerySet
+from django.db.models.functions import Cast
+from events.cache import ProcessCache
+from fighters.models import Fighter
+from fighters.text import fold, trigrams
+import base64
+import binascii
+import heapq
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 50
+# Share of the trigrams of a query a name has to contain to match it. The same as the default
+# pg_trgm.word_similarity_threshold, so both backends match the same names
+SIMILARITY_THRESHOLD = 0.6
+
+# A result's position in the ranking: its word similarity, its similarity, then its id
+RankKey = tuple[float, float, int]
+
+
+@dataclass
+class SearchPage:
+    """
+    One page of fighters matching a search, best first.
+    """
+
+    ids: list[int]
+    # Cursor of the page after this one, if there is one
+    next_cursor: str | None
+    # Roughly how many fighters match in total, without counting them all
+    estimated_count: int
+
+
+def encode_cursor(key: RankKey) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> RankKey | None:
+    """
+    The rank key a page ended at, or None to start from the first page when the cursor is
+    missing or malformed.
+    """
+    if not cursor:
+        return None
+    try:
+        word_similarity, similarity, fighter_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return float(word_similarity), float(similarity), int(fighter_id)
+    except (binascii.Error, ValueError, TypeError):
+        logger.debug(f"Ignoring malformed search cursor {cursor}")
+        return None
+
+
+class TrigramIndex:
+    """
+    Inverted index from the trigrams of fighter search names to the fighters having them,
+    for fuzzy name search without a trigram capable database.
+
+    A name scores by the share of the query's trigrams it contains, like pg_trgm's word
+    similarity, so a query matches a misspelling of any part of a name. Ties are broken by
+    the similarity of the whole name, so closer names come first.
+    """
+
+    def __init__(self, names: list[tuple[int, str]]):
+        """
+        Index `names` given as (fighter id, search name) tuples.
+        """
+        self.ids = [fighter_id for fighter_id, _ in names]
+        self.sizes = []
+        self.postings: dict[str, list[int]] = {}
+        for i, (_, name) in enumerate(names):
+            name_trigrams = trigrams(name)
+            self.sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                self.postings.setdefault(trigram, []).append(i)
+
+    @classmethod
+    def build(cls) -> "TrigramIndex":
+        index = cls(list(Fighter.objects.values_list("id", "search_name")))
+        logger.info(f"Built trigram index of {len(index.ids)} fighter(s) and {len(index.postings)} trigram(s)")
+        return index
+
+    def search(self, query: str, limit: int = DEFAULT_PAGE_SIZE, after: RankKey | None = None,
+               threshold: float = SIMILARITY_THRESHOLD) -> tuple[list[RankKey], int]:
+        """
+        The rank keys of the `limit` fighters whose names best match `query`, ranked after
+        `after`, best first. Also returns the number of fighters matching at all.
+        """
+        query_trigrams = trigrams(fold(query))
+        if not query_trigrams:
+            return [], 0
+
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self.postings.get(trigram, ()))
+
+        minimum = threshold * len(query_trigrams)
+        keys = [(common / len(query_trigrams),
+                 common / (len(query_trigrams) + self.sizes[i] - common),
+                 self.ids[i])
+                for i, common in shared.items() if common >= minimum]
+
+        def order(key: RankKey):
+            return key[0], key[1], -key[2]
+
+        ranked = keys
+        if after is not None:
+            ranked = [key for key in keys if order(key) < order(after)]
+        return heapq.nlargest(limit, ranked, key=order), len(keys)
+
+
+fighter_trigrams = ProcessCache(TrigramIndex.build)
+
+
+def _plan_rows(plan: str) -> int:
+    return int(json.loads(plan)[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(queryset: QuerySet) -> int:
+    """
+    The number of rows the PostgreSQL planner expects `queryset` to return, which is far
+    cheaper than counting them.
+    """
+    return _plan_rows(queryset.explain(format="json"))
+
+
+def _ranked_postgres(query: str, after: RankKey | None):
+    folded = fold(query)
+    # The word similarity operator is answered from the GIN trigram index on search_name
+    matches = Fighter.objects.filter(search_name__trigram_word_similar=folded)
+    # pg_trgm scores are single precision, which a cursor's double precision floats never
+    # equal, so ties with the cursor are only found again after casting to double precision
+    ranked = matches.annotate(
+        word_similarity=Cast(TrigramWordSimilarity(folded, "search_name"), FloatField()),
+        similarity=Cast(TrigramSimilarity("search_name", folded), FloatField()),
+    )
+    if after is not None:
+        word_similarity, similarity, fighter_id = after
+        ranked = ranked.filter(
+            Q(word_similarity__lt=word_similarity)
+            | Q(word_similarity=word_similarity, similarity__lt=similarity)
+            | Q(word_similarity=word_similarity, similarity=similarity, id__gt=fighter_id))
+
+    return matches, ranked.order_by("-word_similarity", "-similarity", "id").values_list(
+        "word_similarity", "similarity", "id")
+
+
+def _search_postgres(query: str, limit: int, after: RankKey | None):
+    matches, ranked = _ranked_postgres(query, after)
+    return list(ranked[:limit]), estimate_count(matches)
+
+
+async def _asearch_postgres(query: str, limit: int, after: RankKey | None):
+    matches, ranked = _ranked_postgres(query, after)
+    keys = [key async for key in ranked[:limit]]
+    return keys, _plan_rows(await matches.aexplain(format="json"))
+
+
+def _page(keys: list[RankKey], estimated_count: int, limit: int) -> SearchPage:
+    page = keys[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(keys) > limit else None
+    return SearchPage([key[2] for key in page], next_cursor, estimated_count)
+
+
+def search_fighters(query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> SearchPage:
+    """
+    A page of the fighters whose full name or nickname best match `query`, tolerating
+    misspellings, accents and letter case. Pages hold at most MAX_PAGE_SIZE fighters, and
+    `cursor` continues from the page it came with.
+
+    PostgreSQL searches its pg_trgm index, other databases a trigram index held in memory.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if not query.strip():
+        return SearchPage([], None, 0)
+
+    # One more result than asked for tells whether there is a next page
+    search = _search_postgres if connection.vendor == "postgresql" else fighter_trigrams.get().search
+    return _page(*search(query, limit + 1, decode_cursor(cursor)), limit)
+
+
+async def asearch_fighters(query: str, limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None) -> SearchPage:
+    """
+    Async version of `search_fighters`.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    if not query.strip():
+        return SearchPage([], None, 0)
+
+    if connection.vendor == "postgresql":
+        search = _asearch_postgres(query, limit + 1, decode_cursor(cursor))
+        return _page(*await search, limit)
+
+    index = await fighter_trigrams.aget()
+    return _page(*index.search(query, limit + 1, decode_cursor(cursor)), limit)
@@ -0,0 +1,163 @@
+from django.db import transaction
+from django.db.models import QuerySet, Sum
+from fighters.models import Fighter, FighterCareerStats
+from fights.models import FightStat
+from typing import Iterable
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# Career totals shown alongside a fighter, by the FightStat field they add up
+CAREER_TOTALS = {
+    "total_kd": "knockdowns",
+    "total_sig": "sig_strikes",
+    "total_sig_att": "sig_strikes_attempted",
+    "total_td": "takedowns",
+    "total_td_att": "takedowns_attempted",
+    "total_ctrl": "control_time",
+    "submission_attempts": "submission_attempts",
+    "reversals": "reversals",
+    "head_strikes": "head_strikes",
+    "head_strikes_attempted": "head_strikes_attempted",
+    "body_strikes": "body_strikes",
+    "body_strikes_attempted": "body_strikes_attempted",
+    "leg_strikes": "leg_strikes",
+    "leg_strikes_attempted": "leg_strikes_attemped",
+    "distance_strikes": "distance_strikes",
+    "distance_strikes_attempted": "distance_strikes_attempted",
+    "clinch_strikes": "clinch_strikes",
+    "clinch_strikes_attempted": "clinch_strikes_attempted",
+    "ground_strikes": "ground_strikes",
+    "ground_strikes_attempted": "ground_strikes_attemped",
+}
+
+# Accuracy percentages, by the totals of landed and attempted strikes they derive from
+CAREER_ACCURACIES = {
+    "sig_strike_accuracy": ("total_sig", "total_sig_att"),
+    "takedown_accuracy": ("total_td", "total_td_att"),
+    "head_strike_accuracy": ("head_strikes", "head_strikes_attempted"),
+    "body_strike_accuracy": ("body_strikes", "body_strikes_attempted"),
+    "leg_strike_accuracy": ("leg_strikes", "leg_strikes_attempted"),
+    "distance_strike_accuracy": ("distance_strikes", "distance_strikes_attempted"),
+    "clinch_strike_accuracy": ("clinch_strikes", "clinch_strikes_attempted"),
+    "ground_strike_accuracy": ("ground_strikes", "ground_strikes_attempted"),
+}
+
+FIGHTER_FIELDS = ["id", "first_name", "last_name", "nickname", "height", "weight",
+                  "reach", "stance", "dob", "url"]
+
+# Fighters refreshed per query, keeping the number of query parameters bounded
+REFRESH_CHUNK_SIZE = 500
+DEFAULT_BATCH_SIZE = 1000
+# Minutes per round of a time format such as "3 Rnd (5-5-5)"
+ROUND_MINUTES = re.compile(r"\(([\d-]+)\)")
+
+
+def fight_seconds(rounds: int, time: str | None, time_format: str | None) -> int:
+    """
+    The length of a fight in seconds, from the round it ended in, the time into that round
+    and the time format of the fight. The final round counts only up to the time it ended.
+    """
+    try:
+        minutes, seconds = (time or "").split(":")
+        final_round = int(minutes) * 60 + int(seconds)
+    except ValueError:
+        final_round = 0
+
+    match = ROUND_MINUTES.search(time_format or "")
+    if match is None:
+        return final_round
+
+    durations = [int(d) for d in match.group(1).split("-") if d]
+    # Formats such as "Unlimited Rnd (10)" repeat their last round
+    completed = [durations[min(r, len(durations) - 1)] for r in range(max(rounds - 1, 0))]
+    return sum(completed) * 60 + final_round
+
+
+def _accuracy(landed: int, attempted: int):
+    return round(100 * landed / attempted, 2) if attempted else None
+
+
+def compute_career_stats(fighter_ids: Iterable[int] | None = None) -> list[FighterCareerStats]:
+    """
+    Sum the career stats of the fighters in `fighter_ids`, or of every fighter, from their
+    fight stats. Fighters without any fight stats get no career stats.
+    """
+    stats = FightStat.objects.all()
+    if fighter_ids is not None:
+        stats = stats.filter(fighter_id__in=fighter_ids)
+
+    totals = (stats.order_by()
+              .values("fighter_id")
+              .annotate(**{total: Sum(field) for total, field in CAREER_TOTALS.items()}))
+
+    fights = {}
+    fought = (stats.order_by()
+              .values_list("fighter_id", "fight_id", "fight__round", "fight__time", "fight__time_format")
+              .distinct())
+    for fighter_id, _, rounds, time, time_format in fought.iterator():
+        count, total_rounds, seconds = fights.get(fighter_id, (0, 0, 0))
+        fights[fighter_id] = (count + 1, total_rounds + rounds,
+                              seconds + fight_seconds(rounds, time, time_format))
+
+    career_stats = []
+    for row in totals:
+        count, rounds, seconds = fights.get(row["fighter_id"], (0, 0, 0))
+        accuracies = {name: _accuracy(row[landed], row[attempted])
+                      for name, (landed, attempted) in CAREER_ACCURACIES.items()}
+        career_stats.append(FighterCareerStats(
+            fights=count, rounds=rounds, fight_seconds=seconds, **row, **accuracies))
+    return career_stats
+
+
+def refresh_career_stats(fighter_ids: Iterable[int] | None = None,
+                         batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Rebuild the stored career stats of the fighters in `fighter_ids`, or of every fighter,
+    in one transaction. Returns the number of fighters with career stats saved.
+    """
+    saved = 0
+    with transaction.atomic():
+        if fighter_ids is None:
+            FighterCareerStats.objects.all().delete()
+            saved = len(FighterCareerStats.objects.bulk_create(
+                compute_career_stats(), batch_size=batch_size))
+        else:
+            ids = sorted(set(fighter_ids))
+            for i in range(0, len(ids), REFRESH_CHUNK_SIZE):
+                chunk = ids[i:i + REFRESH_CHUNK_SIZE]
+                FighterCareerStats.objects.filter(fighter_id__in=chunk).delete()
+                saved += len(FighterCareerStats.objects.bulk_create(
+                    compute_career_stats(chunk), batch_size=batch_size))
+
+    logger.info(f"Saved career stats of {saved} fighter(s)")
+    return saved
+
+
+def _career_stats_rows(fighters: QuerySet[Fighter]) -> QuerySet:
+    return fighters.values(
+        *FIGHTER_FIELDS, "career_stats__fighter",
+        *(f"career_stats__{total}" for total in CAREER_TOTALS))
+
+
+def _with_fight_stats(row: dict) -> dict:
+    stats = {total: row.pop(f"career_stats__{total}") for total in CAREER_TOTALS}
+    row["fight_stats"] = stats if row.pop("career_stats__fighter") is not None else None
+    return row
+
+
+def with_career_stats(fighters: QuerySet[Fighter]) -> list[dict]:
+    """
+    Fetch `fighters` as plain dicts, each with a `fight_stats` dict of career totals, or
+    None for a fighter without any stats. The stored career stats of every fighter are
+    joined on in the same query.
+    """
+    return [_with_fight_stats(row) for row in _career_stats_rows(fighters)]
+
+
+async def awith_career_stats(fighters: QuerySet[Fighter]) -> list[dict]:
+    """
+    Async version of `with_career_stats`.
+    """
+    return [_with_fight_stats(row) async for row in _career_stats_rows(fighters)]
@@ -1,3 +1,225 @@
+from django.apps import apps
 from django.test import TestCase
+from events.cache import ProcessCache, bump_data_generation
+from events.models import Event
+from fighters.autocomplete import FighterNameIndex, fighter_names
+from fighters.models import Fighter, FighterCareerStats
+from fighters.search import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, TrigramIndex, fighter_trigrams, search_fighters
+from fighters.stats import CAREER_TOTALS, fight_seconds, refresh_career_stats
+from fighters.text import fold
+from fights.models import Fight, FightStat
+import importlib
 
-# Create your tests here.
+
+def create_fight_stat(fight: Fight, fighter: Fighter, round: int, **values: int):
+    fields = {f.name: 0 for f in FightStat._meta.concrete_fields
+              if f.get_internal_type() == "IntegerField"}
+    return FightStat.objects.create(fight=fight, fighter=fighter, round=round, **{**fields, **values})
+
+
+class SearchFighterTests(TestCase):
+    def setUp(self):
+        fighter_trigrams.clear()
+        event = Event.objects.create(name="UFC 300", date="2024-04-13", location="Las Vegas",
+                                     url="http://ufcstats.com/event-details/300")
+        fight = Fight.objects.create(event=event, bout="Alex Pereira vs. Jamahal Hill", outcome="W/L",
+                                     weight_class="Light Heavyweight", method="KO/TKO", round=1,
+                                     time="3:14", time_format="5 Rnd (5-5-5-5-5)",
+                                     url="http://ufcstats.com/fight-details/1")
+        self.pereira = Fighter.objects.create(first_name="Alex", last_name="Pereira",
+                                              url="http://ufcstats.com/fighter-details/1")
+        self.hill = Fighter.objects.create(first_name="Jamahal", last_name="Hill",
+                                           url="http://ufcstats.com/fighter-details/2")
+        Fighter.objects.create(first_name="Alex", last_name="Volkanovski",
+                               url="http://ufcstats.com/fighter-details/3")
+
+        create_fight_stat(fight, self.pereira, 1, knockdowns=1, sig_strikes=20, leg_strikes_attemped=4)
+        create_fight_stat(fight, self.pereira, 2, knockdowns=1, sig_strikes=15, control_time=30)
+        create_fight_stat(fight, self.hill, 1, sig_strikes=12)
+        refresh_career_stats()
+
+    def search(self, query: str):
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            return self.client.get("/fighters/", {"q": query})
+
+    def test_joins_career_stats_in_one_query(self):
+        self.search("Alex")
+        with self.assertNumQueries(1):
+            response = self.search("Alex")
+
+        fighters = {f["last_name"]: f for f in response.context["fighters"]}
+        self.assertEqual(set(fighters["Pereira"]["fight_stats"]), set(CAREER_TOTALS))
+        self.assertEqual(fighters["Pereira"]["fight_stats"]["total_kd"], 2)
+        self.assertEqual(fighters["Pereira"]["fight_stats"]["total_sig"], 35)
+        self.assertEqual(fighters["Pereira"]["fight_stats"]["total_ctrl"], 30)
+        self.assertEqual(fighters["Pereira"]["fight_stats"]["leg_strikes_attempted"], 4)
+        self.assertIsNone(fighters["Volkanovski"]["fight_stats"])
+        self.assertContains(response, "Significant Strikes:</strong> 35")
+
+    def test_refreshes_career_stats_of_given_fighters(self):
+        stats = FighterCareerStats.objects.get(fighter=self.pereira)
+        self.assertEqual((stats.fights, stats.rounds, stats.fight_seconds), (1, 1, 194))
+        self.assertEqual(stats.sig_strike_accuracy, None)
+        self.assertFalse(FighterCareerStats.objects.filter(fighter__last_name="Volkanovski").exists())
+
+        FightStat.objects.filter(fighter=self.hill).update(sig_strikes=6, sig_strikes_attempted=8)
+        refresh_career_stats([self.hill.id])
+
+        stats = FighterCareerStats.objects.get(fighter=self.hill)
+        self.assertEqual((stats.total_sig, stats.total_sig_att, stats.sig_strike_accuracy), (6, 8, 75.0))
+
+    def test_migration_populates_career_stats(self):
+        migration = importlib.import_module("fighters.migrations.0006_populate_fightercareerstats")
+        refreshed = list(FighterCareerStats.objects.order_by("fighter").values())
+        FighterCareerStats.objects.all().delete()
+
+        migration.populate_career_stats(apps, None)
+
+        self.assertEqual(list(FighterCareerStats.objects.order_by("fighter").values()), refreshed)
+
+    def test_searches_first_and_last_name(self):
+        response = self.search("Jamahal Hill")
+
+        self.assertEqual(response.context["fighters"][0]["fight_stats"]["total_sig"], 12)
+
+    def test_ranks_closest_name_first(self):
+        response = self.search("Alex Pereria")
+
+        self.assertEqual([f["last_name"] for f in response.context["fighters"]], ["Pereira"])
+
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            response = self.client.get("/fighters/results/", {"q": "jamahall"})
+        self.assertEqual(response.context["fighters"], [self.hill])
+
+
+class CareerStatsTests(TestCase):
+    def test_fight_seconds(self):
+        self.assertEqual(fight_seconds(3, "4:10", "3 Rnd (5-5-5)"), 10 * 60 + 250)
+        self.assertEqual(fight_seconds(1, "0:13", "5 Rnd (5-5-5-5-5)"), 13)
+        self.assertEqual(fight_seconds(3, "2:00", "Unlimited Rnd (10)"), 20 * 60 + 120)
+        self.assertEqual(fight_seconds(1, "12:00", "No Time Limit"), 12 * 60)
+        self.assertEqual(fight_seconds(2, "--", "2 Rnd (5-5)"), 5 * 60)
+
+
+class AutocompleteTests(TestCase):
+    def setUp(self):
+        fighter_names.clear()
+        self.index = FighterNameIndex([
+            (1, "José Aldo", 31, ["José", "Aldo", "Junior", "José Aldo"]),
+            (2, "Jon Jones", 30, ["Jon", "Jones", "Bones", "Jon Jones"]),
+            (3, "Jon Fitch", 20, ["Jon", "Fitch", None, "Jon Fitch"]),
+            (4, "Joanna Jedrzejczyk", 16, ["Joanna", "Jedrzejczyk", None, "Joanna Jedrzejczyk"]),
+        ])
+
+    def test_folds_case_and_accents(self):
+        self.assertEqual(fold("  JOSÉ   Aldo "), "jose aldo")
+        self.assertEqual(self.index.search("jose"), ["José Aldo"])
+        self.assertEqual(self.index.search("ALDO"), ["José Aldo"])
+
+    def test_ranks_and_limits_matches(self):
+        self.assertEqual(self.index.search("jo"), ["José Aldo", "Jon Jones", "Jon Fitch", "Joanna Jedrzejczyk"])
+        self.assertEqual(self.index.search("jo", limit=2), ["José Aldo", "Jon Jones"])
+        self.assertEqual(self.index.search("jon j"), ["Jon Jones"])
+        self.assertEqual(self.index.search("bones"), ["Jon Jones"])
+        self.assertEqual(self.index.search("z"), [])
+
+    def test_rebuilds_on_new_data_generation(self):
+        names = ProcessCache(FighterNameIndex.build, refresh_interval=0)
+        Fighter.objects.create(first_name="Jon", last_name="Jones", url="http://ufcstats.com/fighter-details/1")
+        self.assertEqual(names.get().search("jon"), ["Jon Jones"])
+
+        Fighter.objects.create(first_name="Jon", last_name="Fitch", url="http://ufcstats.com/fighter-details/2")
+        self.assertEqual(names.get().search("jon"), ["Jon Jones"])
+
+        bump_data_generation()
+        self.assertEqual(names.get().search("jon"), ["Jon Fitch", "Jon Jones"])
+
+    def test_view_answers_from_memory(self):
+        Fighter.objects.create(first_name="Jon", last_name="Jones", url="http://ufcstats.com/fighter-details/1")
+
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            self.client.get("/fighters/autocomplete/", {"q": "jo"})
+            with self.assertNumQueries(0):
+                response = self.client.get("/fighters/autocomplete/", {"q": "jon jo"})
+
+        self.assertEqual(response.json(), ["Jon Jones"])
+
+
+class FuzzySearchTests(TestCase):
+    def setUp(self):
+        fighter_trigrams.clear()
+        for i, (first, last, nickname) in enumerate([
+            ("Volkan", "Oezdemir", "No Time"),
+            ("Jiří", "Procházka", "Denisa"),
+            ("Jon", "Jones", "Bones"),
+            ("Jon", "Fitch", None),
+        ]):
+            Fighter.objects.create(first_name=first, last_name=last, nickname=nickname,
+                                   url=f"http://ufcstats.com/fighter-details/{i}")
+
+    def names(self, query: str):
+        ids = search_fighters(query).ids
+        fighters = Fighter.objects.in_bulk(ids)
+        return [fighters[i].last_name for i in ids]
+
+    def test_tolerates_spellings_and_accents(self):
+        self.assertEqual(fold("Jiří Procházka"), "jiri prochazka")
+        self.assertEqual(self.names("Özdemir"), ["Oezdemir"])
+        self.assertEqual(self.names("jiri prochazka"), ["Procházka"])
+        self.assertEqual(self.names("Jon Jonnes"), ["Jones"])
+        self.assertEqual(self.names("bones"), ["Jones"])
+        self.assertEqual(self.names("xyz"), [])
+
+    def test_index_limits_matches(self):
+        index = TrigramIndex([(1, "jon jones bones"), (2, "jon fitch"), (3, "jonathan martinez")])
+
+        keys, count = index.search("jon", limit=2)
+        self.assertEqual(([key[2] for key in keys], count), ([1, 2], 3))
+        keys, _ = index.search("jon", after=keys[-1])
+        self.assertEqual([key[2] for key in keys], [3])
+        self.assertEqual([key[2] for key in index.search("fitch")[0]], [2])
+
+
+class SearchPaginationTests(TestCase):
+    def setUp(self):
+        fighter_trigrams.clear()
+        Fighter.objects.bulk_create(
+            Fighter(first_name="Jon", last_name=f"Doe{i}", search_name=f"jon doe{i}",
+                    url=f"http://ufcstats.com/fighter-details/{i}")
+            for i in range(60))
+
+    def get(self, path: str, **params):
+        with self.settings(ALLOWED_HOSTS=["testserver"]):
+            return self.client.get(path, params)
+
+    def test_pages_through_every_match_once(self):
+        for path in ["/fighters/", "/fighters/results/"]:
+            seen = []
+            params = {"q": "jon doe", "limit": 20}
+            while True:
+                response = self.get(path, **params)
+                page = response.context["fighters"]
+                self.assertLessEqual(len(page), 20)
+                self.assertEqual(response.context["estimated_count"], 60)
+                seen += [f["id"] if isinstance(f, dict) else f.id for f in page]
+                if not response.context["next_cursor"]:
+                    break
+                params["after"] = response.context["next_cursor"]
+
+            self.assertEqual(sorted(seen), sorted(Fighter.objects.values_list("id", flat=True)))
+
+    def test_caps_page_size(self):
+        response = self.get("/fighters/results/", q="jon", limit=1000)
+
+        self.assertEqual(len(response.context["fighters"]), MAX_PAGE_SIZE)
+        self.assertContains(response, "About 60 fighters found")
+
+    def test_next_page_link_keeps_page_size(self):
+        for path in ["/fighters/", "/fighters/results/"]:
+            response = self.get(path, q="jon doe", limit=7)
+            self.assertContains(response, f"limit=7&after={response.context['next_cursor']}")
+
+    def test_ignores_malformed_cursor(self):
+        response = self.get("/fighters/results/", q="jon", after="not-a-cursor")
+
+        self.assertEqual(len(response.context["fighters"]), DEFAULT_PAGE_SIZE)
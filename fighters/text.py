@@ -0,0 +1,31 @@
+import unicodedata
+
+
+def fold(text: str) -> str:
+    """
+    Fold case and accents out of `text`, so "José Aldo" is found by typing "jose al".
+    """
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(stripped.casefold().split())
+
+
+def search_name(*names) -> str:
+    """
+    The folded names of a fighter joined into the text their name searches match against.
+    Missing names, such as an empty nickname, are left out.
+    """
+    return fold(' '.join(n for n in names if isinstance(n, str)))
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    The trigrams of each word of folded `text`, padded as pg_trgm pads them, so a word
+    start counts for more than its middle.
+    """
+    return {
+        padded[i:i + 3]
+        for word in text.split()
+        for padded in [f"  {word} "]
+        for i in range(len(padded) - 2)
+    }
@@ -15,11 +15,19 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.urls import path
 from . import views
 
-urlpatterns = [
-    path('', views.search_fighter, name='search_fighter'),
-    path('results/', views.fighter_results, name='fighter_results'),
-    path('autocomplete/', views.autocomplete_fighters, name='autocomplete_fighters'),
-]
\ No newline at end of file
+if settings.ASYNC_VIEWS:
+    urlpatterns = [
+        path('', views.search_fighter_async, name='search_fighter'),
+        path('results/', views.fighter_results_async, name='fighter_results'),
+        path('autocomplete/', views.autocomplete_fighters_async, name='autocomplete_fighters'),
+    ]
+else:
+    urlpatterns = [
+        path('', views.search_fighter, name='search_fighter'),
+        path('results/', views.fighter_results, name='fighter_results'),
+        path('autocomplete/', views.autocomplete_fighters, name='autocomplete_fighters'),
+    ]
\ No newline at end of file
@@ -1,70 +1,108 @@
 from django.shortcuts import render
 from django.http import JsonResponse
+from fighters.autocomplete import fighter_names
 from fighters.models import Fighter
-from fights.models import FightStat
-from django.db.models import Q
+from fighters.search import DEFAULT_PAGE_SIZE, asearch_fighters, search_fighters
+from fighters.stats import awith_career_stats, with_career_stats
+
+def _page_args(request, query: str):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return query, limit, request.GET.get('after')
+
+
+def _ranked(fighters: list[dict], ids: list[int]):
+    # Put fighters fetched by id back in the order they were ranked in
+    rank = {fighter_id: i for i, fighter_id in enumerate(ids)}
+    return sorted(fighters, key=lambda f: rank[f["id"]])
+
 
 def search_fighter(request):
     query = request.GET.get('q', '').strip()
-    fighters = []
-
-    if query:
-        parts = query.split()
-        if len(parts) == 1:
-            fighters = Fighter.objects.filter(first_name__icontains=parts[0]) | Fighter.objects.filter(last_name__icontains=parts[0])
-        elif len(parts) >= 2:
-            fighters = Fighter.objects.filter(first_name__icontains=parts[0], last_name__icontains=parts[1])
-
-    # Attach stats to each fighter
-    for fighter in fighters:
-        stats_qs = FightStat.objects.filter(fighter=fighter)
-        if stats_qs.exists():
-            fighter.fight_stats = {
-            "total_kd": sum(s.knockdowns for s in stats_qs),
-            "total_sig": sum(s.sig_strikes for s in stats_qs),
-            "total_sig_att": sum(s.sig_strikes_attempted for s in stats_qs),
-            "total_td": sum(s.takedowns for s in stats_qs),
-            "total_td_att": sum(s.takedowns_attempted for s in stats_qs),
-            "total_ctrl": sum(s.control_time for s in stats_qs),
-            "submission_attempts": sum(s.submission_attempts for s in stats_qs),
-            "reversals": sum(s.reversals for s in stats_qs),
-            "head_strikes": sum(s.head_strikes for s in stats_qs),
-            "head_strikes_attempted": sum(s.head_strikes_attempted for s in stats_qs),
-            "body_strikes": sum(s.body_strikes for s in stats_qs),
-            "body_strikes_attempted": sum(s.body_strikes_attempted for s in stats_qs),
-            "leg_strikes": sum(s.leg_strikes for s in stats_qs),
-            "leg_strikes_attempted": sum(s.leg_strikes_attemped for s in stats_qs),
-            "distance_strikes": sum(s.distance_strikes for s in stats_qs),
-            "distance_strikes_attempted": sum(s.distance_strikes_attempted for s in stats_qs),
-            "clinch_strikes": sum(s.clinch_strikes for s in stats_qs),
-            "clinch_strikes_attempted": sum(s.clinch_strikes_attempted for s in stats_qs),
-            "ground_strikes": sum(s.ground_strikes for s in stats_qs),
-            "ground_strikes_attempted": sum(s.ground_strikes_attemped for s in stats_qs),
-        }
-        else:
-            fighter.fight_stats = None
 
+    # A page of the fighters best matching the query, along with their career stats
+    query, limit, after = _page_args(request, query)
+    page = search_fighters(query, limit, after)
+    fighters = _ranked(with_career_stats(Fighter.objects.filter(pk__in=page.ids)), page.ids)
 
     context = {
         "fighters": fighters,
         "query": query,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "estimated_count": page.estimated_count,
     }
     return render(request, 'fighters/search_fighter.html', context)
 
 
 def fighter_results(request):
     query = request.GET.get("q", "")
-    fighters = Fighter.objects.filter(
-        Q(first_name__icontains=query) |
-        Q(last_name__icontains=query) |
-        Q(first_name__icontains=query.split(" ")[0], last_name__icontains=" ".join(query.split(" ")[1:]))
-    )
-    
-    return render(request, "fighters/fighter_results.html", {"fighters": fighters, "query": query})
+    query, limit, after = _page_args(request, query)
+    page = search_fighters(query, limit, after)
+    matches = Fighter.objects.in_bulk(page.ids)
+    fighters = [matches[i] for i in page.ids if i in matches]
+
+    return render(request, "fighters/fighter_results.html", {
+        "fighters": fighters,
+        "query": query,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "estimated_count": page.estimated_count,
+    })
 
 
 def autocomplete_fighters(request):
     query = request.GET.get('q', '')
-    fighters = Fighter.objects.filter(first_name__istartswith=query) | Fighter.objects.filter(last_name__istartswith=query)
-    names = [f"{f.first_name} {f.last_name}" for f in fighters]
+    # Answered from the in-memory name index, ranked by number of fights
+    names = fighter_names.get().search(query)
     return JsonResponse(names, safe=False)
+
+
+async def search_fighter_async(request):
+    """
+    Async version of `search_fighter`, for serving under ASGI.
+    """
+    query = request.GET.get('q', '').strip()
+
+    query, limit, after = _page_args(request, query)
+    page = await asearch_fighters(query, limit, after)
+    fighters = _ranked(await awith_career_stats(Fighter.objects.filter(pk__in=page.ids)), page.ids)
+
+    context = {
+        "fighters": fighters,
+        "query": query,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "estimated_count": page.estimated_count,
+    }
+    return render(request, 'fighters/search_fighter.html', context)
+
+
+async def fighter_results_async(request):
+    """
+    Async version of `fighter_results`, for serving under ASGI.
+    """
+    query = request.GET.get("q", "")
+    query, limit, after = _page_args(request, query)
+    page = await asearch_fighters(query, limit, after)
+    matches = await Fighter.objects.ain_bulk(page.ids)
+    fighters = [matches[i] for i in page.ids if i in matches]
+
+    return render(request, "fighters/fighter_results.html", {
+        "fighters": fighters,
+        "query": query,
+        "limit": limit,
+        "next_cursor": page.next_cursor,
+        "estimated_count": page.estimated_count,
+    })
+
+
+async def autocomplete_fighters_async(request):
+    """
+    Async version of `autocomplete_fighters`, for serving under ASGI.
+    """
+    query = request.GET.get('q', '')
+    index = await fighter_names.aget()
+    return JsonResponse(index.search(query), safe=False)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fights', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fightstat',
+            name='round',
+            field=models.PositiveSmallIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+BATCH_SIZE = 1000
+
+
+def deduplicate_fight_urls(apps, schema_editor):
+    """
+    Merge fights sharing a url into the first one created, so the url can be made unique.
+    """
+    Fight = apps.get_model("fights", "Fight")
+    FightStat = apps.get_model("fights", "FightStat")
+
+    duplicated = (Fight.objects.values("url").annotate(count=Count("id"), keep=Min("id"))
+                  .filter(count__gt=1))
+    for row in duplicated:
+        duplicates = Fight.objects.filter(url=row["url"]).exclude(id=row["keep"])
+        FightStat.objects.filter(fight__in=duplicates).update(fight_id=row["keep"])
+        duplicates.delete()
+
+
+def backfill_rounds(apps, schema_editor):
+    """
+    Number existing stats by round. Stats were inserted one round after another, so the stats
+    of a fighter in a fight are numbered in insertion order. Every load used to insert them
+    again, so those past the number of rounds the fight lasted are repeats and are removed.
+    """
+    FightStat = apps.get_model("fights", "FightStat")
+
+    stats = (FightStat.objects.filter(round__isnull=True)
+             .order_by("fight_id", "fighter_id", "id")
+             .values_list("id", "fight_id", "fighter_id", "fight__round"))
+
+    updates, repeats = [], []
+    key, position = None, 0
+    for stat_id, fight_id, fighter_id, rounds in stats.iterator(chunk_size=BATCH_SIZE):
+        position = position + 1 if key == (fight_id, fighter_id) else 1
+        key = (fight_id, fighter_id)
+
+        if position > max(rounds or 0, 1):
+            repeats.append(stat_id)
+        else:
+            updates.append(FightStat(id=stat_id, round=position))
+
+    FightStat.objects.bulk_update(updates, ["round"], batch_size=BATCH_SIZE)
+    for i in range(0, len(repeats), BATCH_SIZE):
+        FightStat.objects.filter(id__in=repeats[i:i + BATCH_SIZE]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fights', '0002_fightstat_round'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_fight_urls, migrations.RunPython.noop),
+        migrations.RunPython(backfill_rounds, migrations.RunPython.noop),
+    ]
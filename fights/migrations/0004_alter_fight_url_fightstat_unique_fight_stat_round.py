@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_alter_event_url'),
+        ('fighters', '0003_alter_fighter_url'),
+        ('fights', '0003_backfill_fightstat_round'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fight',
+            name='url',
+            field=models.CharField(max_length=128, unique=True),
+        ),
+        migrations.AddConstraint(
+            model_name='fightstat',
+            constraint=models.UniqueConstraint(fields=('fight', 'fighter', 'round'), name='unique_fight_stat_round'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 00:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fights', '0004_alter_fight_url_fightstat_unique_fight_stat_round'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fightstat',
+            name='round',
+            field=models.PositiveSmallIntegerField(),
+        ),
+    ]
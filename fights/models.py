@@ -25,7 +25,7 @@ class Fight(models.Model):
     time_format = models.CharField(max_length=32)
     referee = models.CharField(max_length=32, null=True)
     details = models.CharField(max_length=256, null=True)
-    url = models.CharField(max_length=128)
+    url = models.CharField(max_length=128, unique=True)
 
     def __str__(self):
         return self.bout
@@ -46,6 +46,7 @@ class FightStat(models.Model):
         on_delete=models.CASCADE,
         related_name="stats"
     )
+    round = models.PositiveSmallIntegerField()
 
     knockdowns = models.IntegerField()
     submission_attempts = models.IntegerField()
@@ -71,5 +72,11 @@ class FightStat(models.Model):
     ground_strikes = models.IntegerField()
     ground_strikes_attemped = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["fight", "fighter", "round"], name="unique_fight_stat_round"),
+        ]
+
     def __str__(self):
-        return f"{self.fighter} stats for {self.fight.bout}: round {self.fight.round}"
+        return f"{self.fighter} stats for {self.fight.bout}: round {self.round}"
@@ -48,6 +48,9 @@ SECRET_KEY = os.getenv(
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = strtobool(os.getenv("DJANGO_DEBUG", "false"))
 
+# Route the read-heavy pages to their async views, set when serving through asgi.py
+ASYNC_VIEWS = strtobool(os.getenv("ASYNC_VIEWS", "false"))
+
 ALLOWED_HOSTS = []
 
 
@@ -63,6 +66,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
@@ -121,6 +125,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Cached pages are keyed by data generation rather than expired, so they can be kept for long
+
+CACHE_TYPE = os.getenv("CACHE_TYPE", "locmem")
+CACHE_TIMEOUT = int(os.getenv("CACHE_TIMEOUT", 24 * 60 * 60))
+
+if CACHE_TYPE == "redis":
+    CACHE_CONFIG = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", "redis://localhost:6379"),
+    }
+elif CACHE_TYPE == "file":
+    CACHE_CONFIG = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_LOCATION", BASE_DIR / "cache"),
+    }
+else:
+    CACHE_CONFIG = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "octagonanalytics",
+    }
+
+CACHES = {
+    'default': {**CACHE_CONFIG, 'TIMEOUT': CACHE_TIMEOUT}
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -202,4 +234,12 @@ LOGGING = {
     "root": {
         "handlers": ["console", "file"],
     },
+    "loggers": {
+        # Per-stage load_database performance metrics, written as JSON records to the log file
+        "events.loader.metrics": {
+            "handlers": ["file"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
 }